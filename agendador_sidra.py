@@ -0,0 +1,203 @@
+"""
+Orquestração assíncrona das extrações com limite global de requisições.
+
+- `LimitadorTaxa`: balde de fichas compartilhado por todos os workers (e
+  pelas threads que eles usam). Cada requisição ao SIDRA consome uma ficha;
+  com o balde vazio, quem pede espera a sua vez em vez de ser recusado (429).
+- `AgendadorExtracoes`: fila com prioridade (trabalhos urgentes passam na
+  frente) consumida por `concorrencia` workers asyncio. As chamadas
+  bloqueantes (urllib3 na API, WebDriver no navegador) rodam em threads via
+  `asyncio.to_thread`, então o loop nunca trava.
+
+Caminho "api": cada requisição HTTP feita por `sidra_api.obter` consome uma
+ficha. Caminho "navegador": o trabalho consome `CUSTO_NAVEGADOR` fichas
+antes de começar (busca, página da tabela e download).
+
+Uso:
+    python agendador_sidra.py --trabalhos 20 --taxa 5 --concorrencia 4 --urgentes 2
+"""
+import argparse
+import asyncio
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import sidra_api
+from configuracao import DOWNLOAD_DIR
+from extracao_paralela import ResultadoExtracao, TrabalhoExtracao, executar_trabalho, imprimir_relatorio
+
+PRIORIDADE_URGENTE = 0
+PRIORIDADE_NORMAL = 10
+
+# Requisições "de página" que uma extração pelo navegador faz ao SIDRA
+CUSTO_NAVEGADOR = 3
+
+
+class LimitadorTaxa:
+    """
+    Balde de fichas: `taxa` fichas por segundo, rajada de até `capacidade`.
+
+    Funciona com reserva: cada pedido desconta as fichas na hora (o saldo
+    pode ficar negativo) e recebe o tempo que precisa esperar, então os
+    pedidos são atendidos na ordem de chegada. Seguro entre threads;
+    `aguardar` bloqueia (threads) e `adquirir` é a versão asyncio.
+    """
+
+    def __init__(self, taxa, capacidade=None):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade if capacidade is not None else max(1.0, taxa))
+        self.fichas = self.capacidade
+        self.atualizado = time.monotonic()
+        self.espera_total = 0.0
+        self._lock = threading.Lock()
+
+    def _reservar(self, fichas=1):
+        with self._lock:
+            agora = time.monotonic()
+            self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado) * self.taxa)
+            self.atualizado = agora
+            self.fichas -= fichas
+            espera = -self.fichas / self.taxa if self.fichas < 0 else 0.0
+            self.espera_total += espera
+            return espera
+
+    def aguardar(self, fichas=1):
+        espera = self._reservar(fichas)
+        if espera:
+            time.sleep(espera)
+
+    async def adquirir(self, fichas=1):
+        espera = self._reservar(fichas)
+        if espera:
+            await asyncio.sleep(espera)
+
+
+@dataclass(order=True)
+class TarefaAgendada:
+    prioridade: int
+    sequencia: int
+    trabalho: TrabalhoExtracao = field(compare=False)
+    enviado_em: float = field(compare=False, default_factory=time.perf_counter)
+
+
+def especificacao_api(trabalho):
+    """`TrabalhoExtracao` -> especificação de `sidra_api.extrair_via_api`."""
+    return {
+        **sidra_api.ESPECIFICACAO_1209,
+        "tabela": trabalho.tabela,
+        "filtros": trabalho.filtros,
+        "prefixo": trabalho.prefixo,
+    }
+
+
+class AgendadorExtracoes:
+    """
+    Executa `TrabalhoExtracao` com concorrência limitada e taxa global.
+
+    `via` = "api" (HTTP, sem navegador) ou "navegador" (requer `pool`, um
+    `PoolNavegadores` já iniciado, com ao menos `concorrencia` sessões).
+    """
+
+    def __init__(self, limitador, concorrencia=4, via="api", pool=None, pasta_base=DOWNLOAD_DIR):
+        if via == "navegador" and pool is None:
+            raise ValueError("❌ O caminho 'navegador' requer um PoolNavegadores.")
+        self.limitador = limitador
+        self.concorrencia = concorrencia
+        self.via = via
+        self.pool = pool
+        self.pasta_base = Path(pasta_base)
+        self.resultados = []
+        self.esperas = {}  # sequência -> segundos na fila até começar
+        self._fila = asyncio.PriorityQueue()
+        self._sequencia = itertools.count()
+
+    def submeter(self, trabalho, prioridade=PRIORIDADE_NORMAL):
+        """Enfileira um trabalho; urgentes (prioridade menor) saem primeiro."""
+        tarefa = TarefaAgendada(prioridade, next(self._sequencia), trabalho)
+        self._fila.put_nowait(tarefa)
+        return tarefa
+
+    def _executar_api(self, trabalho, pasta):
+        return sidra_api.extrair_via_api(especificacao_api(trabalho), pasta)
+
+    def _executar_navegador(self, trabalho):
+        with self.pool.sessao() as sessao:
+            return executar_trabalho(sessao.driver, trabalho, sessao.pasta)
+
+    async def _worker(self, indice):
+        pasta = self.pasta_base / f"worker_{indice}"
+        pasta.mkdir(parents=True, exist_ok=True)
+        while True:
+            tarefa = await self._fila.get()
+            inicio = time.perf_counter()
+            self.esperas[tarefa.sequencia] = inicio - tarefa.enviado_em
+            try:
+                if self.via == "navegador":
+                    await self.limitador.adquirir(CUSTO_NAVEGADOR)
+                    arquivo = await asyncio.to_thread(self._executar_navegador, tarefa.trabalho)
+                else:
+                    arquivo = await asyncio.to_thread(self._executar_api, tarefa.trabalho, pasta)
+                self.resultados.append(ResultadoExtracao(tarefa.trabalho, indice, time.perf_counter() - inicio,
+                                                         arquivo=arquivo))
+            except Exception as e:
+                print(f"   -> ❌ [worker {indice}] Tabela {tarefa.trabalho.tabela}: {e}")
+                self.resultados.append(ResultadoExtracao(tarefa.trabalho, indice, time.perf_counter() - inicio,
+                                                         erro=str(e)))
+            finally:
+                self._fila.task_done()
+
+    async def executar(self):
+        """Processa a fila até esvaziar; retorna (resultados, duração)."""
+        anterior = sidra_api._limitador
+        sidra_api.definir_limitador(self.limitador)
+        inicio = time.perf_counter()
+        workers = [asyncio.create_task(self._worker(i)) for i in range(self.concorrencia)]
+        try:
+            await self._fila.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            sidra_api.definir_limitador(anterior)
+        return self.resultados, time.perf_counter() - inicio
+
+
+async def executar_agendado(trabalhos, urgentes=(), taxa=5.0, concorrencia=4, via="api", pool=None,
+                            pasta_base=DOWNLOAD_DIR):
+    """Atalho: enfileira `trabalhos` (normais) e `urgentes` e executa tudo."""
+    agendador = AgendadorExtracoes(LimitadorTaxa(taxa), concorrencia, via, pool, pasta_base)
+    for trabalho in trabalhos:
+        agendador.submeter(trabalho)
+    for trabalho in urgentes:
+        agendador.submeter(trabalho, PRIORIDADE_URGENTE)
+    resultados, duracao = await agendador.executar()
+    return agendador, resultados, duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrações SIDRA com asyncio e limite global de requisições.")
+    parser.add_argument("--trabalhos", type=int, default=10, help="Quantidade de extrações normais.")
+    parser.add_argument("--urgentes", type=int, default=0, help="Extrações urgentes enfileiradas por último.")
+    parser.add_argument("--taxa", type=float, default=5.0, help="Requisições por segundo ao SIDRA (todos os workers).")
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument("--navegador", action="store_true", help="Extrai pela interface (pool de navegadores headless).")
+    args = parser.parse_args()
+
+    trabalhos = [TrabalhoExtracao("1209", prefixo=f"populacao_60mais_1209_{i:03d}") for i in range(args.trabalhos)]
+    urgentes = [TrabalhoExtracao("1209", prefixo=f"urgente_1209_{i:03d}") for i in range(args.urgentes)]
+
+    if args.navegador:
+        from pool_navegadores import PoolNavegadores
+
+        with PoolNavegadores(args.concorrencia) as pool:
+            _, resultados, duracao = asyncio.run(executar_agendado(
+                trabalhos, urgentes, args.taxa, args.concorrencia, "navegador", pool))
+    else:
+        _, resultados, duracao = asyncio.run(executar_agendado(trabalhos, urgentes, args.taxa, args.concorrencia))
+    imprimir_relatorio(resultados, duracao, args.concorrencia)
+
+
+if __name__ == "__main__":
+    main()
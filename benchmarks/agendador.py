@@ -0,0 +1,73 @@
+"""
+Agendador asyncio contra um servidor que impõe limite de requisições.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.agendador --trabalhos 30 --limite-servidor 10 --concorrencia 8
+
+Sobe `mock_sidra.servidor` recusando (429) o que passar de
+`--limite-servidor` req/s e executa as mesmas extrações pela API com o
+limitador do cliente em várias taxas (a maior equivale a "sem limitador").
+Para cada taxa mostra a duração, a vazão, quantas requisições o servidor
+recusou e a espera média na fila dos trabalhos urgentes x normais.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agendador asyncio x servidor com throttling.")
+    parser.add_argument("--trabalhos", type=int, default=30)
+    parser.add_argument("--urgentes", type=int, default=3)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--limite-servidor", type=float, default=10.0, help="Req/s aceitas pelo servidor.")
+    parser.add_argument("--taxas", type=float, nargs="+", default=None,
+                        help="Taxas do limitador a comparar (padrão: 1000, o limite e 80%% dele).")
+    args = parser.parse_args()
+    taxas = args.taxas or [1000.0, args.limite_servidor, args.limite_servidor * 0.8]
+
+    from mock_sidra.servidor import iniciar_servidor
+
+    servidor, base = iniciar_servidor(limite=args.limite_servidor)
+    os.environ["SIDRA_API_URL"] = base
+    os.environ["SIDRA_API_METADADOS_URL"] = f"{base}/api/v3/agregados"
+
+    # Importados depois de configurar as URLs (lidas na importação)
+    from agendador_sidra import executar_agendado
+    from extracao_paralela import TrabalhoExtracao
+
+    limite = servidor.RequestHandlerClass.limite
+    linhas = []
+    for taxa in taxas:
+        trabalhos = [TrabalhoExtracao("1209", prefixo=f"normal_{i:03d}") for i in range(args.trabalhos)]
+        urgentes = [TrabalhoExtracao("1209", prefixo=f"urgente_{i:03d}") for i in range(args.urgentes)]
+        time.sleep(limite.capacidade / limite.por_segundo)  # balde do servidor cheio de novo
+        limite.atendidas = limite.recusadas = 0
+
+        with tempfile.TemporaryDirectory(prefix="sidra_agendador_") as pasta:
+            agendador, resultados, duracao = asyncio.run(executar_agendado(
+                trabalhos, urgentes, taxa=taxa, concorrencia=args.concorrencia, pasta_base=pasta))
+
+        ok = sum(1 for r in resultados if r.sucesso)
+        esperas_urgentes = [agendador.esperas[s] for s in range(args.trabalhos, args.trabalhos + args.urgentes)]
+        esperas_normais = [agendador.esperas[s] for s in range(args.trabalhos)]
+        linhas.append((taxa, duracao, ok / duracao * 60, limite.recusadas,
+                       statistics.mean(esperas_urgentes) if esperas_urgentes else 0.0,
+                       statistics.mean(esperas_normais)))
+        print(f"   -> taxa {taxa:g}/s: {ok}/{len(resultados)} ok em {duracao:.1f}s")
+
+    servidor.shutdown()
+
+    print(f"\n📊 {args.trabalhos} normais + {args.urgentes} urgentes, {args.concorrencia} workers, "
+          f"servidor aceita {args.limite_servidor:g} req/s")
+    print(f"{'taxa (req/s)':>12} {'duração (s)':>12} {'tabelas/min':>12} {'429':>6} "
+          f"{'fila urgente':>13} {'fila normal':>12}")
+    for taxa, duracao, vazao, recusadas, urgente, normal in linhas:
+        print(f"{taxa:>12g} {duracao:>12.2f} {vazao:>12.1f} {recusadas:>6} {urgente:>12.2f}s {normal:>11.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Latência da extração pela API x pela interface (Selenium).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.api_vs_navegador --execucoes 5
+    python -m benchmarks.api_vs_navegador --stub --somente-api
+
+`--stub` sobe o servidor local `mock_sidra.servidor` com as respostas
+sintéticas e aponta a API para ele. O caminho Selenium usa o perfil headless
+e o site definido em SIDRA_BASE_URL.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def medir(funcao, execucoes):
+    tempos = []
+    for _ in range(execucoes):
+        with tempfile.TemporaryDirectory(prefix="sidra_bench_") as pasta:
+            inicio = time.perf_counter()
+            funcao(pasta)
+            tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extração pela API x pelo navegador.")
+    parser.add_argument("--execucoes", type=int, default=5)
+    parser.add_argument("--stub", action="store_true", help="Usa o servidor local com respostas sintéticas.")
+    parser.add_argument("--somente-api", action="store_true")
+    args = parser.parse_args()
+
+    if args.stub:
+        from mock_sidra.servidor import iniciar_servidor
+        _, base = iniciar_servidor()
+        os.environ["SIDRA_API_URL"] = base
+        os.environ["SIDRA_API_METADADOS_URL"] = f"{base}/api/v3/agregados"
+
+    # Importados depois de configurar as URLs (lidas na importação)
+    import sidra_api
+
+    resultados = {"API (HTTP)": medir(lambda pasta: sidra_api.extrair_via_api(download_dir=pasta), args.execucoes)}
+
+    if not args.somente_api:
+        from selenium.webdriver.support.ui import WebDriverWait
+        from desafio_ibge_1209 import aplicar_filtros_tabela, baixar_csv, buscar_tabela_1209, iniciar_driver
+
+        def via_navegador(pasta):
+            driver = iniciar_driver(download_dir=pasta, headless=True)
+            try:
+                wait = WebDriverWait(driver, 30)
+                buscar_tabela_1209(driver, wait)
+                aplicar_filtros_tabela(wait)
+                baixar_csv(wait, download_dir=pasta)
+            finally:
+                driver.quit()
+
+        resultados["Selenium (headless)"] = medir(via_navegador, args.execucoes)
+
+    print("\n" + "="*60)
+    print(f"{'caminho':<22} {'p50 (s)':>9} {'média (s)':>10} {'máx (s)':>9}")
+    print("="*60)
+    for nome, tempos in resultados.items():
+        print(f"{nome:<22} {statistics.median(tempos):9.2f} {statistics.mean(tempos):10.2f} {max(tempos):9.2f}")
+
+
+if __name__ == "__main__":
+    main()
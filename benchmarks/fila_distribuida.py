@@ -0,0 +1,92 @@
+"""
+Fila distribuída com vários nós (processos) e um nó derrubado no meio.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.fila_distribuida --trabalhos 40 --nos 3 --workers 2 --latencia 0.2
+
+Sobe `mock_sidra.servidor` com latência, enfileira `--trabalhos`
+especificações da Tabela 1209 em uma pasta temporária e inicia `--nos`
+processos `fila_distribuida.py trabalhar --via api`, cada um como um nó.
+Após `--matar-apos` segundos o primeiro nó recebe SIGKILL (sem chance de
+devolver o que estava fazendo): os trabalhos dele precisam voltar à fila
+quando o arrendamento (`--arrendamento`) vencer. No fim confere que todos
+os trabalhos foram concluídos e mostra a vazão por nó.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fila distribuída: vazão por nó e recuperação de nó morto.")
+    parser.add_argument("--trabalhos", type=int, default=40)
+    parser.add_argument("--nos", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2, help="Workers por nó.")
+    parser.add_argument("--latencia", type=float, default=0.2, help="Atraso de cada resposta do mock (s).")
+    parser.add_argument("--arrendamento", type=float, default=3.0, help="Duração do arrendamento (s).")
+    parser.add_argument("--matar-apos", type=float, default=1.5, help="Segundos até derrubar o 1º nó (0 = não).")
+    args = parser.parse_args()
+
+    from mock_sidra.servidor import iniciar_servidor
+
+    servidor, base = iniciar_servidor(latencia=args.latencia)
+    servidor.handle_error = lambda *_: None  # conexões cortadas pelo nó derrubado (BrokenPipe) são esperadas
+    os.environ.update({
+        "SIDRA_API_URL": base,
+        "SIDRA_API_METADADOS_URL": f"{base}/api/v3/agregados",
+        "SIDRA_FILA_ARRENDAMENTO": str(args.arrendamento),
+    })
+
+    # Importados depois de configurar o arrendamento (lido na importação)
+    from configuracao import FILTROS_1209
+    from fila_distribuida import FilaArquivos, imprimir_status
+    from plano_extracao import normalizar
+
+    with tempfile.TemporaryDirectory(prefix="sidra_fila_") as pasta:
+        fila = FilaArquivos(Path(pasta) / "fila")
+        fila.enfileirar([normalizar({"tabela": "1209", "classificacoes": {"C58": FILTROS_1209},
+                                     "saida": f"trabalho_{i:03d}_{{tabela}}"}) for i in range(args.trabalhos)])
+
+        inicio = time.perf_counter()
+        processos, logs = [], []
+        for i in range(args.nos):
+            log = open(Path(pasta) / f"no-{i}.log", "w", encoding="utf-8")
+            logs.append(log)
+            ambiente = {**os.environ, "SIDRA_DOWNLOAD_DIR": str(Path(pasta) / f"dados_{i}")}
+            processos.append(subprocess.Popen(
+                [sys.executable, "fila_distribuida.py", "trabalhar", "--via", "api", "--fila", str(fila.pasta),
+                 "--no", f"no-{i}", "--workers", str(args.workers)],
+                cwd=RAIZ, env=ambiente, stdout=log, stderr=subprocess.STDOUT))
+
+        if args.matar_apos > 0 and args.nos > 1:
+            time.sleep(args.matar_apos)
+            em_uso = fila.contagem()["em_execucao"]
+            processos[0].send_signal(signal.SIGKILL)
+            print(f"   -> 💀 no-0 derrubado após {args.matar_apos:g}s ({em_uso} trabalho(s) em execução na fila)")
+
+        for processo, log in zip(processos, logs):
+            processo.wait()
+            log.close()
+        duracao = time.perf_counter() - inicio
+        servidor.shutdown()
+
+        imprimir_status(fila)
+        contagem = fila.contagem()
+        recuperados = [t for t in fila.concluidos() if any("arrendamento" in h["erro"] for h in t["historico"])]
+        enviados = len(list((fila.pasta / "resultados").glob("*.csv")))
+        print(f"\n📊 {contagem['concluidos']}/{args.trabalhos} concluídos em {duracao:.1f}s "
+              f"({contagem['concluidos'] / duracao * 60:.0f} tabelas/min), {enviados} CSV(s) em resultados/, "
+              f"{len(recuperados)} recuperado(s) de nó morto")
+        if contagem["concluidos"] != args.trabalhos:
+            raise SystemExit(f"❌ {args.trabalhos - contagem['concluidos']} trabalho(s) não concluído(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compara a seleção de filtros opção a opção com a seleção em lote.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.filtros_lote --repeticoes 5
+
+Carrega a fixture local `mock_sidra/painel_c58.html` (lista virtualizada do
+painel "Grupo de idade") em um navegador headless, aplica FILTROS_1209 com
+`clicar_botao_sidra_toggle` e com `aplicar_estado_filtros` e reporta tempo e
+número de round-trips WebDriver de cada abordagem. O estado final de cada
+execução é conferido contra o estado desejado.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from desafio_ibge_1209 import FILTROS_1209, aplicar_estado_filtros, clicar_botao_sidra_toggle, iniciar_driver
+
+FIXTURE = Path(__file__).resolve().parent.parent / "mock_sidra" / "painel_c58.html"
+
+
+def contar_round_trips(driver):
+    """Envolve `driver.execute` para contar os comandos enviados ao chromedriver."""
+    original = driver.execute
+    driver.round_trips = 0
+
+    def execute(*args, **kwargs):
+        driver.round_trips += 1
+        return original(*args, **kwargs)
+
+    driver.execute = execute
+
+
+def por_opcao(driver):
+    wait = WebDriverWait(driver, 10)
+    for texto_opcao, marcar in FILTROS_1209.items():
+        clicar_botao_sidra_toggle(driver, wait, texto_opcao, marcar=marcar, escopo="#panel-C58")
+
+
+def em_lote(driver):
+    aplicar_estado_filtros(driver, FILTROS_1209, "#panel-C58")
+
+
+def medir(driver, abordagem):
+    driver.get(FIXTURE.as_uri())
+    driver.round_trips = 0
+    inicio = time.perf_counter()
+    abordagem(driver)
+    duracao = time.perf_counter() - inicio
+    chamadas = driver.round_trips
+
+    estado = driver.execute_script("return window.estadoFiltros();")
+    divergentes = [t for t, marcar in FILTROS_1209.items() if estado[t] != marcar]
+    if divergentes:
+        raise AssertionError(f"Estado final incorreto para: {divergentes}")
+    return duracao, chamadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seleção de filtros: opção a opção x lote.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sidra_bench_") as pasta:
+        driver = iniciar_driver(download_dir=pasta, headless=True)
+        try:
+            contar_round_trips(driver)
+            resultados = {
+                nome: [medir(driver, abordagem) for _ in range(args.repeticoes)]
+                for nome, abordagem in (("opção a opção", por_opcao), ("lote (1 script)", em_lote))
+            }
+        finally:
+            driver.quit()
+
+    print("\n" + "="*60)
+    print(f"{'abordagem':<18} {'tempo médio (ms)':>17} {'round-trips':>12}")
+    print("="*60)
+    for nome, medicoes in resultados.items():
+        tempos, chamadas = zip(*medicoes)
+        print(f"{nome:<18} {statistics.mean(tempos) * 1000:17.1f} {statistics.mean(chamadas):12.0f}")
+    print("\n✅ Estado final conferido em todas as execuções.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Mede o custo de inicialização: importação dos módulos e resolução do navegador.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.inicializacao --repeticoes 7
+    python -m benchmarks.inicializacao --driver   # também abre um navegador headless
+
+Cada medição roda em um interpretador novo (como uma execução real da CLI):
+
+- importação: tempo de `import <módulo>` descontado o de um interpretador vazio;
+  mostra que API/parser/cache não carregam mais o Selenium nem procuram o
+  navegador;
+- resolução: `resolver_navegador()` + `resolver_chromedriver()` com o cache
+  em disco vazio (frio) e já preenchido (quente), em um arquivo temporário;
+- com `--driver`: `iniciar_driver(headless=True)` frio x quente.
+
+Sem navegador instalado, as etapas de resolução e driver são puladas.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+MODULOS = ["parser_sidra", "cache_extracoes", "sidra_api", "desafio_ibge_1209"]
+
+RESOLVER = "from resolucao_navegador import resolver_chromedriver as r; r()"
+INICIAR = ("import tempfile; from desafio_ibge_1209 import iniciar_driver as i; "
+           "i(download_dir=tempfile.mkdtemp(), headless=True).quit()")
+
+
+def cronometrar(codigo, ambiente=None):
+    """Segundos de parede de `python -c <codigo>` em um interpretador novo."""
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=ambiente, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - inicio
+
+
+def mediana(codigo, repeticoes, ambiente=None):
+    return statistics.median(cronometrar(codigo, ambiente) for _ in range(repeticoes))
+
+
+def frio_quente(codigo, repeticoes, cache):
+    """(mediana com o cache apagado antes de cada rodada, mediana com o cache preenchido)."""
+    ambiente = {**os.environ, "SIDRA_RESOLUCAO_CACHE": str(cache)}
+    frios = []
+    for _ in range(repeticoes):
+        cache.unlink(missing_ok=True)
+        frios.append(cronometrar(codigo, ambiente))
+    return statistics.median(frios), mediana(codigo, repeticoes, ambiente)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação e de resolução do navegador.")
+    parser.add_argument("--repeticoes", type=int, default=7)
+    parser.add_argument("--driver", action="store_true", help="mede também iniciar_driver (abre um navegador)")
+    args = parser.parse_args()
+
+    base = mediana("pass", args.repeticoes)
+    print("\n" + "="*60)
+    print(f"{'importação':<24} {'tempo (ms)':>12}")
+    print("="*60)
+    for modulo in MODULOS:
+        tempo = mediana(f"import {modulo}", args.repeticoes) - base
+        print(f"{modulo:<24} {tempo * 1000:12.1f}")
+    print(f"(interpretador vazio: {base * 1000:.1f} ms, já descontado)")
+
+    try:
+        from resolucao_navegador import detectar_navegador
+        detectar_navegador()
+    except (FileNotFoundError, OSError) as e:
+        print(f"\n⚠️ Resolução do navegador não medida: {str(e).splitlines()[0]}")
+        return
+
+    etapas = [("resolver navegador+driver", RESOLVER)]
+    if args.driver:
+        etapas.append(("iniciar_driver", INICIAR))
+    with tempfile.TemporaryDirectory(prefix="sidra_bench_") as pasta:
+        cache = Path(pasta) / "navegador.json"
+        print("\n" + "="*60)
+        print(f"{'etapa':<26} {'frio (ms)':>10} {'quente (ms)':>12} {'ganho':>8}")
+        print("="*60)
+        for nome, codigo in etapas:
+            frio, quente = frio_quente(codigo, args.repeticoes, cache)
+            print(f"{nome:<26} {frio * 1000:10.1f} {quente * 1000:12.1f} {frio / quente:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark do parser de CSVs do SIDRA em um arquivo sintético grande.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.parser_csv --linhas 1000000 --colunas 4
+
+Gera um "br.csv" sintético (títulos, cabeçalho em dois níveis, marcadores
+"-"/"..."/"X" e notas de rodapé) e mede o caminho em streaming
+(`ler_registros`) e o caminho em lote com NumPy (`ler_arrays`): tempo,
+células por segundo e crescimento do pico de memória do processo.
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from parser_sidra import ler_arrays, ler_registros
+
+
+def pico_memoria_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 / 1024 if sys.platform == "darwin" else pico / 1024
+
+
+def gerar_arquivo(caminho, linhas, colunas, semente=1209):
+    rnd = random.Random(semente)
+    categorias = [f"{10 * i} a {10 * i + 9} anos" for i in range(colunas)]
+    marcadores = ["-", "...", "X"]
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        f.write("Tabela 9999 - Sintética, por grupos de idade\r\n")
+        f.write("Variável - População (Pessoas)\r\n")
+        f.write("Município;Ano x Grupo de idade\r\n")
+        f.write(";" + ";".join(["2022"] * colunas) + "\r\n")
+        f.write(";" + ";".join(categorias) + "\r\n")
+        for i in range(linhas):
+            valores = [
+                rnd.choice(marcadores) if rnd.random() < 0.01 else f"{rnd.randint(0, 999999)},{rnd.randint(0, 9)}"
+                for _ in range(colunas)
+            ]
+            f.write(f"Município {i:07d} (UF);" + ";".join(valores) + "\r\n")
+        f.write("\r\nFonte: IBGE - Sintético\r\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parser de CSV do SIDRA.")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--colunas", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sidra_bench_") as pasta:
+        caminho = os.path.join(pasta, "sintetico.csv")
+        print(f"🧪 Gerando {args.linhas:,} linhas x {args.colunas} colunas...")
+        gerar_arquivo(caminho, args.linhas, args.colunas)
+        tamanho_mb = os.path.getsize(caminho) / 1024 / 1024
+        celulas = args.linhas * args.colunas
+
+        memoria_base = pico_memoria_mb()
+        inicio = time.perf_counter()
+        total, soma = 0, 0.0
+        for registro in ler_registros(caminho):
+            total += 1
+            if registro.valor is not None:
+                soma += registro.valor
+        t_stream = time.perf_counter() - inicio
+        memoria_stream = pico_memoria_mb() - memoria_base
+        assert total == celulas
+
+        inicio = time.perf_counter()
+        arrays = ler_arrays(caminho)
+        t_lote = time.perf_counter() - inicio
+        memoria_lote = pico_memoria_mb() - memoria_base
+        assert len(arrays["valor"]) == celulas
+
+    print("\n" + "="*60)
+    print(f"Arquivo: {tamanho_mb:.0f} MB, {celulas:,} células")
+    print("="*60)
+    print(f"{'caminho':<22} {'tempo (s)':>10} {'células/s':>14} {'Δ pico RSS (MB)':>16}")
+    print(f"{'streaming (registros)':<22} {t_stream:10.2f} {celulas / t_stream:14,.0f} {memoria_stream:16.0f}")
+    print(f"{'lote (NumPy)':<22} {t_lote:10.2f} {celulas / t_lote:14,.0f} {memoria_lote:16.0f}")
+
+
+if __name__ == "__main__":
+    main()
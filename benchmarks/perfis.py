@@ -0,0 +1,93 @@
+"""
+Benchmark de CPU e memória por execução: perfil com janela x headless enxuto.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.perfis --execucoes 3
+
+Para cada perfil, executa o fluxo completo (iniciar driver, busca, filtros
+e download) e reporta tempo total, pico de RSS e tempo de CPU somados do
+chromedriver e de todos os processos do navegador. O perfil com janela
+requer um display (use `--somente-headless` em servidores sem X).
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from desafio_ibge_1209 import aplicar_filtros_tabela, baixar_csv, buscar_tabela_1209, iniciar_driver
+from pool_navegadores import cpu_navegador, rss_navegador
+
+PERFIS = {
+    "com janela": {"headless": False, "enxuto": False},
+    "headless enxuto": {"headless": True, "enxuto": True},
+}
+
+
+class AmostradorRSS(threading.Thread):
+    """Amostra o RSS do navegador em segundo plano e guarda o pico."""
+
+    def __init__(self, driver, intervalo=0.25):
+        super().__init__(daemon=True)
+        self.driver = driver
+        self.intervalo = intervalo
+        self.pico_mb = 0.0
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.is_set():
+            rss = rss_navegador(self.driver)
+            if rss is not None:
+                self.pico_mb = max(self.pico_mb, rss)
+            self._parar.wait(self.intervalo)
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+def executar_uma_vez(perfil):
+    """Executa o fluxo completo uma vez e retorna (segundos, pico RSS MB, CPU s)."""
+    with tempfile.TemporaryDirectory(prefix="sidra_bench_") as pasta:
+        inicio = time.perf_counter()
+        driver = iniciar_driver(download_dir=pasta, **perfil)
+        amostrador = AmostradorRSS(driver)
+        amostrador.start()
+        try:
+            wait = WebDriverWait(driver, 30)
+            buscar_tabela_1209(driver, wait)
+            aplicar_filtros_tabela(wait)
+            baixar_csv(wait, download_dir=pasta)
+            cpu = cpu_navegador(driver)
+        finally:
+            amostrador.parar()
+            driver.quit()
+        return time.perf_counter() - inicio, amostrador.pico_mb, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--execucoes", type=int, default=3)
+    parser.add_argument("--somente-headless", action="store_true")
+    args = parser.parse_args()
+
+    perfis = {k: v for k, v in PERFIS.items() if v["headless"] or not args.somente_headless}
+    resultados = {}
+    for nome, perfil in perfis.items():
+        print(f"\n▶️  Perfil: {nome}")
+        resultados[nome] = [executar_uma_vez(perfil) for _ in range(args.execucoes)]
+
+    print("\n" + "="*60)
+    print(f"{'perfil':<18} {'tempo (s)':>10} {'pico RSS (MB)':>14} {'CPU (s)':>9}")
+    print("="*60)
+    for nome, execucoes in resultados.items():
+        tempos, picos, cpus = zip(*execucoes)
+        cpus = [c for c in cpus if c is not None]
+        cpu = f"{statistics.mean(cpus):9.1f}" if cpus else f"{'n/d':>9}"
+        print(f"{nome:<18} {statistics.mean(tempos):10.1f} {statistics.mean(picos):14.0f} {cpu}")
+
+
+if __name__ == "__main__":
+    main()
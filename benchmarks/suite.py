@@ -0,0 +1,185 @@
+"""
+Suíte de benchmarks offline contra o mock local do SIDRA.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.suite --execucoes 5 --workers 1 2 4
+    python -m benchmarks.suite --referencia benchmarks/resultados/base.json
+
+Sobe `mock_sidra.servidor` (páginas + CSV) com latência e jitter
+configuráveis, aponta SIDRA_BASE_URL para ele e mede, sempre com o perfil
+headless enxuto:
+
+1. latência ponta a ponta e por etapa (p50/p95, a partir dos spans);
+2. vazão (tabelas/min) com N workers no pool de navegadores;
+3. memória: pico de RSS do navegador por execução.
+
+O resultado é gravado em JSON (`--saida`). Com `--referencia`, cada métrica
+é comparada com a de uma execução anterior e a suíte termina com código 1
+se alguma piorar mais que `--tolerancia` (padrão 20%).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+PASTA_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+
+def medir_ponta_a_ponta(execucoes):
+    """Fluxo completo `execucoes` vezes; retorna (tempos, picos de RSS, spans)."""
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    from benchmarks.perfis import AmostradorRSS
+    from desafio_ibge_1209 import aplicar_filtros_tabela, baixar_csv, buscar_tabela_1209, iniciar_driver, medir_etapa
+    from rastreamento import novo_trace, retirar_spans
+
+    tempos, picos, spans = [], [], []
+    for i in range(execucoes):
+        with tempfile.TemporaryDirectory(prefix="sidra_suite_") as pasta:
+            trace_id = novo_trace()
+            inicio = time.perf_counter()
+            with medir_etapa("iniciar_driver"):
+                driver = iniciar_driver(download_dir=pasta, headless=True)
+            amostrador = AmostradorRSS(driver)
+            amostrador.start()
+            try:
+                wait = WebDriverWait(driver, 30)
+                with medir_etapa("buscar_tabela_1209"):
+                    buscar_tabela_1209(driver, wait)
+                with medir_etapa("aplicar_filtros_tabela"):
+                    aplicar_filtros_tabela(wait)
+                with medir_etapa("baixar_csv"):
+                    baixar_csv(wait, download_dir=pasta)
+            finally:
+                amostrador.parar()
+                driver.quit()
+            tempos.append(time.perf_counter() - inicio)
+            picos.append(amostrador.pico_mb)
+            spans.extend(s.como_dict() for s in retirar_spans(trace_id))
+        print(f"   -> execução {i + 1}/{execucoes}: {tempos[-1]:.2f}s, pico {picos[-1]:.0f} MB")
+    return tempos, picos, spans
+
+
+def medir_vazao(workers, trabalhos_por_rodada):
+    """Tabelas/min para cada quantidade de workers, com um pool quente."""
+    from extracao_paralela import TrabalhoExtracao, executar_trabalhos, vazao_por_minuto
+    from pool_navegadores import PoolNavegadores
+
+    vazao = {}
+    with tempfile.TemporaryDirectory(prefix="sidra_suite_") as pasta:
+        with PoolNavegadores(max(workers), headless=True, pasta_base=pasta) as pool:
+            for n in workers:
+                trabalhos = [TrabalhoExtracao("1209", prefixo=f"vazao_{n}_{i:03d}") for i in range(trabalhos_por_rodada)]
+                resultados, duracao = executar_trabalhos(trabalhos, n_workers=n, pool=pool, pasta_base=pasta)
+                falhas = sum(1 for r in resultados if not r.sucesso)
+                vazao[str(n)] = vazao_por_minuto(resultados, duracao)
+                print(f"   -> {n} worker(s): {vazao[str(n)]:.1f} tabelas/min ({falhas} falha(s))")
+    return vazao
+
+
+def resumir(tempos, picos, spans, vazao):
+    from rastreamento import percentil
+
+    etapas = {}
+    for nome in sorted({s["nome"] for s in spans}):
+        duracoes = [s["duracao"] for s in spans if s["nome"] == nome]
+        etapas[nome] = {"p50": percentil(duracoes, 50), "p95": percentil(duracoes, 95)}
+    return {
+        "ponta_a_ponta": {"p50": percentil(tempos, 50), "p95": percentil(tempos, 95)},
+        "etapas": etapas,
+        "vazao": vazao,
+        "memoria": {"pico_mb_p50": percentil(picos, 50), "pico_mb_max": max(picos) if picos else 0.0},
+    }
+
+
+def _metricas(resultado):
+    """(nome, valor, maior_e_pior) de todas as métricas comparáveis."""
+    yield "ponta_a_ponta p50", resultado["ponta_a_ponta"]["p50"], True
+    yield "ponta_a_ponta p95", resultado["ponta_a_ponta"]["p95"], True
+    for nome, valores in resultado["etapas"].items():
+        yield f"{nome} p50", valores["p50"], True
+    for n, valor in resultado["vazao"].items():
+        yield f"vazão {n} worker(s)", valor, False
+    yield "pico RSS p50 (MB)", resultado["memoria"]["pico_mb_p50"], True
+
+
+def comparar(atual, referencia, tolerancia, minimo=0.05):
+    """
+    Lista de regressões (nome, referência, atual, variação). Etapas abaixo
+    de `minimo` segundos na referência são ignoradas: variam só por ruído.
+    """
+    anteriores = {nome: valor for nome, valor, _ in _metricas(referencia)}
+    regressoes = []
+    for nome, valor, maior_e_pior in _metricas(atual):
+        base = anteriores.get(nome)
+        if not base or (maior_e_pior and "MB" not in nome and base < minimo):
+            continue
+        variacao = (valor - base) / base
+        if (variacao if maior_e_pior else -variacao) > tolerancia:
+            regressoes.append((nome, base, valor, variacao))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline contra o mock local do SIDRA.")
+    parser.add_argument("--execucoes", type=int, default=5, help="Execuções ponta a ponta.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--trabalhos", type=int, default=8, help="Extrações por rodada de vazão.")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latência do mock por resposta (s).")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Jitter do mock (± s).")
+    parser.add_argument("--saida", default=None, help="JSON de resultado (padrão: benchmarks/resultados/<data>.json).")
+    parser.add_argument("--referencia", default=None, help="JSON de uma execução anterior para comparar.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Piora relativa aceita (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    from mock_sidra.servidor import iniciar_servidor
+
+    servidor, base = iniciar_servidor(latencia=args.latencia, jitter=args.jitter)
+    pasta_traces = tempfile.mkdtemp(prefix="sidra_suite_traces_")
+    # Lidas na importação do script principal e de sidra_api
+    os.environ["SIDRA_BASE_URL"] = f"{base}/"
+    os.environ["SIDRA_API_URL"] = base
+    os.environ["SIDRA_API_METADADOS_URL"] = f"{base}/api/v3/agregados"
+    os.environ["SIDRA_TRACE_DIR"] = pasta_traces
+    print(f"🧪 Mock do SIDRA em {base} (latência {args.latencia}s ± {args.jitter}s)")
+
+    try:
+        print("\n▶️  Ponta a ponta e por etapa")
+        tempos, picos, spans = medir_ponta_a_ponta(args.execucoes)
+        print("\n▶️  Vazão")
+        vazao = medir_vazao(args.workers, args.trabalhos)
+    finally:
+        servidor.shutdown()
+
+    resultado = resumir(tempos, picos, spans, vazao)
+    resultado["configuracao"] = {k: v for k, v in vars(args).items() if k not in ("saida", "referencia")}
+    resultado["data"] = datetime.now().isoformat(timespec="seconds")
+
+    saida = Path(args.saida or PASTA_RESULTADOS / f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    print("\n" + "="*60)
+    print("📊 RESULTADO")
+    print("="*60)
+    for nome, valor, _ in _metricas(resultado):
+        print(f"   {nome:<40} {valor:10.2f}")
+    print(f"   -> 💾 {saida}")
+
+    if args.referencia:
+        referencia = json.loads(Path(args.referencia).read_text(encoding="utf-8"))
+        regressoes = comparar(resultado, referencia, args.tolerancia)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}:")
+            for nome, anterior, atual, variacao in regressoes:
+                print(f"   {nome:<40} {anterior:10.2f} -> {atual:10.2f} ({variacao:+.0%})")
+            sys.exit(1)
+        print(f"\n✅ Nenhuma regressão acima de {args.tolerancia:.0%} em relação a {args.referencia}")
+
+
+if __name__ == "__main__":
+    main()
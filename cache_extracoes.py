@@ -0,0 +1,165 @@
+"""
+Cache em disco das extrações, endereçado por conteúdo.
+
+Cada extração é identificada pela chave (tabela, especificação de filtros
+normalizada). O índice (`indice.json`) guarda, por chave, o hash SHA-256 do
+CSV, ETag / Last-Modified da resposta, quando foi obtido e o último acesso;
+os CSVs ficam em `objetos/<hash[:2]>/<hash>.csv`, então extrações idênticas
+ocupam espaço uma única vez.
+
+- fresco (idade < TTL): o CSV é devolvido imediatamente, sem rede;
+- vencido: quem chama revalida (ex.: GET condicional na API) e informa
+  `renovar` (304 / mesmo conteúdo) ou `armazenar` (conteúdo novo);
+- tamanho total acima do limite: remove as entradas menos usadas (LRU).
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from configuracao import DOWNLOAD_DIR
+
+CACHE_DIR = Path(os.environ.get("SIDRA_CACHE_DIR", DOWNLOAD_DIR / ".cache"))
+CACHE_TTL = float(os.environ.get("SIDRA_CACHE_TTL", 24 * 3600))
+CACHE_TAMANHO_MAX = int(os.environ.get("SIDRA_CACHE_MAX_MB", 500)) * 1024 * 1024
+
+
+def normalizar_especificacao(tabela, filtros, **extras):
+    """Forma canônica (ordenada, com textos sem espaços sobrando) de uma extração."""
+    return {
+        "tabela": str(tabela),
+        "filtros": {str(k).strip(): bool(v) for k, v in sorted(filtros.items())},
+        **{k: (str(v) if v is not None else None) for k, v in sorted(extras.items())},
+    }
+
+
+def chave_cache(tabela, filtros, **extras):
+    canonica = json.dumps(normalizar_especificacao(tabela, filtros, **extras), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonica.encode("utf-8")).hexdigest()
+
+
+def hash_conteudo(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+class CacheExtracoes:
+    def __init__(self, pasta=CACHE_DIR, ttl=CACHE_TTL, tamanho_max=CACHE_TAMANHO_MAX):
+        self.pasta = Path(pasta)
+        self.ttl = ttl
+        self.tamanho_max = tamanho_max
+        self.estatisticas = {"hits": 0, "misses": 0, "revalidados": 0, "atualizados": 0, "removidos": 0}
+        self._lock = threading.Lock()
+        self._arquivo_indice = self.pasta / "indice.json"
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        try:
+            self._indice = json.loads(self._arquivo_indice.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._indice = {}
+
+    # ====== ÍNDICE ======
+
+    def _salvar_indice(self):
+        temporario = self._arquivo_indice.with_suffix(".tmp")
+        temporario.write_text(json.dumps(self._indice, indent=1), encoding="utf-8")
+        os.replace(temporario, self._arquivo_indice)
+
+    def _caminho_objeto(self, hash_csv):
+        return self.pasta / "objetos" / hash_csv[:2] / f"{hash_csv}.csv"
+
+    def consultar(self, chave):
+        """
+        Retorna (entrada, fresca) ou (None, False).
+
+        Conta hit quando a entrada está fresca e miss quando não existe;
+        entradas vencidas aguardam `renovar` ou `armazenar`.
+        """
+        with self._lock:
+            entrada = self._indice.get(chave)
+            if entrada is None or not self._caminho_objeto(entrada["hash"]).exists():
+                self._indice.pop(chave, None)
+                self.estatisticas["misses"] += 1
+                return None, False
+
+            entrada["ultimo_acesso"] = time.time()
+            fresca = time.time() - entrada["obtido_em"] < self.ttl
+            if fresca:
+                self.estatisticas["hits"] += 1
+            self._salvar_indice()
+            return dict(entrada), fresca
+
+    def renovar(self, chave, hash_csv=None):
+        """
+        Revalidação sem mudança (304 ou mesmo hash): só renova o horário.
+
+        Retorna False se a entrada (com o `hash_csv` revalidado, se
+        informado) saiu do cache depois de `consultar` — removida pelo LRU
+        de outro `armazenar` concorrente, por exemplo; aí é preciso baixar
+        de novo.
+        """
+        with self._lock:
+            entrada = self._indice.get(chave)
+            if (entrada is None or (hash_csv is not None and entrada["hash"] != hash_csv)
+                    or not self._caminho_objeto(entrada["hash"]).exists()):
+                return False
+            entrada["obtido_em"] = time.time()
+            self.estatisticas["revalidados"] += 1
+            self._salvar_indice()
+            return True
+
+    def armazenar(self, chave, dados, etag=None, last_modified=None, url=None):
+        """Guarda o CSV (bytes) para a chave; retorna o hash do conteúdo."""
+        hash_csv = hash_conteudo(dados)
+        destino = self._caminho_objeto(hash_csv)
+        with self._lock:
+            anterior = self._indice.get(chave)
+            if not destino.exists():
+                destino.parent.mkdir(parents=True, exist_ok=True)
+                temporario = destino.with_suffix(".tmp")
+                temporario.write_bytes(dados)
+                os.replace(temporario, destino)
+
+            if anterior is not None:
+                self.estatisticas["revalidados" if anterior["hash"] == hash_csv else "atualizados"] += 1
+            agora = time.time()
+            self._indice[chave] = {
+                "hash": hash_csv,
+                "tamanho": len(dados),
+                "etag": etag,
+                "last_modified": last_modified,
+                "url": url,
+                "obtido_em": agora,
+                "ultimo_acesso": agora,
+            }
+            self._remover_excedente()
+            self._salvar_indice()
+        return hash_csv
+
+    def _remover_excedente(self):
+        """LRU por tamanho total (objetos compartilhados contam uma vez)."""
+        tamanhos = {e["hash"]: e["tamanho"] for e in self._indice.values()}
+        total = sum(tamanhos.values())
+        for chave, entrada in sorted(self._indice.items(), key=lambda item: item[1]["ultimo_acesso"]):
+            if total <= self.tamanho_max or len(self._indice) <= 1:
+                break
+            del self._indice[chave]
+            self.estatisticas["removidos"] += 1
+            if all(e["hash"] != entrada["hash"] for e in self._indice.values()):
+                total -= entrada["tamanho"]
+                self._caminho_objeto(entrada["hash"]).unlink(missing_ok=True)
+
+    # ====== SAÍDA ======
+
+    def copiar_para(self, entrada, destino):
+        """Materializa o CSV do cache em `destino`."""
+        shutil.copyfile(self._caminho_objeto(entrada["hash"]), destino)
+        return Path(destino)
+
+    def imprimir_estatisticas(self):
+        e = self.estatisticas
+        consultas = e["hits"] + e["misses"] + e["revalidados"] + e["atualizados"]
+        taxa = (e["hits"] + e["revalidados"]) / consultas * 100 if consultas else 0.0
+        print(f"📦 Cache: {e['hits']} hit(s), {e['misses']} miss(es), {e['revalidados']} revalidado(s), "
+              f"{e['atualizados']} atualizado(s), {e['removidos']} removido(s) — aproveitamento {taxa:.0f}%")
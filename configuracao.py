@@ -0,0 +1,22 @@
+"""
+Configuração compartilhada (variáveis de ambiente e padrões da Tabela 1209).
+
+Módulo leve, sem Selenium: ferramentas que só usam a API, o parser ou o
+cache importam daqui em vez de `desafio_ibge_1209`, que continua
+reexportando estes nomes.
+"""
+import os
+from pathlib import Path
+
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")
+DOWNLOAD_DIR = Path(os.environ.get("SIDRA_DOWNLOAD_DIR", Path.cwd() / "dados"))
+SIDRA_URL = os.environ.get("SIDRA_BASE_URL", "https://sidra.ibge.gov.br/")
+HEADLESS = os.environ.get("SIDRA_HEADLESS", "").lower() in ("1", "true", "sim")
+TRACE_DIR = Path(os.environ.get("SIDRA_TRACE_DIR", DOWNLOAD_DIR / "traces"))
+
+# Filtros de "Grupo de idade" (C58) da Tabela 1209: {texto da opção: marcar?}
+FILTROS_1209 = {
+    "Total": False,
+    "60 a 69 anos": True,
+    "70 anos ou mais": True,
+}
@@ -0,0 +1,247 @@
+"""
+Consultas grandes divididas em partes abaixo do limite de células do SIDRA.
+
+O SIDRA recusa consultas que devolvem mais que um certo número de valores
+(células). `planejar_consulta` estima as células de uma especificação
+(unidades territoriais x períodos x categorias) e, acima de
+`LIMITE_CELULAS`, monta uma grade de partes:
+
+- território: municípios por UF ("in n3 35") ou UFs/regiões por código,
+  agrupados enquanto couberem no limite;
+- período: só quando nem uma UF cabe com todos os períodos.
+
+`extrair_particionado` baixa as partes em paralelo (conexões do pool de
+`sidra_api`) e grava cada uma, já ordenada por código do território, em um
+arquivo temporário. O CSV final é montado lendo as partes linha a linha
+(merge ordenado das partes de períodos de cada grupo territorial), então a
+memória de pico depende do tamanho de uma parte, e não do total.
+"""
+import csv
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from sidra_api import (
+    ROTULOS_NIVEIS,
+    EspecificacaoInvalida,
+    _chave_codigo,
+    _chaves_dimensoes,
+    _coluna_codigo,
+    _valor_br,
+    escolher_variavel,
+    escrever_cabecalho_br,
+    escrever_rodape_br,
+    mapear_filtros,
+    montar_url_valores,
+    obter_json,
+    obter_periodos,
+    ordenar_colunas,
+)
+
+LIMITE_CELULAS = int(os.environ.get("SIDRA_LIMITE_CELULAS", 50_000))
+
+# Municípios por UF (código IBGE da UF -> quantidade), para estimar consultas n6
+MUNICIPIOS_POR_UF = {
+    "11": 52, "12": 22, "13": 62, "14": 15, "15": 144, "16": 16, "17": 139,
+    "21": 217, "22": 224, "23": 184, "24": 167, "25": 223, "26": 185, "27": 102, "28": 75, "29": 417,
+    "31": 853, "32": 78, "33": 92, "35": 645,
+    "41": 399, "42": 295, "43": 497,
+    "50": 79, "51": 141, "52": 246, "53": 1,
+}
+
+# Blocos territoriais indivisíveis de cada nível: (trecho de localidades, unidades)
+BLOCOS_TERRITORIAIS = {
+    "brasil": [("1", 1)],
+    "grande_regiao": [(str(r), 1) for r in range(1, 6)],
+    "unidade_federacao": [(uf, 1) for uf in MUNICIPIOS_POR_UF],
+    "municipio": [(uf, n) for uf, n in MUNICIPIOS_POR_UF.items()],
+}
+
+
+@dataclass
+class Particao:
+    """Uma consulta da grade: grupo territorial `linha` x grupo de períodos `coluna`."""
+    localidades: str
+    periodos: tuple
+    celulas: int
+    linha: int
+    coluna: int
+
+
+# ====== PLANEJAMENTO ======
+
+def listar_periodos_consulta(especificacao):
+    """Períodos da especificação: "last"/"first" contam como um; "all" é expandido pela API."""
+    periodo = str(especificacao["periodo"])
+    if periodo == "all":
+        return tuple(obter_periodos(especificacao["tabela"]))
+    return tuple(p.strip() for p in periodo.split(","))
+
+
+def _localidades(nivel, blocos):
+    codigos = ",".join(codigo for codigo, _ in blocos)
+    return f"in n3 {codigos}" if nivel == "municipio" else codigos
+
+
+def planejar_particoes(nivel, periodos, n_categorias, limite=LIMITE_CELULAS):
+    """Grade de `Particao` com no máximo `limite` células estimadas cada."""
+    blocos = BLOCOS_TERRITORIAIS[nivel]
+    unidades = sum(n for _, n in blocos)
+    total = unidades * len(periodos) * n_categorias
+    if total <= limite:
+        return [Particao("all", tuple(periodos), total, 0, 0)]
+
+    maior = max(n for _, n in blocos)
+    periodos_por_parte = min(len(periodos), limite // (maior * n_categorias))
+    if periodos_por_parte == 0:
+        raise EspecificacaoInvalida(f"❌ Um único período do maior bloco territorial ({maior} unidades x {n_categorias} "
+                         f"categorias) já passa do limite de {limite} células: reduza as categorias.")
+    capacidade = limite // (periodos_por_parte * n_categorias)  # unidades territoriais por parte
+
+    grupos, atual, ocupado = [], [], 0
+    for bloco in blocos:
+        if atual and ocupado + bloco[1] > capacidade:
+            grupos.append(atual)
+            atual, ocupado = [], 0
+        atual.append(bloco)
+        ocupado += bloco[1]
+    grupos.append(atual)
+
+    grupos_periodos = [tuple(periodos[i:i + periodos_por_parte]) for i in range(0, len(periodos), periodos_por_parte)]
+    return [
+        Particao(_localidades(nivel, grupo), grupo_periodos,
+                 sum(n for _, n in grupo) * len(grupo_periodos) * n_categorias, linha, coluna)
+        for linha, grupo in enumerate(grupos)
+        for coluna, grupo_periodos in enumerate(grupos_periodos)
+    ]
+
+
+def planejar_consulta(especificacao, metadados, limite=LIMITE_CELULAS):
+    """Partes da consulta de uma especificação de `sidra_api` (uma só se couber no limite)."""
+    _, codigos = mapear_filtros(metadados, especificacao["classificacao"], especificacao["filtros"])
+    return planejar_particoes(especificacao["nivel"], listar_periodos_consulta(especificacao), len(codigos), limite)
+
+
+# ====== DOWNLOAD DAS PARTES ======
+
+def _baixar_particao(especificacao, metadados, clas, codigos, variavel, particao, pasta):
+    """
+    Consulta uma parte e grava em `pasta` um CSV intermediário ordenado
+    por código do território:
+
+        <colunas "período|categoria">
+        <nomes dos períodos>
+        <nomes das categorias>
+        <código>;<nome>;<valor>...
+    """
+    url = montar_url_valores(especificacao["tabela"], especificacao["nivel"], ",".join(particao.periodos),
+                             especificacao["classificacao"], codigos, variavel["id"], particao.localidades)
+    valores = obter_json(url)
+    cabecalho, linhas = valores[0], valores[1:]
+    dims = _chaves_dimensoes(cabecalho)
+    chave_local = dims[ROTULOS_NIVEIS[especificacao["nivel"]]]
+    chave_ano, chave_cat = dims["Ano"], dims[clas["nome"]]
+    codigo_local, codigo_ano, codigo_cat = (_coluna_codigo(c) for c in (chave_local, chave_ano, chave_cat))
+
+    nomes, territorios = {}, {}
+    for linha in linhas:
+        coluna = (linha[codigo_ano], linha[codigo_cat])
+        nomes[coluna] = (linha[chave_ano], linha[chave_cat])
+        territorios.setdefault(linha[codigo_local], (linha[chave_local], {}))[1][coluna] = linha["V"]
+    del valores, linhas
+
+    colunas = ordenar_colunas(nomes, particao.periodos, codigos)  # a mesma ordem da consulta única
+
+    caminho = Path(pasta) / f"parte_{particao.linha:04d}_{particao.coluna:04d}.csv"
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f, delimiter=";")
+        escritor.writerow([f"{a}|{c}" for a, c in colunas])
+        escritor.writerow([nomes[c][0] for c in colunas])
+        escritor.writerow([nomes[c][1] for c in colunas])
+        for cod in sorted(territorios, key=_chave_codigo):
+            nome, celulas = territorios[cod]
+            escritor.writerow([cod, nome] + [celulas.get(c, "-") for c in colunas])
+    return caminho
+
+
+# ====== MERGE ======
+
+def _ler_cabecalho_parte(caminho):
+    with open(caminho, encoding="utf-8", newline="") as f:
+        leitor = csv.reader(f, delimiter=";")
+        chaves, anos, categorias = next(leitor), next(leitor), next(leitor)
+    return [(chave, (ano, cat)) for chave, ano, cat in zip(chaves, anos, categorias)]
+
+
+def _linhas_parte(caminho, indices, deslocamento):
+    """(chave de ordenação, código, nome, {coluna final: valor}) de cada território da parte."""
+    with open(caminho, encoding="utf-8", newline="") as f:
+        leitor = csv.reader(f, delimiter=";")
+        chaves = next(leitor)
+        next(leitor), next(leitor)
+        posicoes = [deslocamento + indices[chave] for chave in chaves]
+        for linha in leitor:
+            yield _chave_codigo(linha[0]), linha[0], linha[1], dict(zip(posicoes, linha[2:]))
+
+
+def mesclar_particoes(partes, destino, metadados, variavel, clas, nivel_rotulo):
+    """
+    Junta as partes (dict (linha, coluna) -> caminho) no layout "br.csv",
+    lendo uma linha de cada parte por vez.
+    """
+    linhas = sorted({l for l, _ in partes})
+    colunas_grade = sorted({c for _, c in partes})
+
+    # Colunas finais: união das colunas de cada grupo de períodos, na ordem em que aparecem
+    colunas, indices, deslocamentos = [], [], []
+    for coluna in colunas_grade:
+        vistas = {}
+        for linha in linhas:
+            if (linha, coluna) in partes:
+                for chave, nomes in _ler_cabecalho_parte(partes[(linha, coluna)]):
+                    vistas.setdefault(chave, nomes)
+        deslocamentos.append(len(colunas))
+        indices.append({chave: i for i, chave in enumerate(vistas)})
+        colunas.extend(vistas.values())
+
+    with open(destino, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f, delimiter=";", lineterminator="\r\n")
+        escrever_cabecalho_br(escritor, metadados, variavel, clas, nivel_rotulo, colunas)
+        for linha in linhas:
+            fontes = [
+                _linhas_parte(partes[(linha, coluna)], indices[j], deslocamentos[j])
+                for j, coluna in enumerate(colunas_grade) if (linha, coluna) in partes
+            ]
+            for _, grupo in itertools.groupby(heapq.merge(*fontes, key=lambda r: r[0]), key=lambda r: r[0]):
+                celulas, nome = {}, None
+                for _, _, nome, valores in grupo:
+                    celulas.update(valores)
+                escritor.writerow([nome] + [_valor_br(celulas.get(i, "-")) for i in range(len(colunas))])
+        escrever_rodape_br(escritor, metadados)
+    return destino
+
+
+def extrair_particionado(especificacao, metadados, particoes, destino, concorrencia=4):
+    """Baixa as `particoes` em paralelo e grava o CSV único `destino`."""
+    clas, codigos = mapear_filtros(metadados, especificacao["classificacao"], especificacao["filtros"])
+    variavel = escolher_variavel(metadados, especificacao.get("variavel"))
+    destino = Path(destino)
+    pasta = tempfile.mkdtemp(prefix=".partes_", dir=destino.parent)
+    try:
+        print(f"   -> 🧩 ~{sum(p.celulas for p in particoes)} células em {len(particoes)} parte(s), "
+              f"{min(concorrencia, len(particoes))} em paralelo...")
+        with ThreadPoolExecutor(max_workers=max(1, concorrencia)) as executor:
+            futuros = {
+                (p.linha, p.coluna): executor.submit(_baixar_particao, especificacao, metadados, clas, codigos,
+                                                     variavel, p, pasta)
+                for p in particoes
+            }
+            partes = {posicao: futuro.result() for posicao, futuro in futuros.items()}
+        return mesclar_particoes(partes, destino, metadados, variavel, clas, ROTULOS_NIVEIS[especificacao["nivel"]])
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
@@ -1,7 +1,5 @@
-import os
 import time
 import sys
-import platform
 from pathlib import Path
 
 from selenium import webdriver
@@ -13,112 +11,190 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.action_chains import ActionChains
 from datetime import datetime 
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from monitor_downloads import (
+    PREFERENCIAS_LOG_PERFORMANCE,
+    MonitorDownloads,
+    ObservadorPasta,
+    aguardar_download,
+    preparar_downloads,
+)
+from localizadores import localizadores
+from rastreamento import (
+    anotar,
+    exportar_jsonl,
+    instrumentar_driver,
+    novo_trace,
+    registrar_retentativa,
+    retirar_spans,
+)
+from rastreamento import span as abrir_span
+
+from configuracao import (  # reexportados: outros módulos importam daqui
+    CHROMEDRIVER_PATH,
+    DOWNLOAD_DIR,
+    FILTROS_1209,
+    HEADLESS,
+    SIDRA_URL,
+    TRACE_DIR,
+)
+from resolucao_navegador import detectar_navegador, resolver_chromedriver, resolver_navegador
+from sidra_api import ESPECIFICACAO_1209, EspecificacaoInvalida
 
 
-
-# Lista de possíveis caminhos (ordem de prioridade)
 # ====== CONFIGURAÇÕES DE NAVEGADOR (MULTI-PLATAFORMA) ======
+# O navegador não é mais detectado na importação: `resolver_navegador()`
+# procura (ou lê do cache) só quando um driver é iniciado.
+
+def __getattr__(nome):
+    """BROWSER_BINARY continua disponível, resolvido na primeira leitura."""
+    if nome == "BROWSER_BINARY":
+        return resolver_navegador()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+# ====== PERFIL ENXUTO (SERVIDOR) ======
+# Tamanho fixo e pequeno de janela: suficiente para o layout desktop do SIDRA
+JANELA_ENXUTA = "1280,800"
+
+# Recursos bloqueados via CDP (Network.setBlockedURLs): imagens, fontes,
+# analytics e anúncios não são necessários para navegar nem para baixar o CSV
+URLS_BLOQUEADAS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*analytics.google.com*",
+    "*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*",
+    "*facebook.net*", "*hotjar.com*", "*clarity.ms*",
+]
+
+# Painel da dimensão de período ("Ano") na página da tabela
+SELETOR_PAINEL_PERIODO = "#panel-P"
+
+
+def seletor_painel(dimensao):
+    """Seletor CSS do painel de uma dimensão: "C58" / "58" -> "#panel-C58", "P" -> "#panel-P"."""
+    dimensao = str(dimensao)
+    return f"#panel-{'C' + dimensao if dimensao.isdigit() else dimensao}"
+
+
+def xpath_link_tabela(tabela):
+    """XPath do link de uma tabela na lista de resultados da busca."""
+    return (
+        f"//a[contains(@href, 'tabela/{tabela}') or contains(@href, 'Tabela={tabela}') "
+        f"or contains(., '{tabela}')]"
+    )
+
+
+# ====== MEDIÇÃO DE TEMPO POR ETAPA ======
+
+# Tempos da execução atual: um por thread/tarefa (contextvars, como os spans),
+# então workers paralelos não misturam etapas nem acumulam entre trabalhos
+_tempos_etapas = ContextVar("tempos_etapas", default=None)
+
 
-def detectar_navegador():
+def iniciar_tempos():
+    """Começa a lista de tempos da execução no contexto atual; retorna a lista."""
+    tempos = []
+    _tempos_etapas.set(tempos)
+    return tempos
+
+
+def tempos_etapas():
+    """[(etapa, segundos)] da execução atual (vazia se `iniciar_tempos` não foi chamada)."""
+    return _tempos_etapas.get() or []
+
+
+@contextmanager
+def medir_etapa(nome, **atributos):
     """
-    Detecta automaticamente o navegador instalado no sistema.
-    Suporta: Windows, macOS, Linux
+    Registra nos tempos da execução atual quanto tempo a etapa levou e abre
+    um span (rastreamento) com round-trips ao WebDriver e retentativas da
+    etapa. Fora de `iniciar_tempos` só o span é registrado.
     """
-    sistema = platform.system()
-    
-    caminhos_navegadores = {
-        "Windows": [
-            r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-            r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-            r"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe",
-            os.path.expanduser(r"~\AppData\Local\Google\Chrome\Application\chrome.exe"),
-            os.path.expanduser(r"~\AppData\Local\BraveSoftware\Brave-Browser\Application\brave.exe"),
-        ],
-        "Darwin": [  # macOS
-            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
-            "/Applications/Brave Browser.app/Contents/MacOS/Brave Browser",
-            "/Applications/Chromium.app/Contents/MacOS/Chromium",
-            os.path.expanduser("~/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"),
-        ],
-        "Linux": [
-            "/usr/bin/google-chrome",
-            "/usr/bin/google-chrome-stable",
-            "/usr/bin/chromium",
-            "/usr/bin/chromium-browser",
-            "/usr/bin/brave-browser",
-            "/usr/bin/brave",
-            "/snap/bin/chromium",
-            "/usr/local/bin/chrome",
-        ]
-    }
-    
-    # Primeiro tenta variáveis de ambiente
-    if os.environ.get("CHROME_BINARY"):
-        caminho = os.environ.get("CHROME_BINARY")
-        if os.path.exists(caminho):
-            print(f"✅ Navegador configurado via CHROME_BINARY: {caminho}")
-            return caminho
-    
-    if os.environ.get("BRAVE_BINARY"):
-        caminho = os.environ.get("BRAVE_BINARY")
-        if os.path.exists(caminho):
-            print(f"✅ Navegador configurado via BRAVE_BINARY: {caminho}")
-            return caminho
-    
-    # Detecta o sistema operacional
-    if sistema not in caminhos_navegadores:
-        raise OSError(f"❌ Sistema operacional não suportado: {sistema}")
-    
-    print(f"🔍 Detectando navegador no {sistema}...")
-    
-    # Procura pelos caminhos padrão
-    for caminho in caminhos_navegadores[sistema]:
-        if os.path.exists(caminho):
-            print(f"✅ Navegador encontrado: {caminho}")
-            return caminho
-    
-    # Linux: usa 'which' como fallback
-    if sistema == "Linux":
-        for comando in ["google-chrome", "chromium", "chromium-browser", "brave-browser"]:
-            try:
-                resultado = subprocess.run(["which", comando], capture_output=True, text=True, timeout=5)
-                if resultado.returncode == 0:
-                    caminho = resultado.stdout.strip()
-                    if caminho and os.path.exists(caminho):
-                        print(f"✅ Navegador encontrado via 'which': {caminho}")
-                        return caminho
-            except:
-                pass
-    
-    # Erro se não encontrou
-    raise FileNotFoundError(
-        f"❌ Nenhum navegador compatível encontrado no {sistema}!\n\n"
-        "Instale um dos seguintes:\n"
-        "  • Google Chrome: https://www.google.com/chrome/\n"
-        "  • Brave Browser: https://brave.com/\n"
-        "  • Chromium: https://www.chromium.org/\n\n"
-        "Ou configure manualmente:\n"
-        "  Windows: set CHROME_BINARY=C:\\caminho\\chrome.exe\n"
-        "  macOS/Linux: export CHROME_BINARY=/caminho/chrome\n"
-    )
+    inicio = time.perf_counter()
+    try:
+        with abrir_span(nome, **atributos):
+            yield
+    finally:
+        tempos = _tempos_etapas.get()
+        if tempos is not None:
+            tempos.append((nome, time.perf_counter() - inicio))
+
+
+def exportar_trace(trace_id):
+    """Acrescenta os spans da execução a TRACE_DIR/spans.jsonl."""
+    spans = retirar_spans(trace_id)
+    if spans:
+        return exportar_jsonl(spans, TRACE_DIR / "spans.jsonl")
+
+
+def imprimir_relatorio_tempos():
+    """Exibe o tempo gasto em cada etapa e o total da execução."""
+    print("\n" + "="*60)
+    print("⏱️  TEMPO POR ETAPA")
+    print("="*60)
+    tempos = tempos_etapas()
+    for nome, duracao in tempos:
+        print(f"   {nome:<40} {duracao:8.2f}s")
+    print(f"   {'TOTAL (etapas principais)':<40} {sum(d for n, d in tempos if '/' not in n):8.2f}s")
+
+
+# ====== CONDIÇÕES DE ESPERA ======
+
+def aria_selected(botao, marcado):
+    """Condição de espera: o botão sidra-toggle está no estado desejado."""
+    esperado = "true" if marcado else "false"
+    return lambda _driver: botao.get_attribute("aria-selected") == esperado
+
+
+def arvore_expandida(icone):
+    """Condição de espera: o ícone de expansão não está mais 'collapsed'."""
+    return lambda _driver: "collapsed" not in (icone.get_attribute("class") or "")
 
 
-# Detecta o navegador
-BROWSER_BINARY = detectar_navegador()
+def valor_digitado(campo, texto):
+    """Condição de espera: o campo de texto contém o valor digitado."""
+    return lambda _driver: campo.get_attribute("value") == texto
 
-# Outras configurações
-CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")
-DOWNLOAD_DIR = Path(os.environ.get("SIDRA_DOWNLOAD_DIR", Path.cwd() / "dados"))
 
+def iniciar_driver(download_dir=DOWNLOAD_DIR, headless=False, enxuto=None):
+    """
+    Inicializa o driver com configurações anti-detecção.
+
+    `download_dir` permite que cada driver de um pool tenha a sua própria
+    pasta de download; `headless` roda o navegador sem janela.
+    `enxuto` (padrão: igual a `headless`) usa janela pequena fixa e bloqueia
+    imagens, fontes, analytics e anúncios para economizar CPU e memória.
+    """
+    if enxuto is None:
+        enxuto = headless
 
-def iniciar_driver():
-    """Inicializa o driver com configurações anti-detecção."""
-    DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    download_dir = Path(download_dir)
+    download_dir.mkdir(parents=True, exist_ok=True)
 
+    navegador = resolver_navegador()  # detecção sob demanda, com cache em disco
     options = webdriver.ChromeOptions()
-    options.binary_location = BROWSER_BINARY  # ← Usa o navegador detectado
-    
-    options.add_argument("--start-maximized")
+    options.binary_location = navegador
+    
+    if headless:
+        options.add_argument("--headless=new")
+    if enxuto:
+        options.add_argument(f"--window-size={JANELA_ENXUTA}")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-component-update")
+        options.add_argument("--disable-default-apps")
+        options.add_argument("--disable-sync")
+        options.add_argument("--mute-audio")
+        options.add_argument("--no-first-run")
+    elif headless:
+        options.add_argument("--window-size=1366,900")
+    else:
+        options.add_argument("--start-maximized")
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--no-sandbox")
@@ -127,20 +203,23 @@ def iniciar_driver():
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
     
     prefs = {
-        "download.default_directory": str(DOWNLOAD_DIR.resolve()),
+        "download.default_directory": str(download_dir.resolve()),
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True,
     }
+    if enxuto:
+        prefs["profile.managed_default_content_settings.images"] = 2
     options.add_experimental_option("prefs", prefs)
     options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
     options.add_experimental_option("useAutomationExtension", False)
+    # Eventos de download do DevTools chegam pelo log "performance"
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", PREFERENCIAS_LOG_PERFORMANCE)
 
-    if CHROMEDRIVER_PATH:
-        service = Service(CHROMEDRIVER_PATH)
-        driver = webdriver.Chrome(service=service, options=options)
-    else:
-        driver = webdriver.Chrome(options=options)
+    # Driver já resolvido (CHROMEDRIVER_PATH ou cache): o Selenium Manager não roda a cada abertura
+    service = Service(resolver_chromedriver(navegador))
+    driver = webdriver.Chrome(service=service, options=options)
 
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
         "source": """
@@ -149,33 +228,48 @@ def iniciar_driver():
         """
     })
     
-    print(f"🌐 Navegador iniciado: {BROWSER_BINARY}")
+    instrumentar_driver(driver)
+    preparar_downloads(driver, download_dir)
+
+    if enxuto:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": URLS_BLOQUEADAS})
+
+    print(f"🌐 Navegador iniciado: {navegador}{' (headless)' if headless else ''}")
     return driver
 
 
-def buscar_tabela_1209(driver, wait):
+def buscar_tabela(driver, wait, tabela="1209", termo=None):
     """
-    Acessa a Tabela 1209 APENAS pela interface do SIDRA.
+    Acessa uma tabela APENAS pela interface do SIDRA.
     NÃO permite acesso direto pela URL.
+
+    `termo` é o texto digitado na busca (padrão: o número da tabela).
     """
+    xpath_link = xpath_link_tabela(tabela)
+    termo = termo or tabela
+
     print("   -> Acessando página inicial do SIDRA...")
-    driver.get("https://sidra.ibge.gov.br/")
-    time.sleep(3)
-    
+    with medir_etapa("busca/pagina_inicial"):
+        # Sessões do pool já foram resetadas para a página inicial
+        if driver.current_url.rstrip("/") != SIDRA_URL.rstrip("/"):
+            driver.get(SIDRA_URL)
+        elementos = localizadores(driver)
+        elementos.invalidar()  # handles de outra página (ou de antes do reset) não valem mais
+
     # Fecha popups
     try:
         ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-        time.sleep(1)
     except:
         pass
-    
+
     # ====== PASSO 1: CLICAR NA LUPA (OBRIGATÓRIO) ======
     print("   -> Procurando ícone da lupa...")
     try:
-        lupa = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "li.lupa-li a")))
-        driver.execute_script("arguments[0].click();", lupa)
+        with medir_etapa("busca/lupa"):
+            lupa = elementos.esperar(wait, "lupa")
+            driver.execute_script("arguments[0].click();", lupa)
         print("   -> ✅ Lupa clicada!")
-        time.sleep(2)
     except TimeoutException:
         # ❌ Se não encontrar a lupa, PARA O SCRIPT
         raise RuntimeError(
@@ -183,72 +277,74 @@ def buscar_tabela_1209(driver, wait):
             "A navegação pela interface do SIDRA é obrigatória.\n"
             "Não é permitido acessar diretamente a URL da tabela."
         )
-    
-    # ====== PASSO 2: DIGITAR "1209" NO CAMPO DE BUSCA (OBRIGATÓRIO) ======
+
+    # ====== PASSO 2: DIGITAR O NÚMERO DA TABELA NO CAMPO DE BUSCA (OBRIGATÓRIO) ======
     print("   -> Localizando campo de busca...")
     try:
-        container = wait.until(EC.visibility_of_element_located((By.ID, "sidra-pesquisa-lg")))
-        campo = container.find_element(By.CSS_SELECTOR, "input[type='text']")
-        
-        print("   -> Digitando '1209' no campo de busca...")
-        campo.clear()
-        for char in "1209":
-            campo.send_keys(char)
-            time.sleep(0.15)
+        with medir_etapa("busca/digitacao"):
+            wait.until(EC.visibility_of(elementos.esperar(wait, "pesquisa")))
+            campo = elementos.obter("pesquisa_campo")
+
+            print(f"   -> Digitando '{termo}' no campo de busca...")
+            campo.clear()
+            campo.send_keys(termo)
+            wait.until(valor_digitado(campo, termo))
         print("   -> ✅ Texto digitado com sucesso!")
-        time.sleep(2)
-        
+
     except TimeoutException:
         raise RuntimeError(
             "❌ ERRO CRÍTICO: Campo de busca não encontrado!\n"
             "Não foi possível interagir com a interface do SIDRA."
         )
-    
+
     # ====== PASSO 3: EXECUTAR A BUSCA (OBRIGATÓRIO) ======
     print("   -> Executando busca...")
     try:
-        botao = container.find_element(By.CSS_SELECTOR, "button")
+        botao = elementos.obter("pesquisa_botao")
         driver.execute_script("arguments[0].click();", botao)
         print("   -> ✅ Botão de busca clicado!")
     except NoSuchElementException:
         print("   -> Botão não encontrado. Pressionando ENTER...")
         campo.send_keys(Keys.ENTER)
-    
-    time.sleep(3)
-    
+
+    # Aguarda o redirecionamento OU a lista de resultados renderizar
+    try:
+        with medir_etapa("busca/resultados"):
+            wait.until(EC.any_of(
+                EC.url_contains(f"tabela/{tabela}"),
+                EC.element_to_be_clickable((By.XPATH, xpath_link)),
+            ))
+    except TimeoutException:
+        pass
+
     # ====== PASSO 4: VERIFICAR SE JÁ ESTÁ NA PÁGINA DA TABELA ======
     print("   -> Verificando redirecionamento automático...")
     current_url = driver.current_url
-    
-    if "tabela/1209" in current_url.lower() or "1209" in driver.title:
-        print("   -> ✅ Redirecionado automaticamente para Tabela 1209!")
+
+    if f"tabela/{tabela}" in current_url.lower() or tabela in driver.title:
+        print(f"   -> ✅ Redirecionado automaticamente para Tabela {tabela}!")
         esperar_carregamento_tabela(wait)
         fechar_tour_tabela(driver, wait)
         return
-    
+
     # ====== PASSO 5: PROCURAR E CLICAR NO LINK DA TABELA (OBRIGATÓRIO) ======
-    print("   -> Procurando link da Tabela 1209 nos resultados...")
+    print(f"   -> Procurando link da Tabela {tabela} nos resultados...")
     try:
-        link = wait.until(
-            EC.element_to_be_clickable(
-                (By.XPATH, "//a[contains(@href, 'tabela/1209') or contains(@href, 'Tabela=1209') or contains(., '1209')]")
-            )
-        )
-        
-        # Scroll até o link
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", link)
-        time.sleep(1)
-        
-        # Clica no link
-        print("   -> Clicando no link da Tabela 1209...")
-        driver.execute_script("arguments[0].click();", link)
+        with medir_etapa("busca/link_tabela"):
+            link = wait.until(EC.element_to_be_clickable((By.XPATH, xpath_link)))
+
+            # Scroll até o link
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", link)
+
+            # Clica no link
+            print(f"   -> Clicando no link da Tabela {tabela}...")
+            driver.execute_script("arguments[0].click();", link)
         print("   -> ✅ Link clicado com sucesso!")
-        time.sleep(2)
-        
+
     except TimeoutException:
         # ❌ Se não encontrar o link, PARA O SCRIPT
         raise RuntimeError(
-            "❌ ERRO CRÍTICO: Link da Tabela 1209 não encontrado nos resultados da busca!\n"
+            f"❌ ERRO CRÍTICO: Link da Tabela {tabela} não encontrado nos resultados da busca!\n"
             "Possíveis causas:\n"
             "  1. A busca não retornou resultados\n"
             "  2. A interface do SIDRA mudou\n"
@@ -256,20 +352,28 @@ def buscar_tabela_1209(driver, wait):
             "\n"
             "Não é permitido acessar diretamente a URL da tabela."
         )
-    
+
     # ====== PASSO 6: AGUARDAR TABELA CARREGAR ======
     esperar_carregamento_tabela(wait)
     fechar_tour_tabela(driver, wait)
-    
+
     print("   -> ✅ Navegação pela interface concluída com sucesso!")
 
+def buscar_tabela_1209(driver, wait):
+    """Acessa a Tabela 1209 pela interface do SIDRA."""
+    buscar_tabela(driver, wait, "1209")
+
+
 def esperar_carregamento_tabela(wait):
     """Aguarda a tabela carregar completamente."""
     print("   -> Aguardando tabela carregar...")
+    localizadores(wait._driver).invalidar()  # nova página: handles anteriores não valem mais
     try:
-        wait.until(EC.presence_of_element_located((By.ID, "panel-C58")))
+        with medir_etapa("busca/carregamento_tabela"):
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[id^='panel-']")))
+            # O painel existe antes de ser populado: espera pelos botões de filtro
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[id^='panel-'] button.sidra-toggle")))
         print("   -> ✅ Tabela carregada!")
-        time.sleep(2)
     except TimeoutException:
         print("   -> ⚠️ Timeout, mas continuando...")
 
@@ -279,247 +383,526 @@ def fechar_tour_tabela(driver, wait):
     print("   -> Fechando popups...")
     try:
         ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-        time.sleep(0.5)
     except:
         pass
 
 
-def clicar_botao_sidra_toggle(driver, wait, texto_opcao, marcar=True):
+def clicar_botao_sidra_toggle(driver, wait, texto_opcao, marcar=True, escopo=None):
     """
     Função UNIVERSAL para clicar em botões sidra-toggle.
+
+    A opção (e a lista virtual rolada para renderizá-la) é procurada só
+    dentro do painel `escopo` (padrão: `seletor_painel("C58")`). Retorna
+    False se a opção não foi encontrada.
     """
+    escopo = escopo or seletor_painel("C58")
+    with medir_etapa("filtros/toggle", opcao=texto_opcao, marcar=marcar):
+        return _clicar_botao_sidra_toggle(driver, wait, texto_opcao, marcar, escopo)
+
+
+def _clicar_botao_sidra_toggle(driver, wait, texto_opcao, marcar, escopo):
     print(f"   -> {'Marcando' if marcar else 'Desmarcando'} '{texto_opcao}'...")
-    
-    # Procura pelo span com o nome
-    xpath = f"//span[@class='nome' or contains(@class, 'nome linhaAfastado')][contains(text(), '{texto_opcao}')]"
-    
+
+    # Nome, linha e botão da opção vêm do registro de localizadores: cada um é
+    # resolvido uma vez (a partir do anterior) e reaproveitado nas tentativas
+    elementos = localizadores(driver)
+
     max_tentativas = 10
     for tentativa in range(max_tentativas):
         try:
-            span = driver.find_element(By.XPATH, xpath)
-            
             # Scroll até o elemento
-            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", span)
-            time.sleep(0.5)
-            
-            # Pega o botão sidra-toggle
-            item_pai = span.find_element(By.XPATH, "./ancestor::div[contains(@class, 'item-lista') or contains(@class, 'item-arvore')]")
-            botao = item_pai.find_element(By.CSS_SELECTOR, "button.sidra-toggle")
-            
-            # Verifica estado atual
-            esta_marcado = botao.get_attribute("aria-selected") == "true"
-            
+            elementos.usar("opcao_nome", lambda span: driver.execute_script(
+                "arguments[0].scrollIntoView({block: 'center'});", span), texto=texto_opcao, escopo=escopo)
+
+            # Botão sidra-toggle e estado atual (a rolagem pode ter re-renderizado a linha)
+            esta_marcado = elementos.usar("opcao_botao", lambda b: b.get_attribute("aria-selected") == "true",
+                                          texto=texto_opcao, escopo=escopo)
+            botao = elementos.obter("opcao_botao", texto=texto_opcao, escopo=escopo)
+
             if marcar:
                 if not esta_marcado:
                     driver.execute_script("arguments[0].click();", botao)
+                    wait.until(aria_selected(botao, True))
                     print(f"   -> ✅ '{texto_opcao}' marcado!")
-                    time.sleep(0.7)
                 else:
                     print(f"   -> '{texto_opcao}' já estava marcado.")
             else:
                 if esta_marcado:
                     driver.execute_script("arguments[0].click();", botao)
+                    wait.until(aria_selected(botao, False))
                     print(f"   -> ✅ '{texto_opcao}' desmarcado!")
-                    time.sleep(0.7)
                 else:
                     print(f"   -> '{texto_opcao}' já estava desmarcado.")
-            
+
             return True
-            
+
         except NoSuchElementException:
-            # Tenta rolar o painel
-            try:
-                container = driver.find_element(By.CSS_SELECTOR, "div.lv-container")
-                driver.execute_script(f"arguments[0].scrollTop += 100;", container)
-                time.sleep(0.5)
-            except:
-                pass
-            
             if tentativa == max_tentativas - 1:
                 print(f"   -> ❌ '{texto_opcao}' não encontrado após {max_tentativas} tentativas!")
                 return False
+            registrar_retentativa()
+
+            # Tenta rolar o painel e espera a lista virtual renderizar a opção
+            try:
+                elementos.usar("lista_virtual", lambda container: driver.execute_script(
+                    "arguments[0].scrollTop += 100;", container), escopo=escopo)
+                elementos.esperar(WebDriverWait(driver, 1, poll_frequency=0.1), "opcao_nome",
+                                  texto=texto_opcao, escopo=escopo)
+            except:
+                pass
+
+
+# Aplica o estado desejado de vários sidra-toggle em UMA chamada ao navegador.
+# arguments: [estado {texto: bool}, seletor do escopo, callback]. A lista do
+# SIDRA é virtualizada (div.lv-container): opções ainda não renderizadas são
+# procuradas rolando o container um quadro de animação por vez. Se o seletor
+# do escopo não existe na página, nenhuma opção é procurada fora dele: todas
+# voltam com encontrado = false. Nome parcial só vale se for de uma única opção.
+SCRIPT_ESTADO_FILTROS = """
+const estado = arguments[0];
+const escopo = arguments[1] ? document.querySelector(arguments[1]) : document;
+const concluir = arguments[arguments.length - 1];
+const resultado = {};
+const pendentes = new Set(Object.keys(estado));
+if (!escopo) {
+    for (const texto of pendentes) {
+        resultado[texto] = {encontrado: false, antes: null, clicado: false, depois: null, ok: false};
+    }
+    concluir(resultado);
+    return;
+}
+const container = escopo.querySelector("div.lv-container");
+
+function localizar(texto) {
+    const spans = Array.from(escopo.querySelectorAll("span.nome"));
+    const parciais = spans.filter(s => s.textContent.includes(texto));
+    const alvo = spans.find(s => s.textContent.trim() === texto)
+              || (parciais.length === 1 ? parciais[0] : null);
+    const item = alvo && alvo.closest(".item-lista, .item-arvore");
+    return item ? item.querySelector("button.sidra-toggle") : null;
+}
+
+function marcado(botao) {
+    return botao.getAttribute("aria-selected") === "true";
+}
+
+// Clica nas opções pendentes já renderizadas e devolve as que foram clicadas
+function aplicarVisiveis() {
+    const clicados = [];
+    for (const texto of Array.from(pendentes)) {
+        const botao = localizar(texto);
+        if (!botao) continue;
+        const antes = marcado(botao);
+        const clicado = antes !== estado[texto];
+        if (clicado) {
+            botao.click();
+            clicados.push(texto);
+        }
+        resultado[texto] = {encontrado: true, antes: antes, clicado: clicado, depois: antes, ok: !clicado};
+        pendentes.delete(texto);
+    }
+    return clicados;
+}
+
+// Espera (até 2 s) o aria-selected das opções clicadas refletir o clique
+function conferir(clicados, continuar, inicio) {
+    inicio = inicio || performance.now();
+    for (const texto of clicados) {
+        const botao = localizar(texto);
+        resultado[texto].depois = botao ? marcado(botao) : null;
+        resultado[texto].ok = resultado[texto].depois === estado[texto];
+    }
+    if (clicados.some(t => !resultado[t].ok) && performance.now() - inicio < 2000) {
+        setTimeout(() => conferir(clicados, continuar, inicio), 50);
+        return;
+    }
+    continuar();
+}
+
+function passo() {
+    conferir(aplicarVisiveis(), () => {
+        const fim = !container
+            || container.scrollTop + container.clientHeight >= container.scrollHeight - 1;
+        if (!pendentes.size || fim) {
+            for (const texto of pendentes) {
+                resultado[texto] = {encontrado: false, antes: null, clicado: false, depois: null, ok: false};
+            }
+            concluir(resultado);
+            return;
+        }
+        container.scrollTop += Math.max(container.clientHeight - 20, 20);
+        requestAnimationFrame(passo);
+    });
+}
+
+if (container) container.scrollTop = 0;
+requestAnimationFrame(passo);
+"""
+
+
+def aplicar_estado_filtros(driver, estado, escopo=None):
+    """
+    Aplica o estado desejado de várias opções sidra-toggle de uma só vez.
+
+    `estado` mapeia o texto de cada opção para True (marcar) ou False
+    (desmarcar), ex.: {"Total": False, "60 a 69 anos": True}. Tudo é feito
+    em um único `execute_async_script`. Retorna, por opção, um dict com
+    `encontrado`, `antes`, `clicado`, `depois` e `ok`.
+    """
+    resultado = driver.execute_async_script(SCRIPT_ESTADO_FILTROS, estado, escopo)
+    anotar(opcoes=len(estado), clicadas=sum(1 for r in resultado.values() if r["clicado"]),
+           pendentes=sum(1 for r in resultado.values() if not r["ok"]))
+
+    for texto_opcao, r in resultado.items():
+        acao = "marcado" if estado[texto_opcao] else "desmarcado"
+        if not r["encontrado"]:
+            print(f"   -> ❌ '{texto_opcao}' não encontrado!")
+        elif not r["ok"]:
+            print(f"   -> ⚠️ '{texto_opcao}' não ficou {acao}.")
+        elif r["clicado"]:
+            print(f"   -> ✅ '{texto_opcao}' {acao}!")
+        else:
+            print(f"   -> '{texto_opcao}' já estava {acao}.")
+    return resultado
+
+
+# Lista {texto: marcado?} de todas as opções sidra-toggle de um painel, rolando
+# a lista virtualizada do mesmo jeito que SCRIPT_ESTADO_FILTROS.
+# arguments: [seletor do escopo, callback]. Devolve null se o escopo não existe.
+SCRIPT_LISTAR_OPCOES = """
+const escopo = arguments[0] ? document.querySelector(arguments[0]) : document;
+const concluir = arguments[arguments.length - 1];
+if (!escopo) {
+    concluir(null);
+    return;
+}
+const container = escopo.querySelector("div.lv-container");
+const opcoes = {};
+
+function passo() {
+    for (const item of escopo.querySelectorAll(".item-lista, .item-arvore")) {
+        const nome = item.querySelector("span.nome");
+        const botao = item.querySelector("button.sidra-toggle");
+        if (nome && botao) opcoes[nome.textContent.trim()] = botao.getAttribute("aria-selected") === "true";
+    }
+    if (!container || container.scrollTop + container.clientHeight >= container.scrollHeight - 1) {
+        if (container) container.scrollTop = 0;
+        concluir(opcoes);
+        return;
+    }
+    container.scrollTop += Math.max(container.clientHeight - 20, 20);
+    requestAnimationFrame(passo);
+}
+
+if (container) container.scrollTop = 0;
+requestAnimationFrame(passo);
+"""
+
+
+def listar_opcoes(driver, escopo=None):
+    """Todas as opções de um painel como {texto: marcado?}, em uma única chamada."""
+    opcoes = driver.execute_async_script(SCRIPT_LISTAR_OPCOES, escopo)
+    if opcoes is None:
+        raise NoSuchElementException(f"Painel '{escopo}' não encontrado na página.")
+    return opcoes
+
+
+def listar_periodos(driver):
+    """Períodos oferecidos na página da tabela, como {período: marcado?}."""
+    return listar_opcoes(driver, SELETOR_PAINEL_PERIODO)
+
+
+def selecionar_periodos(driver, wait, periodos):
+    """Deixa marcados no painel de período exatamente os `periodos` informados."""
+    disponiveis = listar_periodos(driver)
+    faltando = [p for p in periodos if p not in disponiveis]
+    if faltando:
+        raise EspecificacaoInvalida(f"❌ Período(s) não oferecido(s) pela tabela: {', '.join(faltando)}")
+
+    estado = {p: p in periodos for p in disponiveis}
+    resultado = aplicar_estado_filtros(driver, estado, SELETOR_PAINEL_PERIODO)
+    for periodo, marcar in estado.items():
+        if not resultado.get(periodo, {}).get("ok"):
+            registrar_retentativa()
+            if not clicar_botao_sidra_toggle(driver, wait, periodo, marcar=marcar, escopo=SELETOR_PAINEL_PERIODO):
+                raise NoSuchElementException(f"Período '{periodo}' não encontrado em '{SELETOR_PAINEL_PERIODO}'.")
+
 
 def selecionar_unidade_federacao(driver, wait):
     """
     Seleciona Unidade da Federação expandindo a árvore corretamente.
     """
     print("\n--- CONFIGURANDO UNIDADE TERRITORIAL ---")
-    
+    elementos = localizadores(driver)
+
     try:
         # 1. Localiza o item "Unidade da Federação" na árvore
-        xpath_uf = "//li[@id='arvore-435e-1']"
-        item_uf = wait.until(EC.presence_of_element_located((By.XPATH, xpath_uf)))
-        
+        item_uf = elementos.esperar(wait, "arvore_uf")
+
         # Scroll até o elemento
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", item_uf)
-        time.sleep(1)
-        
+
         # 2. Verifica se precisa expandir (procura o ícone de expansão)
         try:
-            icone_expandir = item_uf.find_element(By.CSS_SELECTOR, "i.expande")
-            
+            icone_expandir = elementos.obter("arvore_uf_expandir")
+
             # Se está colapsado (classe 'collapsed'), clica para expandir
             if "collapsed" in icone_expandir.get_attribute("class"):
                 print("   -> Expandindo árvore 'Unidade da Federação'...")
-                driver.execute_script("arguments[0].click();", icone_expandir)
-                time.sleep(1.5)
+                with medir_etapa("filtros/expandir_arvore"):
+                    driver.execute_script("arguments[0].click();", icone_expandir)
+                    wait.until(arvore_expandida(icone_expandir))
                 print("   -> ✅ Árvore expandida!")
         except NoSuchElementException:
             print("   -> Árvore já estava expandida.")
-        
-        # 3. Agora localiza o subitem "Em Grande Região [27/27]"
-        xpath_em_grande_regiao = "//li[@id='arvore-715e-1']//span[@class='nome' and contains(text(), 'Em Grande Região')]"
-        
+
+        # 3. Agora localiza o subitem "Em Grande Região [27/27]" (dentro do item da UF)
         try:
-            span_em_grande_regiao = wait.until(EC.presence_of_element_located((By.XPATH, xpath_em_grande_regiao)))
-            
+            span_em_grande_regiao = elementos.esperar(wait, "arvore_grande_regiao_nome")
+
             # Scroll até o elemento
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", span_em_grande_regiao)
-            time.sleep(0.5)
-            
+
             # Pega o botão sidra-toggle
-            item_pai = span_em_grande_regiao.find_element(By.XPATH, "./ancestor::div[contains(@class, 'item-arvore')]")
-            botao = item_pai.find_element(By.CSS_SELECTOR, "button.sidra-toggle")
-            
+            botao = elementos.obter("arvore_grande_regiao_botao")
+
             # Verifica se já está marcado
             esta_marcado = botao.get_attribute("aria-selected") == "true"
-            
+
             if not esta_marcado:
                 driver.execute_script("arguments[0].click();", botao)
+                wait.until(aria_selected(botao, True))
                 print("   -> ✅ 'Em Grande Região [27/27]' selecionado!")
-                time.sleep(1)
             else:
                 print("   -> ✅ 'Em Grande Região [27/27]' já estava selecionado!")
-                
+
         except TimeoutException:
             print("   -> ⚠️ Não foi possível encontrar 'Em Grande Região'. Tentando pela Unidade da Federação diretamente...")
-            
+
             # Fallback: Marca o próprio "Unidade da Federação"
-            xpath_botao_uf = "//li[@id='arvore-435e-1']//button[@class='sidra-toggle']"
-            botao_uf = driver.find_element(By.XPATH, xpath_botao_uf)
-            
+            botao_uf = elementos.obter("arvore_uf_botao")
+
             esta_marcado = botao_uf.get_attribute("aria-selected") == "true"
-            
+
             if not esta_marcado:
                 driver.execute_script("arguments[0].click();", botao_uf)
+                wait.until(aria_selected(botao_uf, True))
                 print("   -> ✅ 'Unidade da Federação [27/27]' selecionado!")
             else:
                 print("   -> ✅ 'Unidade da Federação [27/27]' já estava selecionado!")
-    
+
     except Exception as e:
         print(f"   -> ❌ Erro ao selecionar Unidade da Federação: {e}")
         raise
 
 
-def aplicar_filtros_tabela(wait):
-    """Aplica todos os filtros necessários."""
+def selecionar_nivel_territorial(driver, wait, rotulo):
+    """Marca um nível da árvore territorial pelo rótulo (ex.: "Grande Região")."""
+    elementos = localizadores(driver)
+    item = elementos.esperar(wait, "arvore_nivel", texto=rotulo)
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", item)
+
+    botao = elementos.obter("arvore_nivel_botao", texto=rotulo)
+    if botao.get_attribute("aria-selected") == "true":
+        print(f"   -> ✅ '{rotulo}' já estava selecionado!")
+        return
+    driver.execute_script("arguments[0].click();", botao)
+    wait.until(aria_selected(botao, True))
+    print(f"   -> ✅ '{rotulo}' selecionado!")
+
+
+def aplicar_filtros_painel(driver, wait, filtros, escopo=None):
+    """
+    `aplicar_estado_filtros` em lote e, só para as opções que o lote não
+    resolveu, o fallback opção a opção, no mesmo painel. Se o painel
+    `escopo` não está na página, falha em vez de procurar as opções no
+    documento inteiro; uma opção que nem o fallback encontra também é erro
+    (baixar com o filtro errado seria pior).
+    """
+    escopo = escopo or seletor_painel("C58")
+    resultado = aplicar_estado_filtros(driver, filtros, escopo)
+    pendentes = [t for t in filtros if not resultado.get(t, {}).get("ok")]
+    if pendentes and not driver.find_elements(By.CSS_SELECTOR, escopo):
+        raise NoSuchElementException(f"Painel '{escopo}' não encontrado na página.")
+    for texto_opcao in pendentes:
+        registrar_retentativa()
+        if not clicar_botao_sidra_toggle(driver, wait, texto_opcao, marcar=filtros[texto_opcao], escopo=escopo):
+            raise NoSuchElementException(f"Opção '{texto_opcao}' não encontrada em '{escopo}'.")
+    return resultado
+
+
+def aplicar_filtros_tabela(wait, filtros=FILTROS_1209, periodos=None, escopo=None):
+    """
+    Aplica todos os filtros necessários.
+
+    `filtros` mapeia o texto de cada opção para o estado desejado
+    (True = marcar, False = desmarcar); o padrão é o da Tabela 1209.
+    `escopo` é o painel dessas opções (padrão: `seletor_painel("C58")`).
+    `periodos` (ex.: ["2022"]) troca a seleção padrão do painel de período.
+    """
     print("\n" + "="*60)
     print("APLICANDO FILTROS")
     print("="*60)
-    
+
     driver = wait._driver
-    
-    # 1. Grupo de Idade
+
+    # 1. Grupo de Idade: todas as opções em uma única chamada ao navegador
     print("\n--- FILTRO: GRUPO DE IDADE ---")
-    clicar_botao_sidra_toggle(driver, wait, "Total", marcar=False)
-    time.sleep(2)
-    clicar_botao_sidra_toggle(driver, wait, "60 a 69 anos", marcar=True)
-    time.sleep(2)
-    clicar_botao_sidra_toggle(driver, wait, "70 anos ou mais", marcar=True)
-    time.sleep(2)
+    with medir_etapa("filtros/grupo_de_idade"):
+        aplicar_filtros_painel(driver, wait, filtros, escopo or seletor_painel("C58"))
 
     # 2. Ano
     print("\n--- FILTRO: ANO ---")
-    print("   -> Ano 2022 já está selecionado por padrão.")
+    if periodos is None:
+        print("   -> Mantendo o período selecionado por padrão.")
+    else:
+        with medir_etapa("filtros/periodo"):
+            selecionar_periodos(driver, wait, periodos)
 
     # 3. Unidade Territorial - CORRIGIDO
-    selecionar_unidade_federacao(driver, wait)
-    
+    with medir_etapa("filtros/unidade_federacao"):
+        selecionar_unidade_federacao(driver, wait)
+
     print("\n" + "="*60)
     print("✅ FILTROS APLICADOS!")
     print("="*60 + "\n")
 
 
-def baixar_csv(wait, timeout=60):
-    """Realiza o download do CSV com timestamp."""
+def baixar_csv(wait, timeout=60, download_dir=DOWNLOAD_DIR, prefixo="populacao_60mais_1209", especificacao=None):
+    """
+    Realiza o download do CSV com timestamp.
+
+    A conclusão é detectada pelos eventos de download do DevTools (ou, sem
+    eventos, pelo observador da pasta) e o arquivo é renomeado dentro de
+    `download_dir`, que deve ser a mesma pasta configurada no driver.
+
+    Com `especificacao` (dict de `sidra_api` ou `EspecificacaoTabela`), o
+    CSV é validado e registrado no índice de extrações (`indice_extracoes`):
+    se for idêntico a um já baixado, o download é descartado e o caminho do
+    existente é devolvido. Retorna o caminho final do CSV.
+    """
+    download_dir = Path(download_dir)
     print("\n" + "="*60)
     print("INICIANDO DOWNLOAD")
     print("="*60)
-    
+
     driver = wait._driver
-    
-    # 1-4: Código anterior permanece igual...
+
+    # Monitores criados antes do clique: só o download disparado aqui conta
+    monitor = MonitorDownloads(driver)
+    observador = ObservadorPasta(download_dir)
+
+    # 1-4: Abre o modal, escolhe o formato e dispara o download
+    # (select e link procurados dentro do modal, já resolvido)
     print("   -> Clicando no botão 'Download' para abrir modal...")
-    botao_download = wait.until(EC.element_to_be_clickable((By.ID, "botao-downloads")))
-    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", botao_download)
-    time.sleep(0.5)
-    driver.execute_script("arguments[0].click();", botao_download)
-    
-    wait.until(EC.visibility_of_element_located((By.ID, "modal-downloads")))
-    time.sleep(1)
-    
-    select_formato = driver.find_element(By.CSS_SELECTOR, "#modal-downloads select.select-formato-arquivo")
-    driver.execute_script("arguments[0].value = 'br.csv'; arguments[0].dispatchEvent(new Event('change'));", select_formato)
-    time.sleep(0.5)
-    
-    botao_download_verde = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#modal-downloads a.btn-green-sucess")))
-    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", botao_download_verde)
-    time.sleep(0.5)
-    driver.execute_script("arguments[0].click();", botao_download_verde)
-    
+    elementos = localizadores(driver)
+    with medir_etapa("download/modal"):
+        botao_download = wait.until(EC.element_to_be_clickable(elementos.esperar(wait, "botao_downloads")))
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", botao_download)
+        driver.execute_script("arguments[0].click();", botao_download)
+
+        wait.until(EC.visibility_of(elementos.esperar(wait, "modal_downloads")))
+        select_formato = wait.until(EC.visibility_of(elementos.obter("select_formato")))
+        driver.execute_script("arguments[0].value = 'br.csv'; arguments[0].dispatchEvent(new Event('change'));", select_formato)
+        wait.until(lambda d: select_formato.get_attribute("value") == "br.csv")
+
+        botao_download_verde = wait.until(EC.element_to_be_clickable(elementos.obter("botao_baixar")))
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", botao_download_verde)
+        driver.execute_script("arguments[0].click();", botao_download_verde)
+
     # 5. Aguardar download
     print("   -> Aguardando arquivo CSV ser baixado...")
-    arquivo_final = None
-    fim = time.time() + timeout
-    
-    while time.time() < fim:
-        time.sleep(1)
-        candidatos = sorted(DOWNLOAD_DIR.glob("*.csv"), key=lambda p: p.stat().st_mtime, reverse=True)
-        if candidatos and candidatos[0].stat().st_size > 0:
-            arquivo_final = candidatos[0]
-            break
-    
+    try:
+        with medir_etapa("download/arquivo"):
+            arquivo_final = aguardar_download(download_dir, monitor, observador, timeout)
+    except TimeoutError:
+        raise TimeoutError(f"CSV não foi localizado após {timeout} segundos.")
+    finally:
+        observador.fechar()
+
     # 6. Renomear COM TIMESTAMP
-    if arquivo_final:
-        print(f"   -> ✅ CSV baixado: {arquivo_final.name}")
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-        nome_exigido = f"populacao_60mais_1209_{timestamp}.csv"
-        caminho_final = DOWNLOAD_DIR / nome_exigido
-        
-        if caminho_final.exists():
-            caminho_final.unlink()
-        
-        arquivo_final.rename(caminho_final)
-        print(f"   -> ✅ Renomeado para: {nome_exigido}")
+    print(f"   -> ✅ CSV baixado: {arquivo_final.name}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    nome_exigido = f"{prefixo}_{timestamp}.csv"
+    caminho_final = download_dir / nome_exigido
+
+    if especificacao is not None:
+        from indice_extracoes import registrar_download
+
+        with medir_etapa("download/indice"):
+            extracao = registrar_download(arquivo_final, especificacao, destino=caminho_final)
+        if extracao.duplicada:
+            return extracao.caminho
+        print(f"   -> ✅ Renomeado para: {nome_exigido} ({extracao.linhas} linhas, sha256 {extracao.hash[:12]})")
         print(f"   -> 📂 Localização: {caminho_final}")
-    else:
-        raise TimeoutError(f"CSV não foi localizado após {timeout} segundos.")
+        return caminho_final
+
+    if caminho_final.exists():
+        caminho_final.unlink()
 
+    arquivo_final.rename(caminho_final)
+    print(f"   -> ✅ Renomeado para: {nome_exigido}")
+    print(f"   -> 📂 Localização: {caminho_final}")
+    return caminho_final
 
-def acessar_tabela_1209():
-    """Fluxo completo."""
-    driver = iniciar_driver()
+
+def acessar_tabela_1209(headless=HEADLESS, pausar=None):
+    """
+    Fluxo completo.
+
+    `pausar` (padrão: somente com janela) aguarda Enter antes de fechar o
+    navegador. Retorna True se o CSV foi baixado com sucesso.
+    """
+    if pausar is None:
+        pausar = not headless
+
+    iniciar_tempos()
+    trace_id = novo_trace()
+    with medir_etapa("iniciar_driver"):
+        driver = iniciar_driver(headless=headless)
     wait = WebDriverWait(driver, 30)
+    sucesso = False
 
     try:
-        buscar_tabela_1209(driver, wait)
-        aplicar_filtros_tabela(wait)
-        baixar_csv(wait)
-        
+        with medir_etapa("buscar_tabela_1209"):
+            buscar_tabela_1209(driver, wait)
+        with medir_etapa("aplicar_filtros_tabela"):
+            aplicar_filtros_tabela(wait, escopo=seletor_painel(ESPECIFICACAO_1209["classificacao"]))
+        with medir_etapa("baixar_csv"):
+            baixar_csv(wait, especificacao=ESPECIFICACAO_1209)
+        sucesso = True
+
         print("\n" + "="*60)
         print("🎉 PROCESSO CONCLUÍDO COM SUCESSO! 🎉")
         print("="*60)
-        
+
     except Exception as e:
         print(f"\n❌ ERRO: {e}")
         import traceback
         traceback.print_exc()
-        
+
     finally:
-        input("\nPressione Enter para fechar o navegador...")
+        imprimir_relatorio_tempos()
+        localizadores(driver).imprimir_estatisticas()
+        arquivo_trace = exportar_trace(trace_id)
+        if arquivo_trace:
+            print(f"   -> 🧭 Spans da execução em {arquivo_trace} (resumo: python rastreamento.py resumo)")
+        if pausar:
+            input("\nPressione Enter para fechar o navegador...")
         driver.quit()
 
+    return sucesso
+
 
 if __name__ == "__main__":
-    acessar_tabela_1209()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extrai a Tabela 1209 do SIDRA.")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS,
+                        help="Perfil de servidor: sem janela, recursos bloqueados e sem pausa final.")
+    parser.add_argument("--sem-pausa", action="store_true", help="Não aguarda Enter antes de fechar.")
+    args = parser.parse_args()
+
+    ok = acessar_tabela_1209(headless=args.headless, pausar=False if args.sem_pausa else None)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,425 @@
+"""
+Diário durável (SQLite) para lotes longos de extrações.
+
+Cada especificação de um lote (`plano_extracao.EspecificacaoTabela`) vira
+um trabalho com estado gravado em `DIARIO_PATH` (padrão
+`dados/diario.sqlite3`):
+
+    pendente -> executando -> concluido
+                           -> falhou  (nova tentativa após backoff)
+                           -> esgotado (tentativas acabaram ou erro permanente)
+
+Um lote interrompido (Ctrl+C, kill, queda da máquina) é retomado rodando o
+mesmo comando: trabalhos concluídos não são refeitos (a menos que o CSV
+tenha sumido) e os que estavam "executando" voltam a "pendente".
+
+Falhas transitórias (timeout, erro do WebDriver, HTTP) são repetidas com
+backoff exponencial com jitter. Erros de especificação
+(`sidra_api.EspecificacaoInvalida`, ex.: período que a tabela não oferece)
+vão direto para "esgotado"; demais erros (inclusive JSON ou texto ilegível
+de uma página de manutenção) contam como transitórios. Um disjuntor
+(`Disjuntor`) compartilhado pelos workers abre após N falhas transitórias
+seguidas: enquanto o site está degradado ninguém tenta, e depois da pausa
+um único trabalho de teste decide se o disjuntor fecha ou abre de novo.
+
+Uso:
+    python diario_lotes.py especificacoes/tabela_1209.json --lote mensal --workers 2
+    python diario_lotes.py especificacoes/tabela_1209.json --lote mensal --via api
+    python diario_lotes.py --lote mensal --status
+    python diario_lotes.py --lote mensal --refazer-esgotados
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from configuracao import DOWNLOAD_DIR
+from sidra_api import EspecificacaoInvalida
+
+DIARIO_PATH = Path(os.environ.get("SIDRA_DIARIO", DOWNLOAD_DIR / "diario.sqlite3"))
+
+ESTADOS = ("pendente", "executando", "concluido", "falhou", "esgotado")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabalhos (
+    lote TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    ordem INTEGER NOT NULL,
+    especificacao TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendente',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa REAL NOT NULL DEFAULT 0,
+    arquivo TEXT,
+    erro TEXT,
+    atualizado_em REAL NOT NULL,
+    PRIMARY KEY (lote, chave)
+);
+CREATE INDEX IF NOT EXISTS trabalhos_fila ON trabalhos (lote, estado, proxima_tentativa);
+"""
+
+
+def chave_trabalho(especificacao):
+    """Hash estável do conteúdo da especificação (a mesma especificação = o mesmo trabalho)."""
+    canonica = json.dumps(asdict(especificacao), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonica.encode("utf-8")).hexdigest()[:24]
+
+
+def erro_permanente(erro):
+    """Erros que nenhuma nova tentativa resolve: especificação inválida para a tabela."""
+    return isinstance(erro, EspecificacaoInvalida)
+
+
+def atraso_backoff(tentativas, base=5.0, maximo=300.0):
+    """base * 2^(tentativas-1), limitado a `maximo`, com jitter de 50-100%."""
+    return min(base * 2 ** (tentativas - 1), maximo) * random.uniform(0.5, 1.0)
+
+
+# ====== DIÁRIO ======
+
+class DiarioLotes:
+    """Estado dos trabalhos de todos os lotes em um arquivo SQLite."""
+
+    def __init__(self, caminho=DIARIO_PATH):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # isolation_level=None: cada comando é confirmado na hora (autocommit)
+        self._conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(ESQUEMA)
+
+    def fechar(self):
+        self._conexao.close()
+
+    def _executar(self, sql, parametros=()):
+        with self._lock:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    def adicionar(self, lote, especificacoes):
+        """
+        Inclui `EspecificacaoTabela`s no lote; as que já estão nele (em
+        qualquer estado) são mantidas como estão.
+        """
+        agora = time.time()
+        novas = 0
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                (ordem,), = self._conexao.execute(
+                    "SELECT COALESCE(MAX(ordem), -1) FROM trabalhos WHERE lote = ?", (lote,)).fetchall()
+                for esp in especificacoes:
+                    cursor = self._conexao.execute(
+                        "INSERT OR IGNORE INTO trabalhos (lote, chave, ordem, especificacao, atualizado_em) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (lote, chave_trabalho(esp), ordem + 1, json.dumps(asdict(esp), ensure_ascii=False), agora))
+                    if cursor.rowcount:
+                        ordem += 1
+                        novas += 1
+                self._conexao.execute("COMMIT")
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+        return novas
+
+    def retomar(self, lote):
+        """
+        Prepara um lote para (re)execução: trabalhos que ficaram "executando"
+        (processo interrompido) voltam a "pendente" e concluídos cujo CSV
+        sumiu são refeitos. Retorna (interrompidos, refeitos).
+        """
+        agora = time.time()
+        interrompidos = self._executar(
+            "UPDATE trabalhos SET estado = 'pendente', atualizado_em = ? "
+            "WHERE lote = ? AND estado = 'executando' RETURNING chave", (agora, lote))
+        refeitos = 0
+        for linha in self._executar("SELECT chave, arquivo FROM trabalhos WHERE lote = ? AND estado = 'concluido'",
+                                    (lote,)):
+            if not linha["arquivo"] or not Path(linha["arquivo"]).exists():
+                self._executar("UPDATE trabalhos SET estado = 'pendente', arquivo = NULL, atualizado_em = ? "
+                               "WHERE lote = ? AND chave = ?", (agora, lote, linha["chave"]))
+                refeitos += 1
+        return len(interrompidos), refeitos
+
+    def refazer_esgotados(self, lote):
+        """Dá nova chance (tentativas zeradas) aos trabalhos esgotados do lote."""
+        return len(self._executar(
+            "UPDATE trabalhos SET estado = 'pendente', tentativas = 0, proxima_tentativa = 0, atualizado_em = ? "
+            "WHERE lote = ? AND estado = 'esgotado' RETURNING chave", (time.time(), lote)))
+
+    def proximo(self, lote):
+        """
+        Reserva (estado -> executando) o próximo trabalho pronto do lote, na
+        ordem de inclusão. Retorna (chave, especificação em dict) ou None.
+        """
+        agora = time.time()
+        linhas = self._executar(
+            "UPDATE trabalhos SET estado = 'executando', tentativas = tentativas + 1, atualizado_em = ? "
+            "WHERE rowid = (SELECT rowid FROM trabalhos WHERE lote = ? AND estado IN ('pendente', 'falhou') "
+            "AND proxima_tentativa <= ? ORDER BY ordem LIMIT 1) RETURNING chave, especificacao",
+            (agora, lote, agora))
+        if not linhas:
+            return None
+        return linhas[0]["chave"], json.loads(linhas[0]["especificacao"])
+
+    def concluir(self, lote, chave, arquivo):
+        self._executar("UPDATE trabalhos SET estado = 'concluido', arquivo = ?, erro = NULL, atualizado_em = ? "
+                       "WHERE lote = ? AND chave = ?", (str(arquivo), time.time(), lote, chave))
+
+    def falhar(self, lote, chave, erro, permanente=False, max_tentativas=5, base_backoff=5.0):
+        """Registra a falha; retorna o atraso até a próxima tentativa (None se esgotou)."""
+        (tentativas,), = self._executar("SELECT tentativas FROM trabalhos WHERE lote = ? AND chave = ?", (lote, chave))
+        agora = time.time()
+        if permanente or tentativas >= max_tentativas:
+            self._executar("UPDATE trabalhos SET estado = 'esgotado', erro = ?, atualizado_em = ? "
+                           "WHERE lote = ? AND chave = ?", (erro, agora, lote, chave))
+            return None
+        atraso = atraso_backoff(tentativas, base_backoff)
+        self._executar("UPDATE trabalhos SET estado = 'falhou', erro = ?, proxima_tentativa = ?, atualizado_em = ? "
+                       "WHERE lote = ? AND chave = ?", (erro, agora + atraso, agora, lote, chave))
+        return atraso
+
+    def contagem(self, lote):
+        """{estado: quantidade} do lote."""
+        contagem = dict.fromkeys(ESTADOS, 0)
+        for linha in self._executar("SELECT estado, COUNT(*) AS n FROM trabalhos WHERE lote = ? GROUP BY estado",
+                                    (lote,)):
+            contagem[linha["estado"]] = linha["n"]
+        return contagem
+
+    def proxima_liberacao(self, lote):
+        """Instante (time.time) em que o próximo trabalho em backoff fica pronto; None se não há."""
+        (instante,), = self._executar(
+            "SELECT MIN(proxima_tentativa) FROM trabalhos WHERE lote = ? AND estado IN ('pendente', 'falhou')",
+            (lote,))
+        return instante
+
+    def trabalhos(self, lote):
+        return self._executar("SELECT * FROM trabalhos WHERE lote = ? ORDER BY ordem", (lote,))
+
+
+# ====== DISJUNTOR ======
+
+class Disjuntor:
+    """
+    Disjuntor (circuit breaker) compartilhado entre threads.
+
+    fechado: tudo passa; `limite_falhas` falhas transitórias seguidas o abrem.
+    aberto: `liberar` bloqueia até passar `pausa` segundos.
+    meio-aberto: um único trabalho de teste passa; sucesso fecha, falha reabre.
+    """
+
+    def __init__(self, limite_falhas=5, pausa=60.0):
+        self.limite_falhas = limite_falhas
+        self.pausa = pausa
+        self.estado = "fechado"
+        self.aberturas = 0
+        self._falhas_seguidas = 0
+        self._aberto_ate = 0.0
+        self._teste_em_andamento = False
+        self._condicao = threading.Condition()
+
+    def liberar(self, parar=None):
+        """Bloqueia enquanto o disjuntor não permitir uma tentativa (ou até `parar` ser setado)."""
+        with self._condicao:
+            while True:
+                if parar is not None and parar.is_set():
+                    return False
+                if self.estado == "fechado":
+                    return True
+                agora = time.monotonic()
+                if self.estado == "aberto" and agora >= self._aberto_ate:
+                    self.estado = "meio-aberto"
+                    print("   -> 🔌 Disjuntor meio-aberto: um trabalho de teste...")
+                if self.estado == "meio-aberto" and not self._teste_em_andamento:
+                    self._teste_em_andamento = True
+                    return True
+                self._condicao.wait(max(0.1, min(self._aberto_ate - agora, 1.0)))
+
+    def sucesso(self):
+        with self._condicao:
+            if self.estado != "fechado":
+                print("   -> 🔌 Disjuntor fechado: o site voltou a responder.")
+            self.estado = "fechado"
+            self._falhas_seguidas = 0
+            self._teste_em_andamento = False
+            self._condicao.notify_all()
+
+    def falha(self):
+        with self._condicao:
+            self._falhas_seguidas += 1
+            if self.estado == "meio-aberto" or self._falhas_seguidas >= self.limite_falhas:
+                self.estado = "aberto"
+                self.aberturas += 1
+                self._aberto_ate = time.monotonic() + self.pausa
+                print(f"   -> 🔌 Disjuntor aberto por {self.pausa:.0f}s após "
+                      f"{self._falhas_seguidas} falha(s) seguida(s): site degradado?")
+            self._teste_em_andamento = False
+            self._condicao.notify_all()
+
+    def neutro(self):
+        """Libera o teste sem contar como sucesso nem falha (ex.: erro permanente)."""
+        with self._condicao:
+            self._teste_em_andamento = False
+            self._condicao.notify_all()
+
+
+# ====== EXECUÇÃO ======
+
+def executar_lote(diario, lote, executar, n_workers=1, disjuntor=None, max_tentativas=5, base_backoff=5.0):
+    """
+    Processa o lote até não restar trabalho pendente ou em backoff.
+
+    `executar(especificacao_em_dict, indice_worker)` faz uma extração e
+    retorna o caminho do CSV; qualquer exceção conta como falha do trabalho.
+    Retorna a contagem final por estado.
+    """
+    disjuntor = disjuntor or Disjuntor()
+    interrompidos, refeitos = diario.retomar(lote)
+    if interrompidos or refeitos:
+        print(f"   -> ↩️  Retomando lote '{lote}': {interrompidos} interrompido(s), {refeitos} CSV(s) ausente(s)")
+
+    parar = threading.Event()
+
+    def worker(indice):
+        while not parar.is_set():
+            if not disjuntor.liberar(parar):
+                return
+            reservado = diario.proximo(lote)
+            if reservado is None:
+                disjuntor.neutro()
+                contagem = diario.contagem(lote)
+                if not (contagem["pendente"] or contagem["falhou"] or contagem["executando"]):
+                    return
+                # Nada pronto: espera o próximo backoff vencer (ou outro worker terminar)
+                liberacao = diario.proxima_liberacao(lote)
+                parar.wait(min(max((liberacao or 0) - time.time(), 0.2), 5.0))
+                continue
+
+            chave, especificacao = reservado
+            try:
+                arquivo = executar(especificacao, indice)
+            except Exception as e:
+                erro = f"{type(e).__name__}: {e}"
+                permanente = erro_permanente(e)
+                atraso = diario.falhar(lote, chave, erro, permanente, max_tentativas, base_backoff)
+                if permanente:
+                    disjuntor.neutro()
+                else:
+                    disjuntor.falha()
+                destino = "esgotado" if atraso is None else f"nova tentativa em {atraso:.0f}s"
+                print(f"   -> ❌ [worker {indice}] Tabela {especificacao['tabela']}: {erro} ({destino})")
+            else:
+                diario.concluir(lote, chave, arquivo)
+                disjuntor.sucesso()
+                print(f"   -> ✅ [worker {indice}] Tabela {especificacao['tabela']}: {Path(arquivo).name}")
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"sidra-lote-{i}", daemon=True)
+               for i in range(max(1, n_workers))]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        # Os trabalhos em andamento ficam "executando" e voltam a "pendente" na retomada
+        parar.set()
+        print(f"\n   -> ⏸️  Lote '{lote}' interrompido; rode o mesmo comando para retomar.")
+        raise
+    return diario.contagem(lote)
+
+
+def executor_navegador(pool):
+    """`executar` para `executar_lote` que extrai pela interface, com sessões do pool."""
+    from plano_extracao import compilar, executar_plano, normalizar
+
+    def executar(especificacao, indice):
+        with pool.sessao() as sessao:
+            resultado, = executar_plano(sessao.driver, compilar([normalizar(especificacao)])[0],
+                                        sessao.pasta).values()
+        if not resultado.sucesso:
+            raise resultado.excecao or RuntimeError(resultado.erro)
+        return resultado.arquivo
+
+    return executar
+
+
+def executor_api(pasta_base=DOWNLOAD_DIR):
+    """`executar` para `executar_lote` que extrai pela apisidra."""
+    from plano_extracao import normalizar
+    from sidra_api import extrair_via_api
+
+    def executar(especificacao, indice):
+        pasta = Path(pasta_base) / f"worker_{indice}"
+        pasta.mkdir(parents=True, exist_ok=True)
+        return extrair_via_api(normalizar(especificacao).para_api(), pasta)
+
+    return executar
+
+
+def imprimir_status(diario, lote):
+    contagem = diario.contagem(lote)
+    print("\n" + "="*60)
+    print(f"📒 Lote '{lote}': " + ", ".join(f"{n} {estado}" for estado, n in contagem.items() if n))
+    print("="*60)
+    for linha in diario.trabalhos(lote):
+        esp = json.loads(linha["especificacao"])
+        detalhe = Path(linha["arquivo"]).name if linha["estado"] == "concluido" else (linha["erro"] or "")
+        print(f"   {linha['estado']:<10} {linha['tentativas']:>2}x  {esp['tabela']:<8} "
+              f"{esp['saida'].format(tabela=esp['tabela']):<36} {detalhe}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lotes de extrações SIDRA com diário SQLite e retomada.")
+    parser.add_argument("arquivos", nargs="*", help="Especificações a incluir no lote (.json, .yaml, .yml).")
+    parser.add_argument("--lote", default="padrao", help="Nome do lote no diário.")
+    parser.add_argument("--diario", default=DIARIO_PATH, help=f"Arquivo SQLite (padrão: {DIARIO_PATH}).")
+    parser.add_argument("--via", choices=["navegador", "api"], default="navegador")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-tentativas", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=5.0, help="Atraso da 1ª nova tentativa (s); dobra a cada falha.")
+    parser.add_argument("--limite-falhas", type=int, default=5, help="Falhas seguidas que abrem o disjuntor.")
+    parser.add_argument("--pausa-disjuntor", type=float, default=60.0, help="Segundos com o disjuntor aberto.")
+    parser.add_argument("--status", action="store_true", help="Só mostra o estado do lote.")
+    parser.add_argument("--refazer-esgotados", action="store_true", help="Zera as tentativas dos esgotados.")
+    args = parser.parse_args()
+
+    diario = DiarioLotes(args.diario)
+    try:
+        if args.arquivos:
+            from plano_extracao import carregar_especificacoes
+
+            novas = diario.adicionar(args.lote, carregar_especificacoes(*args.arquivos))
+            print(f"📒 {novas} trabalho(s) novo(s) no lote '{args.lote}' ({args.diario})")
+        if args.refazer_esgotados:
+            print(f"   -> {diario.refazer_esgotados(args.lote)} trabalho(s) esgotado(s) de volta à fila")
+        if args.status:
+            imprimir_status(diario, args.lote)
+            return
+
+        disjuntor = Disjuntor(args.limite_falhas, args.pausa_disjuntor)
+        inicio = time.perf_counter()
+        if args.via == "api":
+            executar_lote(diario, args.lote, executor_api(), args.workers, disjuntor,
+                          args.max_tentativas, args.backoff)
+        else:
+            from pool_navegadores import PoolNavegadores
+
+            with PoolNavegadores(args.workers) as pool:
+                executar_lote(diario, args.lote, executor_navegador(pool), args.workers, disjuntor,
+                              args.max_tentativas, args.backoff)
+        imprimir_status(diario, args.lote)
+        print(f"   -> ⏱️  {time.perf_counter() - inicio:.1f}s; disjuntor aberto {disjuntor.aberturas} vez(es)")
+    finally:
+        diario.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Extração incremental: só os períodos novos ou revisados são baixados.
+
+Um manifesto por especificação (tabela + filtros + nível + variável) guarda
+as células (período, território, categoria) já extraídas e, por período, a
+data de modificação publicada pelo SIDRA. A cada execução:
+
+1. os períodos disponíveis são lidos da página da tabela (navegador) ou do
+   endpoint `periodos` da API, que também informa a data de modificação;
+2. só os períodos ausentes do manifesto ou com data de modificação diferente
+   são selecionados e baixados;
+3. as células baixadas substituem as do mesmo período no manifesto e o
+   dataset consolidado (`<prefixo>_consolidado.csv`, layout "br.csv") é
+   regravado.
+
+Assim os bytes transferidos e o tempo de execução acompanham o tamanho da
+mudança (ex.: um ano novo), e não o tamanho da tabela.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from desafio_ibge_1209 import (
+    DOWNLOAD_DIR,
+    aplicar_filtros_tabela,
+    baixar_csv,
+    buscar_tabela,
+    iniciar_driver,
+    listar_periodos,
+    seletor_painel,
+)
+from cache_extracoes import chave_cache
+from parser_sidra import ENCODING, CabecalhoSidra, Registro, escrever_csv, ler_cabecalho, ler_registros
+from sidra_api import ESPECIFICACAO_1209, extrair_via_api, obter_periodos
+
+MANIFESTOS_DIR = Path(os.environ.get("SIDRA_MANIFESTOS_DIR", DOWNLOAD_DIR / ".manifestos"))
+
+
+def chave_manifesto(especificacao):
+    """Como `chave_especificacao`, mas sem o período: o manifesto cobre todos."""
+    return chave_cache(
+        especificacao["tabela"], especificacao["filtros"],
+        classificacao=especificacao["classificacao"], nivel=especificacao["nivel"],
+        variavel=especificacao.get("variavel"),
+    )
+
+
+def _rodape(caminho):
+    """Última linha "Fonte: ..." do CSV (o parser para antes das notas)."""
+    with open(caminho, encoding=ENCODING) as f:
+        fontes = [linha.strip() for linha in f if linha.startswith("Fonte")]
+    return fontes[-1] if fontes else None
+
+
+class ManifestoExtracao:
+    """
+    Células já extraídas de uma especificação, persistidas em JSON:
+
+        periodos: {período: {"modificacao", "extraido_em", "celulas"}}
+        celulas:  {período: {território: {categoria: valor}}}
+
+    mais o cabeçalho (títulos, dimensões, ordem das categorias) do último
+    CSV incorporado, usado para regravar o dataset consolidado.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        try:
+            dados = json.loads(self.caminho.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            dados = {}
+        self.periodos = dados.get("periodos", {})
+        self.celulas = dados.get("celulas", {})
+        self.cabecalho = dados.get("cabecalho")
+        self.territorios = dados.get("territorios", [])
+
+    @classmethod
+    def para(cls, especificacao, pasta=MANIFESTOS_DIR):
+        return cls(Path(pasta) / f"{especificacao['prefixo']}_{chave_manifesto(especificacao)[:16]}.json")
+
+    def salvar(self):
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho.with_suffix(".tmp")
+        temporario.write_text(json.dumps({
+            "periodos": self.periodos,
+            "celulas": self.celulas,
+            "cabecalho": self.cabecalho,
+            "territorios": self.territorios,
+        }, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(temporario, self.caminho)
+
+    def pendentes(self, disponiveis):
+        """
+        Períodos a baixar, dado {período: data de modificação ou None}:
+        os que faltam no manifesto e os revisados desde a última extração.
+        """
+        pendentes = []
+        for periodo, modificacao in disponiveis.items():
+            anterior = self.periodos.get(periodo)
+            if anterior is None or (modificacao and anterior.get("modificacao") != modificacao):
+                pendentes.append(periodo)
+        return sorted(pendentes)
+
+    def incorporar(self, arquivo, modificacoes):
+        """
+        Substitui no manifesto as células dos períodos presentes em `arquivo`.
+        Retorna {"novas": n, "alteradas": n, "iguais": n}.
+        """
+        cabecalho = ler_cabecalho(arquivo)
+        novas = {}
+        for r in ler_registros(arquivo):
+            novas.setdefault(r.periodo, {}).setdefault(r.territorio, {})[r.categoria] = r.valor
+            if r.territorio not in self.territorios:
+                self.territorios.append(r.territorio)
+
+        contagem = {"novas": 0, "alteradas": 0, "iguais": 0}
+        for periodo, territorios in novas.items():
+            antigas = self.celulas.get(periodo, {})
+            for territorio, categorias in territorios.items():
+                for categoria, valor in categorias.items():
+                    if categoria not in antigas.get(territorio, {}):
+                        contagem["novas"] += 1
+                    elif antigas[territorio][categoria] != valor:
+                        contagem["alteradas"] += 1
+                    else:
+                        contagem["iguais"] += 1
+            self.celulas[periodo] = territorios
+
+        agora = datetime.now().isoformat(timespec="seconds")
+        for periodo in modificacoes:
+            self.periodos[periodo] = {
+                "modificacao": modificacoes[periodo],
+                "extraido_em": agora,
+                "celulas": sum(len(c) for c in novas.get(periodo, {}).values()),
+            }
+
+        categorias = list(self.cabecalho["categorias"]) if self.cabecalho else []
+        for _, categoria in cabecalho.colunas:
+            if categoria not in categorias:
+                categorias.append(categoria)
+        self.cabecalho = {
+            "titulo": cabecalho.titulo,
+            "dimensao_linha": cabecalho.dimensao_linha,
+            "dimensoes_coluna": cabecalho.dimensoes_coluna,
+            "categorias": categorias,
+            "rodape": _rodape(arquivo) or (self.cabecalho or {}).get("rodape"),
+        }
+        return contagem
+
+    def registros(self):
+        for territorio in self.territorios:
+            for periodo in sorted(self.celulas):
+                for categoria, valor in self.celulas[periodo].get(territorio, {}).items():
+                    yield Registro(territorio, categoria, periodo, valor)
+
+    def escrever_dataset(self, caminho):
+        """Regrava o dataset consolidado (todos os períodos) no layout "br.csv"."""
+        c = self.cabecalho
+        colunas = [(p, categoria) for p in sorted(self.celulas) for categoria in c["categorias"]]
+        cabecalho = CabecalhoSidra(c["titulo"], c["dimensao_linha"], c["dimensoes_coluna"], colunas)
+        return escrever_csv(caminho, cabecalho, self.registros(), rodape=c.get("rodape"))
+
+
+# ====== PERÍODOS DISPONÍVEIS E DOWNLOAD DO DELTA ======
+
+def _modificacoes_api(tabela):
+    """Datas de modificação pela API; {} se a API não responder."""
+    try:
+        return obter_periodos(tabela)
+    except Exception as e:
+        print(f"   -> ⚠️ Datas de modificação indisponíveis ({e}); só períodos novos serão baixados.")
+        return {}
+
+
+def _delta_via_api(especificacao, manifesto, pasta_delta):
+    disponiveis = obter_periodos(especificacao["tabela"])
+    pendentes = manifesto.pendentes(disponiveis)
+    if not pendentes:
+        return disponiveis, pendentes, None
+    parcial = {**especificacao, "periodo": ",".join(pendentes), "prefixo": f"{especificacao['prefixo']}_delta"}
+    return disponiveis, pendentes, extrair_via_api(parcial, pasta_delta)
+
+
+def _delta_via_navegador(especificacao, manifesto, pasta_delta, headless):
+    driver = iniciar_driver(download_dir=pasta_delta, headless=headless)
+    try:
+        wait = WebDriverWait(driver, 30)
+        buscar_tabela(driver, wait, especificacao["tabela"])
+        modificacoes = _modificacoes_api(especificacao["tabela"])
+        disponiveis = {p: modificacoes.get(p) for p in listar_periodos(driver)}
+        print(f"   -> Períodos na página: {', '.join(disponiveis) or 'nenhum'}")
+        pendentes = manifesto.pendentes(disponiveis)
+        if not pendentes:
+            return disponiveis, pendentes, None
+        aplicar_filtros_tabela(wait, especificacao["filtros"], periodos=pendentes,
+                               escopo=seletor_painel(especificacao["classificacao"]))
+        arquivo = baixar_csv(wait, download_dir=pasta_delta, prefixo=f"{especificacao['prefixo']}_delta")
+        return disponiveis, pendentes, arquivo
+    finally:
+        driver.quit()
+
+
+def extrair_incremental(especificacao=ESPECIFICACAO_1209, download_dir=DOWNLOAD_DIR, via="api", headless=True,
+                        pasta_manifestos=MANIFESTOS_DIR):
+    """
+    Atualiza `<prefixo>_consolidado.csv` baixando só os períodos novos ou
+    revisados (`via` = "api" ou "navegador"). Retorna o caminho do dataset.
+    """
+    inicio = time.perf_counter()
+    download_dir = Path(download_dir)
+    pasta_delta = download_dir / ".incremental"
+    pasta_delta.mkdir(parents=True, exist_ok=True)
+    dataset = download_dir / f"{especificacao['prefixo']}_consolidado.csv"
+    manifesto = ManifestoExtracao.para(especificacao, pasta_manifestos)
+
+    print(f"\n🔄 Extração incremental da tabela {especificacao['tabela']} (via {via})")
+    if via == "navegador":
+        disponiveis, pendentes, arquivo = _delta_via_navegador(especificacao, manifesto, pasta_delta, headless)
+    else:
+        disponiveis, pendentes, arquivo = _delta_via_api(especificacao, manifesto, pasta_delta)
+
+    if not pendentes:
+        print(f"   -> ✅ Nada a atualizar: {len(disponiveis)} período(s) já no manifesto.")
+        if not dataset.exists() and manifesto.cabecalho:
+            manifesto.escrever_dataset(dataset)
+        return dataset
+
+    print(f"   -> Período(s) novo(s) ou revisado(s): {', '.join(pendentes)}")
+    tamanho = arquivo.stat().st_size
+    contagem = manifesto.incorporar(arquivo, {p: disponiveis.get(p) for p in pendentes})
+    manifesto.salvar()
+    manifesto.escrever_dataset(dataset)
+    arquivo.unlink()
+
+    print(f"   -> 📥 {tamanho / 1024:.1f} KB baixados: {contagem['novas']} célula(s) nova(s), "
+          f"{contagem['alteradas']} alterada(s), {contagem['iguais']} igual(is)")
+    print(f"   -> ✅ Dataset consolidado: {dataset}")
+    print(f"   -> ⏱️  {time.perf_counter() - inicio:.2f}s")
+    return dataset
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Atualiza o dataset da Tabela 1209 só com os períodos que mudaram.")
+    parser.add_argument("--navegador", action="store_true", help="Lê os períodos e baixa pela página da tabela.")
+    parser.add_argument("--com-janela", action="store_true", help="Abre o navegador com janela (com --navegador).")
+    args = parser.parse_args()
+
+    extrair_incremental(via="navegador" if args.navegador else "api", headless=not args.com_janela)
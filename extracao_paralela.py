@@ -0,0 +1,230 @@
+"""
+Execução paralela de várias extrações SIDRA.
+
+Cada worker empresta uma sessão do `PoolNavegadores`: um navegador headless
+já aquecido, com a sua própria subpasta de download (DOWNLOAD_DIR/sessao_<n>),
+de modo que a detecção do "CSV mais recente" em `baixar_csv` nunca enxerga o
+arquivo de outro worker.
+"""
+import argparse
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from desafio_ibge_1209 import (
+    DOWNLOAD_DIR,
+    FILTROS_1209,
+    aplicar_filtros_tabela,
+    baixar_csv,
+    buscar_tabela,
+    exportar_trace,
+    medir_etapa,
+    seletor_painel,
+)
+from rastreamento import novo_trace
+from cache_extracoes import CacheExtracoes
+from pool_navegadores import PoolNavegadores
+from sidra_api import chave_especificacao
+
+
+@dataclass
+class TrabalhoExtracao:
+    """Uma extração: tabela + classificação (painel) + filtros + prefixo do arquivo de saída."""
+    tabela: str
+    filtros: dict = field(default_factory=lambda: dict(FILTROS_1209))
+    prefixo: str = ""
+    classificacao: str = "58"
+
+    def __post_init__(self):
+        self.tabela = str(self.tabela)
+        self.classificacao = str(self.classificacao).lstrip("C")
+        if not self.prefixo:
+            self.prefixo = f"tabela_{self.tabela}"
+
+    def especificacao(self):
+        """
+        Forma de `sidra_api` deste trabalho (chave do cache e expectativas do
+        índice): a tabela, o painel e os filtros dele, com o nível (UF) e o
+        período (o padrão da página) que `executar_trabalho` usa.
+        """
+        return {
+            "tabela": self.tabela,
+            "classificacao": self.classificacao,
+            "filtros": self.filtros,
+            "nivel": "unidade_federacao",
+            "periodo": "last",
+            "variavel": None,
+            "prefixo": self.prefixo,
+        }
+
+
+@dataclass
+class ResultadoExtracao:
+    trabalho: TrabalhoExtracao
+    worker: int
+    duracao: float
+    arquivo: Path = None
+    erro: str = None
+
+    do_cache: bool = False
+
+    @property
+    def sucesso(self):
+        return self.erro is None
+
+
+def executar_trabalho(driver, trabalho, pasta_worker, timeout_download=60):
+    """
+    Executa busca, filtros e download de um trabalho em um driver já aberto.
+    Os spans do trabalho (um trace por trabalho) vão para TRACE_DIR/spans.jsonl.
+    """
+    wait = WebDriverWait(driver, 30)
+    trace_id = novo_trace()
+    try:
+        with medir_etapa("buscar_tabela", tabela=trabalho.tabela):
+            buscar_tabela(driver, wait, trabalho.tabela)
+        with medir_etapa("aplicar_filtros_tabela"):
+            aplicar_filtros_tabela(wait, trabalho.filtros,
+                                   escopo=seletor_painel(trabalho.classificacao))
+        with medir_etapa("baixar_csv"):
+            return baixar_csv(wait, timeout_download, download_dir=pasta_worker, prefixo=trabalho.prefixo,
+                              especificacao=trabalho.especificacao())
+    finally:
+        exportar_trace(trace_id)
+
+
+def _do_cache(cache, trabalho, pasta_base):
+    """CSV ainda fresco no cache para o trabalho, materializado em `pasta_base`; ou None."""
+    entrada, fresca = cache.consultar(chave_especificacao(trabalho.especificacao()))
+    if not fresca:
+        return None
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    return cache.copiar_para(entrada, Path(pasta_base) / f"{trabalho.prefixo}_{timestamp}.csv")
+
+
+def _worker(indice, fila, resultados, pool, cache, pasta_base):
+    """Loop de um worker: empresta uma sessão do pool por trabalho até a fila esvaziar."""
+    while True:
+        try:
+            trabalho = fila.get_nowait()
+        except queue.Empty:
+            return
+
+        inicio = time.perf_counter()
+        try:
+            arquivo = _do_cache(cache, trabalho, pasta_base) if cache is not None else None
+            if arquivo is not None:
+                resultados.append(ResultadoExtracao(trabalho, indice, time.perf_counter() - inicio,
+                                                    arquivo=arquivo, do_cache=True))
+                continue
+
+            with pool.sessao() as sessao:
+                arquivo = executar_trabalho(sessao.driver, trabalho, sessao.pasta)
+            if cache is not None:
+                cache.armazenar(chave_especificacao(trabalho.especificacao()), arquivo.read_bytes())
+            resultados.append(ResultadoExtracao(trabalho, indice, time.perf_counter() - inicio, arquivo=arquivo))
+        except Exception as e:
+            print(f"   -> ❌ [worker {indice}] Tabela {trabalho.tabela}: {e}")
+            resultados.append(ResultadoExtracao(trabalho, indice, time.perf_counter() - inicio, erro=str(e)))
+        finally:
+            fila.task_done()
+
+
+def executar_trabalhos(trabalhos, n_workers=2, headless=True, pasta_base=DOWNLOAD_DIR, pool=None, cache=None):
+    """
+    Executa uma lista de `TrabalhoExtracao` em um pool de `n_workers` navegadores.
+
+    Se `pool` for informado, as sessões quentes dele são reutilizadas (e não
+    são encerradas ao final); caso contrário um pool temporário é criado.
+    Com `cache` (CacheExtracoes), trabalhos com CSV ainda fresco não abrem
+    navegador e os novos downloads são guardados no cache.
+
+    Retorna (resultados, duracao_total_em_segundos).
+    """
+    fila = queue.Queue()
+    for trabalho in trabalhos:
+        fila.put(trabalho)
+
+    resultados = []
+    pool_proprio = pool is None
+    if pool_proprio:
+        pool = PoolNavegadores(max(1, min(n_workers, len(trabalhos))), headless=headless, pasta_base=pasta_base)
+    n_workers = max(1, min(n_workers, pool.tamanho, len(trabalhos)))
+
+    pool.iniciar()
+    inicio = time.perf_counter()
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(i, fila, resultados, pool, cache, pasta_base),
+            name=f"sidra-worker-{i}",
+            daemon=True,
+        )
+        for i in range(n_workers)
+    ]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        if pool_proprio:
+            pool.encerrar()
+
+    return resultados, time.perf_counter() - inicio
+
+
+def vazao_por_minuto(resultados, duracao):
+    """Tabelas extraídas com sucesso por minuto."""
+    ok = sum(1 for r in resultados if r.sucesso)
+    return ok / duracao * 60 if duracao > 0 else 0.0
+
+
+def imprimir_relatorio(resultados, duracao, n_workers):
+    ok = sum(1 for r in resultados if r.sucesso)
+    print("\n" + "="*60)
+    print(f"📊 {n_workers} worker(s): {ok}/{len(resultados)} tabelas em {duracao:.1f}s "
+          f"→ {vazao_por_minuto(resultados, duracao):.2f} tabelas/min")
+    print("="*60)
+    for r in resultados:
+        status = f"{'📦' if r.do_cache else '✅'} {r.arquivo.name}" if r.sucesso else f"❌ {r.erro}"
+        print(f"   [worker {r.worker}] {r.trabalho.tabela:<8} {r.duracao:6.1f}s  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extração paralela de tabelas SIDRA.")
+    parser.add_argument("--tabelas", nargs="+", default=["1209"], help="Tabelas a extrair (filtros da 1209).")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Repete a lista de tabelas N vezes.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2],
+                        help="Quantidade de workers; vários valores medem a escala da vazão.")
+    parser.add_argument("--com-janela", action="store_true", help="Abre os navegadores com janela.")
+    parser.add_argument("--max-trabalhos", type=int, default=25, help="Recicla a sessão após N trabalhos.")
+    parser.add_argument("--max-rss-mb", type=float, default=1500, help="Recicla a sessão acima deste RSS (MB).")
+    parser.add_argument("--cache", action="store_true", help="Reaproveita CSVs ainda frescos do cache de extrações.")
+    args = parser.parse_args()
+
+    trabalhos = [
+        TrabalhoExtracao(tabela, prefixo="populacao_60mais_1209" if tabela == "1209" else "")
+        for _ in range(args.repeticoes)
+        for tabela in args.tabelas
+    ]
+
+    cache = CacheExtracoes() if args.cache else None
+
+    # Um único pool quente serve a todas as rodadas; o aquecimento fica fora da medição
+    with PoolNavegadores(max(args.workers), headless=not args.com_janela,
+                         max_trabalhos=args.max_trabalhos, max_rss_mb=args.max_rss_mb) as pool:
+        for n in args.workers:
+            resultados, duracao = executar_trabalhos(trabalhos, n_workers=n, pool=pool, cache=cache)
+            imprimir_relatorio(resultados, duracao, n)
+    if cache is not None:
+        cache.imprimir_estatisticas()
+
+
+if __name__ == "__main__":
+    main()
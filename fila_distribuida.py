@@ -0,0 +1,554 @@
+"""
+Execução distribuída: fila de trabalhos em uma pasta compartilhada entre nós.
+
+Cada nó (máquina) hospeda só alguns Chromes. O coordenador enfileira as
+especificações (`plano_extracao`, o mesmo fluxo de `acessar_tabela_1209`)
+em `FILA_DIR`, uma pasta visível para todos os nós (NFS/SMB, ou local para
+testar offline). Os workers de cada nó pegam trabalhos, executam e copiam o
+CSV para `FILA_DIR/resultados/`:
+
+    pendentes/<disponível em (ms)>_<ordem>__<id>.json   aguardando (em ordem de nome)
+    em_execucao/<id>.json + <id>.lease                  reservado por um worker
+    concluidos/<id>.json                                resultado (nó, worker, duração, CSV)
+    falhos/<id>.json                                    erro permanente ou tentativas esgotadas
+    nos/<nó>.json                                       batimento e contadores de cada nó
+    resultados/<id>__<prefixo>_<timestamp>.csv          CSVs enviados pelos nós
+
+Reservar = criar `<id>.lease` com O_EXCL (só um worker consegue; o JSON é
+gravado num temporário e publicado com `os.link`, então nunca aparece pela
+metade) e mover o trabalho com `rename` (atômico na mesma pasta
+compartilhada). O arrendamento vale `DURACAO_ARRENDAMENTO` segundos e é
+renovado pelo batimento do nó a cada `intervalo` (padrão
+`INTERVALO_BATIMENTO`, publicado em `nos/<nó>.json`): o `.lease` sai do
+lugar com `rename` e volta com O_EXCL, então um nó atrasado não sobrescreve
+o arrendamento de outro.
+O mesmo batimento procura arrendamentos vencidos (nó morto, rede caída) e
+devolve esses trabalhos à fila, contando uma tentativa (até
+`--max-tentativas`). Concluir e devolver também começam por um `rename` do trabalho:
+se um worker atrasado e o recuperador disputam o mesmo trabalho, só um vence
+e o outro descarta o que fez. Os relógios dos nós devem estar sincronizados
+(NTP) com folga bem menor que a duração do arrendamento.
+
+Uso:
+    python fila_distribuida.py enfileirar especificacoes/*.json --fila /mnt/sidra/fila
+    python fila_distribuida.py trabalhar --fila /mnt/sidra/fila --workers 2          # em cada nó
+    python fila_distribuida.py trabalhar --fila /mnt/sidra/fila --via api --esperar
+    python fila_distribuida.py status --fila /mnt/sidra/fila
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from dataclasses import asdict
+from pathlib import Path
+
+from configuracao import DOWNLOAD_DIR
+from diario_lotes import Disjuntor, atraso_backoff, chave_trabalho, erro_permanente
+
+FILA_DIR = Path(os.environ.get("SIDRA_FILA_DIR", DOWNLOAD_DIR / "fila"))
+DURACAO_ARRENDAMENTO = float(os.environ.get("SIDRA_FILA_ARRENDAMENTO", 120))
+INTERVALO_BATIMENTO = DURACAO_ARRENDAMENTO / 6
+
+PASTAS = ("pendentes", "em_execucao", "concluidos", "falhos", "nos", "resultados")
+
+
+def _gravar_json(caminho, dados):
+    """Escrita atômica: arquivo temporário oculto + os.replace."""
+    temporario = caminho.with_name(f".{caminho.name}.{uuid.uuid4().hex[:8]}.tmp")
+    temporario.write_text(json.dumps(dados, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(temporario, caminho)
+
+
+def _ler_json(caminho):
+    try:
+        return json.loads(Path(caminho).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _visivel(nome):
+    return nome.endswith(".json") and not nome.startswith(".")
+
+
+# ====== FILA ======
+
+class FilaArquivos:
+    """Fila de trabalhos em uma pasta (compartilhada) com arrendamentos."""
+
+    def __init__(self, pasta=FILA_DIR, duracao_arrendamento=DURACAO_ARRENDAMENTO):
+        self.pasta = Path(pasta)
+        self.duracao_arrendamento = duracao_arrendamento
+        for nome in PASTAS:
+            (self.pasta / nome).mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, nome):
+        return self.pasta / nome
+
+    def _pendente(self, trabalho):
+        prefixo = f"{int(trabalho['disponivel_em'] * 1000):013d}_{trabalho['ordem']:06d}"
+        return self._dir("pendentes") / f"{prefixo}__{trabalho['id']}.json"
+
+    def _arrendamento(self, id_trabalho):
+        return self._dir("em_execucao") / f"{id_trabalho}.lease"
+
+    def _existe(self, id_trabalho):
+        return (any(self._dir("pendentes").glob(f"*__{id_trabalho}.json"))
+                or any((self._dir(estado) / f"{id_trabalho}.json").exists()
+                       for estado in ("em_execucao", "concluidos", "falhos")))
+
+    def enfileirar(self, especificacoes):
+        """
+        Inclui `EspecificacaoTabela`s na fila; as que já estão nela (em
+        qualquer estado) são ignoradas. Retorna quantas entraram.
+        """
+        agora, novas = time.time(), 0
+        for ordem, esp in enumerate(especificacoes):
+            id_trabalho = chave_trabalho(esp)
+            if self._existe(id_trabalho):
+                continue
+            trabalho = {"id": id_trabalho, "ordem": ordem, "especificacao": asdict(esp), "tentativas": 0,
+                        "enfileirado_em": agora, "disponivel_em": agora, "erro": None, "historico": []}
+            _gravar_json(self._pendente(trabalho), trabalho)
+            novas += 1
+        return novas
+
+    def reservar(self, no, worker):
+        """Reserva o próximo trabalho disponível; retorna o dict do trabalho ou None."""
+        agora = time.time()
+        for nome in sorted(filter(_visivel, os.listdir(self._dir("pendentes")))):
+            if int(nome[:13]) / 1000 > agora:
+                return None  # em ordem de disponibilidade: os seguintes também estão em backoff
+            id_trabalho = nome[:-5].split("__", 1)[1]
+            arrendamento = self._arrendamento(id_trabalho)
+            dados = {"no": no, "worker": worker, "expira_em": agora + self.duracao_arrendamento}
+            if not self._criar_arrendamento(arrendamento, dados):  # O_EXCL: um único vencedor
+                continue
+            try:
+                os.rename(self._dir("pendentes") / nome, self._dir("em_execucao") / f"{id_trabalho}.json")
+            except FileNotFoundError:  # já saiu da fila (arrendamento antigo foi limpo nesse meio tempo)
+                arrendamento.unlink(missing_ok=True)
+                continue
+            trabalho = _ler_json(self._dir("em_execucao") / f"{id_trabalho}.json")
+            if trabalho is not None:
+                return trabalho
+        return None
+
+    def renovar(self, id_trabalho, no, worker):
+        """
+        Estende o arrendamento de um trabalho ainda em execução; False se ele
+        foi perdido. O `.lease` é tirado do lugar com `rename` (só um processo
+        consegue) e recriado com O_EXCL: um nó atrasado nunca sobrescreve o
+        arrendamento de quem reservou o trabalho depois dele.
+        """
+        arrendamento = self._arrendamento(id_trabalho)
+        renovando = arrendamento.with_name(f".{id_trabalho}.{uuid.uuid4().hex[:8]}.renovando")
+        try:
+            os.rename(arrendamento, renovando)
+        except FileNotFoundError:
+            return False
+        dados = _ler_json(renovando)
+        if dados is None:  # ilegível: devolve o arquivo como estava em vez de perder o arrendamento
+            self._restaurar_arrendamento(renovando, arrendamento)
+            return False
+        nosso = (dados["no"] == no and dados["worker"] == worker
+                 and (self._dir("em_execucao") / f"{id_trabalho}.json").exists())
+        if nosso:
+            dados["expira_em"] = time.time() + self.duracao_arrendamento
+        recriado = self._criar_arrendamento(arrendamento, dados)
+        renovando.unlink(missing_ok=True)
+        if not (nosso and recriado):
+            return False
+        # O trabalho pode ter sido concluído/devolvido enquanto o .lease estava fora do lugar
+        if not (self._dir("em_execucao") / f"{id_trabalho}.json").exists():
+            arrendamento.unlink(missing_ok=True)
+            return False
+        return True
+
+    @staticmethod
+    def _criar_arrendamento(arrendamento, dados):
+        """
+        Grava o `.lease` só se ninguém criou outro nesse meio tempo. O JSON
+        vai inteiro para um temporário oculto e é publicado com `os.link`,
+        que falha se o destino existe (O_EXCL): quem lê um `.lease` nunca o
+        encontra pela metade.
+        """
+        temporario = arrendamento.with_name(f".{arrendamento.name}.{uuid.uuid4().hex[:8]}.tmp")
+        temporario.write_text(json.dumps(dados), encoding="utf-8")
+        try:
+            os.link(temporario, arrendamento)
+        except FileExistsError:
+            return False
+        finally:
+            temporario.unlink(missing_ok=True)
+        return True
+
+    @staticmethod
+    def _restaurar_arrendamento(renovando, arrendamento):
+        """Põe de volta um `.lease` tirado do lugar, sem sobrescrever um novo."""
+        try:
+            os.link(renovando, arrendamento)
+        except FileExistsError:
+            pass
+        renovando.unlink(missing_ok=True)
+
+    def _tomar(self, id_trabalho):
+        """Tira o trabalho de em_execucao (rename atômico). Retorna (dict, arquivo tomado) ou None."""
+        tomado = self._dir("em_execucao") / f".{id_trabalho}.{uuid.uuid4().hex[:8]}.tomado"
+        try:
+            os.rename(self._dir("em_execucao") / f"{id_trabalho}.json", tomado)
+        except FileNotFoundError:
+            return None
+        return json.loads(tomado.read_text(encoding="utf-8")), tomado
+
+    def _finalizar(self, tomado, id_trabalho, destino, trabalho):
+        _gravar_json(destino, trabalho)
+        tomado.unlink(missing_ok=True)
+        self._arrendamento(id_trabalho).unlink(missing_ok=True)
+
+    def concluir(self, id_trabalho, resultado):
+        """Registra o resultado; False se o arrendamento foi perdido (o trabalho voltou à fila)."""
+        tomado = self._tomar(id_trabalho)
+        if tomado is None:
+            return False
+        trabalho, arquivo = tomado
+        trabalho.update(resultado=resultado, erro=None)
+        self._finalizar(arquivo, id_trabalho, self._dir("concluidos") / f"{id_trabalho}.json", trabalho)
+        return True
+
+    def devolver(self, id_trabalho, erro, permanente=False, max_tentativas=5, base_backoff=5.0, contexto=None):
+        """
+        Conta uma tentativa: volta à fila com backoff, ou vai para falhos se
+        for permanente ou as tentativas acabaram. Retorna o atraso (None se
+        falhou de vez, False se o trabalho já não estava em execução).
+        """
+        tomado = self._tomar(id_trabalho)
+        if tomado is None:
+            return False
+        trabalho, arquivo = tomado
+        trabalho["tentativas"] += 1
+        trabalho["erro"] = erro
+        trabalho["historico"].append({"erro": erro, "em": time.time(), **(contexto or {})})
+        if permanente or trabalho["tentativas"] >= max_tentativas:
+            self._finalizar(arquivo, id_trabalho, self._dir("falhos") / f"{id_trabalho}.json", trabalho)
+            return None
+        atraso = atraso_backoff(trabalho["tentativas"], base_backoff)
+        trabalho["disponivel_em"] = time.time() + atraso
+        self._finalizar(arquivo, id_trabalho, self._pendente(trabalho), trabalho)
+        return atraso
+
+    def recuperar_expirados(self, max_tentativas=5):
+        """
+        Devolve à fila os trabalhos com arrendamento vencido (worker/nó
+        morto). Retorna quantos foram recuperados.
+        """
+        agora, recuperados = time.time(), 0
+        # Renovações interrompidas no meio (nó morto entre o rename e a recriação)
+        for renovando in self._dir("em_execucao").glob(".*.renovando"):
+            try:
+                parado = agora - renovando.stat().st_mtime > self.duracao_arrendamento
+            except FileNotFoundError:
+                continue
+            if parado:
+                self._restaurar_arrendamento(renovando, self._arrendamento(renovando.name[1:].split(".", 1)[0]))
+        # Temporários de escritas interrompidas (nó morto entre gravar e publicar)
+        for temporario in self._dir("em_execucao").glob(".*.tmp"):
+            try:
+                if agora - temporario.stat().st_mtime > self.duracao_arrendamento:
+                    temporario.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+        for arrendamento in self._dir("em_execucao").glob("*.lease"):
+            dados = _ler_json(arrendamento)
+            if dados is None:  # ilegível (arquivo corrompido): vence uma duração depois da última escrita
+                try:
+                    if agora - arrendamento.stat().st_mtime <= self.duracao_arrendamento:
+                        continue
+                except FileNotFoundError:
+                    continue
+                dados = {"no": "?", "worker": "?", "expira_em": 0}
+            if dados["expira_em"] > agora:
+                continue
+            id_trabalho = arrendamento.stem
+            if not (self._dir("em_execucao") / f"{id_trabalho}.json").exists():
+                arrendamento.unlink(missing_ok=True)  # sobra de uma renovação atrasada: só libera o id
+                continue
+            contexto = {"no": dados["no"], "worker": dados["worker"]}
+            if self.devolver(id_trabalho, f"arrendamento vencido ({dados['no']}/{dados['worker']})",
+                             max_tentativas=max_tentativas, base_backoff=0.0, contexto=contexto) is not False:
+                recuperados += 1
+        return recuperados
+
+    # ====== CONSULTAS ======
+
+    def contagem(self):
+        return {estado: sum(1 for nome in os.listdir(self._dir(estado)) if _visivel(nome))
+                for estado in ("pendentes", "em_execucao", "concluidos", "falhos")}
+
+    def proxima_liberacao(self):
+        nomes = sorted(filter(_visivel, os.listdir(self._dir("pendentes"))))
+        return int(nomes[0][:13]) / 1000 if nomes else None
+
+    def concluidos(self):
+        return [t for t in map(_ler_json, self._dir("concluidos").glob("*.json")) if t is not None]
+
+    def falhos(self):
+        return [t for t in map(_ler_json, self._dir("falhos").glob("*.json")) if t is not None]
+
+    def nos(self):
+        return [n for n in map(_ler_json, self._dir("nos").glob("*.json")) if n is not None]
+
+    def enviar_resultado(self, id_trabalho, arquivo):
+        """
+        Copia o CSV para resultados/<id>__<nome> (temporário + rename); retorna
+        o caminho relativo à fila. O id no nome impede que nós diferentes
+        sobrescrevam o arquivo um do outro quando os CSVs têm o mesmo nome.
+        """
+        arquivo = Path(arquivo)
+        destino = self._dir("resultados") / f"{id_trabalho}__{arquivo.name}"
+        temporario = destino.with_name(f".{destino.name}.{uuid.uuid4().hex[:8]}.tmp")
+        shutil.copyfile(arquivo, temporario)
+        os.replace(temporario, destino)
+        return str(destino.relative_to(self.pasta))
+
+
+# ====== NÓ (WORKERS + BATIMENTO) ======
+
+class No:
+    """
+    Um processo de workers em uma máquina. O batimento renova os
+    arrendamentos em uso, recupera os vencidos de qualquer nó e publica
+    os contadores em `nos/<nome>.json`.
+    """
+
+    def __init__(self, fila, nome=None, n_workers=2, intervalo=INTERVALO_BATIMENTO, max_tentativas=5):
+        self.fila = fila
+        self.nome = nome or socket.gethostname()
+        self.n_workers = n_workers
+        self.intervalo = intervalo
+        self.max_tentativas = max_tentativas  # também para os trabalhos recuperados de nós mortos
+        self.inicio = time.time()
+        self.contadores = {"concluidos": 0, "falhas": 0, "perdidos": 0, "recuperados": 0, "segundos_ocupados": 0.0}
+        self._em_uso = {}  # id do trabalho -> worker
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._batimento = None
+
+    def iniciar(self):
+        self._batimento = threading.Thread(target=self._bater, name=f"sidra-no-{self.nome}", daemon=True)
+        self._batimento.start()
+
+    def encerrar(self):
+        self._parar.set()
+        if self._batimento is not None:
+            self._batimento.join()
+        self._publicar(encerrado=True)
+
+    def _bater(self):
+        while not self._parar.wait(self.intervalo):
+            with self._lock:
+                em_uso = dict(self._em_uso)
+            for id_trabalho, worker in em_uso.items():
+                if not self.fila.renovar(id_trabalho, self.nome, worker):
+                    print(f"   -> ⚠️ [{self.nome}] arrendamento de {id_trabalho[:8]} perdido")
+            recuperados = self.fila.recuperar_expirados(self.max_tentativas)
+            if recuperados:
+                print(f"   -> ♻️ [{self.nome}] {recuperados} trabalho(s) de worker parado devolvido(s) à fila")
+                self.registrar("recuperados", recuperados)
+            self._publicar()
+
+    def _publicar(self, encerrado=False):
+        with self._lock:
+            dados = {"no": self.nome, "pid": os.getpid(), "workers": self.n_workers, "inicio": self.inicio,
+                     "batimento": time.time(), "intervalo": self.intervalo, "encerrado": encerrado, "em_execucao": sorted(self._em_uso),
+                     **self.contadores}
+        _gravar_json(self.fila.pasta / "nos" / f"{self.nome}.json", dados)
+
+    def registrar(self, contador, valor=1):
+        with self._lock:
+            self.contadores[contador] += valor
+
+    def reservar(self, worker):
+        trabalho = self.fila.reservar(self.nome, worker)
+        if trabalho is not None:
+            with self._lock:
+                self._em_uso[trabalho["id"]] = worker
+        return trabalho
+
+    def liberar(self, id_trabalho):
+        with self._lock:
+            self._em_uso.pop(id_trabalho, None)
+
+
+def executar_no(no, executar, disjuntor=None, max_tentativas=5, base_backoff=5.0, esperar=False):
+    """
+    Roda `no.n_workers` workers até a fila esvaziar (ou para sempre, com
+    `esperar`). `executar(especificacao, indice)` é o mesmo de
+    `diario_lotes` (navegador ou API) e retorna o CSV local.
+    """
+    disjuntor = disjuntor or Disjuntor()
+    parar = threading.Event()
+
+    def worker(indice):
+        nome_worker = f"w{indice}"
+        while not parar.is_set():
+            if not disjuntor.liberar(parar):
+                return
+            trabalho = no.reservar(nome_worker)
+            if trabalho is None:
+                disjuntor.neutro()
+                contagem = no.fila.contagem()
+                if not esperar and not (contagem["pendentes"] or contagem["em_execucao"]):
+                    return
+                liberacao = no.fila.proxima_liberacao()
+                parar.wait(min(max((liberacao or 0) - time.time(), 0.2), 5.0))
+                continue
+
+            id_trabalho, especificacao = trabalho["id"], trabalho["especificacao"]
+            inicio = time.time()
+            try:
+                arquivo = executar(especificacao, indice)
+                enviado = no.fila.enviar_resultado(id_trabalho, arquivo)
+            except Exception as e:
+                erro = f"{type(e).__name__}: {e}"
+                permanente = erro_permanente(e)
+                atraso = no.fila.devolver(id_trabalho, erro, permanente, max_tentativas, base_backoff,
+                                          {"no": no.nome, "worker": nome_worker})
+                if permanente:
+                    disjuntor.neutro()
+                else:
+                    disjuntor.falha()
+                no.registrar("falhas")
+                destino = {None: "falhou de vez", False: "arrendamento já perdido"}.get(
+                    atraso, f"nova tentativa em {atraso:.0f}s")
+                print(f"   -> ❌ [{no.nome}/{nome_worker}] Tabela {especificacao['tabela']}: {erro} ({destino})")
+            else:
+                fim = time.time()
+                resultado = {"no": no.nome, "worker": nome_worker, "inicio": inicio, "fim": fim,
+                             "duracao": fim - inicio, "arquivo": enviado, "tamanho": Path(arquivo).stat().st_size}
+                if no.fila.concluir(id_trabalho, resultado):
+                    disjuntor.sucesso()
+                    no.registrar("concluidos")
+                    print(f"   -> ✅ [{no.nome}/{nome_worker}] Tabela {especificacao['tabela']}: {enviado}")
+                else:
+                    no.registrar("perdidos")
+                    print(f"   -> ⚠️ [{no.nome}/{nome_worker}] {id_trabalho[:8]} foi devolvido à fila "
+                          "(arrendamento vencido): resultado descartado")
+            finally:
+                no.registrar("segundos_ocupados", time.time() - inicio)
+                no.liberar(id_trabalho)
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"sidra-fila-{i}", daemon=True)
+               for i in range(max(1, no.n_workers))]
+    no.iniciar()
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        # Trabalhos em andamento voltam à fila quando os arrendamentos vencerem
+        parar.set()
+        print(f"\n   -> ⏸️  Nó '{no.nome}' interrompido.")
+        raise
+    finally:
+        no.encerrar()
+
+
+# ====== RELATÓRIO ======
+
+def vazao_por_no(concluidos):
+    """{nó: {trabalhos, duração média, janela ativa, trabalhos/min}} a partir dos resultados."""
+    por_no = {}
+    for trabalho in concluidos:
+        r = trabalho["resultado"]
+        por_no.setdefault(r["no"], []).append(r)
+    relatorio = {}
+    for no, resultados in sorted(por_no.items()):
+        janela = max(r["fim"] for r in resultados) - min(r["inicio"] for r in resultados)
+        relatorio[no] = {
+            "trabalhos": len(resultados),
+            "duracao_media": sum(r["duracao"] for r in resultados) / len(resultados),
+            "janela": janela,
+            "por_minuto": len(resultados) / janela * 60 if janela > 0 else 0.0,
+            "bytes": sum(r.get("tamanho", 0) for r in resultados),
+        }
+    return relatorio
+
+
+def imprimir_status(fila):
+    contagem = fila.contagem()
+    print("\n" + "="*72)
+    print(f"📬 Fila {fila.pasta}: " + ", ".join(f"{n} {estado}" for estado, n in contagem.items()))
+    print("="*72)
+
+    nos = {n["no"]: n for n in fila.nos()}
+    vazao = vazao_por_no(fila.concluidos())
+    print(f"{'nó':<20} {'estado':<8} {'workers':>7} {'feitos':>7} {'falhas':>7} {'t médio (s)':>12} {'trab/min':>9}")
+    for nome in sorted(set(nos) | set(vazao)):
+        n, v = nos.get(nome, {}), vazao.get(nome, {})
+        if not n:
+            estado = "?"
+        elif n["encerrado"]:
+            estado = "fim"
+        else:  # sem batimento há 3 intervalos: processo morto ou sem acesso à pasta
+            intervalo = n.get("intervalo", INTERVALO_BATIMENTO)  # nós de versões antigas não publicam
+            estado = "ativo" if time.time() - n["batimento"] < 3 * intervalo else "parado"
+        print(f"{nome:<20} {estado:<8} {n.get('workers', '-'):>7} {v.get('trabalhos', 0):>7} "
+              f"{n.get('falhas', 0):>7} {v.get('duracao_media', 0):12.1f} {v.get('por_minuto', 0):9.1f}")
+    if vazao:
+        total = sum(v["trabalhos"] for v in vazao.values())
+        inicio = min(t["resultado"]["inicio"] for t in fila.concluidos())
+        fim = max(t["resultado"]["fim"] for t in fila.concluidos())
+        print(f"{'total':<20} {'':<8} {'':>7} {total:>7} {'':>7} {'':>12} "
+              f"{total / (fim - inicio) * 60 if fim > inicio else 0:9.1f}")
+    for trabalho in fila.falhos():
+        print(f"   ❌ {trabalho['id'][:8]} tabela {trabalho['especificacao']['tabela']}: {trabalho['erro']} "
+              f"({trabalho['tentativas']} tentativa(s))")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrações SIDRA distribuídas em uma fila de arquivos compartilhada.")
+    parser.add_argument("comando", choices=["enfileirar", "trabalhar", "status", "recuperar"])
+    parser.add_argument("arquivos", nargs="*", help="Especificações a enfileirar (.json, .yaml, .yml).")
+    parser.add_argument("--fila", default=FILA_DIR, help=f"Pasta compartilhada da fila (padrão: {FILA_DIR}).")
+    parser.add_argument("--no", default=None, help="Nome do nó (padrão: hostname).")
+    parser.add_argument("--via", choices=["navegador", "api"], default="navegador")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-tentativas", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=5.0, help="Atraso da 1ª nova tentativa (s); dobra a cada falha.")
+    parser.add_argument("--esperar", action="store_true", help="trabalhar: continua aguardando trabalhos novos.")
+    args = parser.parse_args()
+
+    fila = FilaArquivos(args.fila)
+    if args.comando == "enfileirar":
+        from plano_extracao import carregar_especificacoes
+
+        novas = fila.enfileirar(carregar_especificacoes(*args.arquivos))
+        print(f"📬 {novas} trabalho(s) novo(s) na fila {fila.pasta}")
+    elif args.comando == "recuperar":
+        print(f"♻️ {fila.recuperar_expirados(args.max_tentativas)} trabalho(s) devolvido(s) à fila")
+    elif args.comando == "trabalhar":
+        from diario_lotes import executor_api, executor_navegador
+
+        no = No(fila, args.no, args.workers, max_tentativas=args.max_tentativas)
+        inicio = time.perf_counter()
+        pasta_no = DOWNLOAD_DIR / f"no_{no.nome}"
+        if args.via == "api":
+            executar_no(no, executor_api(pasta_no), None, args.max_tentativas, args.backoff, args.esperar)
+        else:
+            from pool_navegadores import PoolNavegadores
+
+            with PoolNavegadores(args.workers, pasta_base=pasta_no) as pool:
+                executar_no(no, executor_navegador(pool), None, args.max_tentativas, args.backoff, args.esperar)
+        print(f"   -> ⏱️  Nó '{no.nome}': {no.contadores['concluidos']} trabalho(s) em "
+              f"{time.perf_counter() - inicio:.1f}s")
+    imprimir_status(fila)
+
+
+if __name__ == "__main__":
+    main()
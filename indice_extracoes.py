@@ -0,0 +1,461 @@
+"""
+Índice local (SQLite) dos CSVs baixados: hash, validação e deduplicação.
+
+Cada download registrado passa por uma única leitura em streaming que
+calcula o SHA-256 dos bytes e, ao mesmo tempo, confere a estrutura do
+"br.csv" contra o esperado para a especificação:
+
+- dimensão das linhas (ex.: "Unidade da Federação") e número de
+  territórios (27 UFs, 5 regiões, ...), sem territórios repetidos; para
+  Brasil, grandes regiões e UFs, também os nomes de cada território;
+- categorias marcadas nos filtros (ex.: "60 a 69 anos", "70 anos ou mais")
+  e número de períodos;
+- mesma quantidade de valores em todas as linhas, valores numéricos ou
+  marcadores do SIDRA (`-`, `..`, `...`, `X`).
+
+O índice (`INDICE_PATH`, padrão `dados/indice.sqlite3`) guarda por
+extração: especificação, hash, tamanho, linhas, células, impressão digital
+do esquema (títulos + dimensões + categorias, sem os períodos), se é válida
+e os problemas encontrados. Um download com os mesmos bytes de um CSV já
+indexado não é guardado de novo: o arquivo novo é apagado e o caminho do
+existente é devolvido. "Última extração válida da especificação X" é uma
+consulta indexada, sem listar a pasta.
+
+Uso:
+    python indice_extracoes.py indexar dados/populacao_60mais_1209_*.csv --remover-duplicadas
+    python indice_extracoes.py validar dados/populacao_60mais_1209_20251121_1836.csv
+    python indice_extracoes.py ultima
+    python indice_extracoes.py status
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from configuracao import DOWNLOAD_DIR
+from parser_sidra import SEM_VALOR, _ler_cabecalho, _linhas_de_dados, converter_valor
+
+INDICE_PATH = Path(os.environ.get("SIDRA_INDICE", DOWNLOAD_DIR / "indice.sqlite3"))
+
+MAX_PROBLEMAS = 10  # problemas guardados por arquivo (o total é sempre contado)
+
+# Nomes dos territórios por nível, como aparecem na 1ª coluna do "br.csv"
+# (municípios: só a contagem é conferida)
+TERRITORIOS_POR_NIVEL = {
+    "brasil": frozenset({"Brasil"}),
+    "grande_regiao": frozenset({"Norte", "Nordeste", "Sudeste", "Sul", "Centro-Oeste"}),
+    "unidade_federacao": frozenset({
+        "Rondônia", "Acre", "Amazonas", "Roraima", "Pará", "Amapá", "Tocantins",
+        "Maranhão", "Piauí", "Ceará", "Rio Grande do Norte", "Paraíba", "Pernambuco", "Alagoas",
+        "Sergipe", "Bahia", "Minas Gerais", "Espírito Santo", "Rio de Janeiro", "São Paulo",
+        "Paraná", "Santa Catarina", "Rio Grande do Sul", "Mato Grosso do Sul", "Mato Grosso",
+        "Goiás", "Distrito Federal",
+    }),
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS extracoes (
+    id INTEGER PRIMARY KEY,
+    chave TEXT NOT NULL,
+    especificacao TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    caminho TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    linhas INTEGER NOT NULL,
+    celulas INTEGER NOT NULL,
+    esquema TEXT,
+    valida INTEGER NOT NULL,
+    problemas TEXT NOT NULL,
+    obtido_em REAL NOT NULL,
+    visto_em REAL NOT NULL,
+    downloads INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (chave, hash)
+);
+CREATE INDEX IF NOT EXISTS extracoes_ultima ON extracoes (chave, valida, visto_em);
+CREATE INDEX IF NOT EXISTS extracoes_hash ON extracoes (hash);
+CREATE INDEX IF NOT EXISTS extracoes_caminho ON extracoes (caminho);
+"""
+
+
+@dataclass
+class Esperado:
+    """Estrutura esperada de um CSV; None = não conferir."""
+    dimensao_linha: Optional[str] = None
+    territorios: Optional[int] = None
+    nomes_territorios: Optional[frozenset] = None
+    categorias: Optional[tuple] = None
+    periodos: Optional[int] = None
+
+
+@dataclass
+class Analise:
+    """Resultado da leitura de um CSV: identidade do conteúdo e validação."""
+    hash: str
+    tamanho: int
+    linhas: int
+    celulas: int
+    esquema: Optional[str]
+    problemas: list = field(default_factory=list)
+
+    @property
+    def valida(self):
+        return not self.problemas
+
+
+@dataclass
+class Extracao:
+    """Uma linha do índice."""
+    caminho: Path
+    hash: str
+    tamanho: int
+    linhas: int
+    celulas: int
+    esquema: Optional[str]
+    valida: bool
+    problemas: list
+    obtido_em: float
+    visto_em: float
+    downloads: int
+    duplicada: bool = False  # o download registrado agora tinha os mesmos bytes de um CSV já indexado
+
+
+# ====== ESPECIFICAÇÕES ======
+
+def descrever(especificacao):
+    """
+    (chave, dict) de uma especificação: dict de `sidra_api` (ex.:
+    ESPECIFICACAO_1209) ou `plano_extracao.EspecificacaoTabela`. A chave é a
+    mesma do cache de extrações, então navegador e API caem na mesma entrada.
+    """
+    from sidra_api import chave_especificacao
+
+    if not isinstance(especificacao, dict):
+        try:
+            especificacao = especificacao.para_api()
+        except ValueError:  # várias classificações: sem equivalente na API
+            dados = {k: v for k, v in asdict(especificacao).items() if k not in ("busca", "saida")}
+            canonica = json.dumps(dados, sort_keys=True, ensure_ascii=False)
+            return hashlib.sha256(canonica.encode("utf-8")).hexdigest(), dados
+    return chave_especificacao(especificacao), especificacao
+
+
+def _contar_periodos(periodo):
+    """"last"/"first" -> 1, "last 3" -> 3, "2010,2022" -> 2; "all" e intervalos -> None."""
+    partes = str(periodo).split()
+    if partes and partes[0] in ("last", "first"):
+        return int(partes[1]) if len(partes) > 1 else 1
+    if periodo == "all" or "-" in str(periodo):
+        return None
+    return len(str(periodo).split(","))
+
+
+def esperado_para(especificacao):
+    """Estrutura esperada do CSV de uma especificação (como em `descrever`)."""
+    from consulta_particionada import BLOCOS_TERRITORIAIS
+    from sidra_api import ROTULOS_NIVEIS
+
+    _, dados = descrever(especificacao)
+    nivel = dados.get("nivel", dados.get("territorio"))
+    marcadas = tuple(opcao for opcao, marcar in dados.get("filtros", {}).items() if marcar)
+    periodos = dados.get("periodo") or ",".join(dados.get("periodos") or ()) or "last"
+    return Esperado(
+        dimensao_linha=ROTULOS_NIVEIS.get(nivel),
+        territorios=sum(n for _, n in BLOCOS_TERRITORIAIS[nivel]) if nivel in BLOCOS_TERRITORIAIS else None,
+        nomes_territorios=TERRITORIOS_POR_NIVEL.get(nivel),
+        categorias=marcadas or None,
+        periodos=_contar_periodos(periodos),
+    )
+
+
+# ====== ANÁLISE EM STREAMING ======
+
+def _linhas_com_hash(arquivo, sha):
+    """Linhas de texto do arquivo binário, atualizando `sha` com os bytes lidos."""
+    primeira = True
+    for bruta in arquivo:
+        sha.update(bruta)
+        texto = bruta.decode("utf-8", errors="replace")
+        if primeira:
+            texto, primeira = texto.lstrip("\ufeff"), False
+        yield texto
+
+
+def impressao_esquema(cabecalho):
+    """Hash curto de títulos, dimensões e categorias (os períodos ficam de fora)."""
+    categorias = list(dict.fromkeys(c for _, c in cabecalho.colunas))
+    canonica = json.dumps([cabecalho.titulo, cabecalho.dimensao_linha, cabecalho.dimensoes_coluna, categorias],
+                          ensure_ascii=False)
+    return hashlib.sha256(canonica.encode("utf-8")).hexdigest()[:16]
+
+
+def analisar_csv(caminho, esperado=None):
+    """
+    Lê o CSV uma vez: hash SHA-256, contagens e conferência da estrutura
+    contra `esperado` (Esperado). Problemas não interrompem a leitura.
+    """
+    esperado = esperado or Esperado()
+    sha = hashlib.sha256()
+    problemas, total_problemas = [], 0
+    linhas = celulas = 0
+    esquema = None
+
+    def anotar(mensagem):
+        nonlocal total_problemas
+        total_problemas += 1
+        if len(problemas) < MAX_PROBLEMAS:
+            problemas.append(mensagem)
+
+    with open(caminho, "rb") as f:
+        texto = _linhas_com_hash(f, sha)
+        leitor = csv.reader(texto, delimiter=";")
+        try:
+            cabecalho = _ler_cabecalho(leitor)
+        except (ValueError, StopIteration, csv.Error):
+            anotar("cabeçalho do SIDRA não encontrado (arquivo vazio, truncado ou em outro formato)")
+        else:
+            esquema = impressao_esquema(cabecalho)
+            n_colunas = len(cabecalho.colunas)
+            if esperado.dimensao_linha and cabecalho.dimensao_linha != esperado.dimensao_linha:
+                anotar(f"linhas por '{cabecalho.dimensao_linha}' (esperado '{esperado.dimensao_linha}')")
+            categorias = {c for _, c in cabecalho.colunas}
+            if esperado.categorias is not None:
+                faltando = [c for c in esperado.categorias if c not in categorias]
+                sobrando = sorted(categorias - set(esperado.categorias))
+                if faltando:
+                    anotar(f"categorias ausentes: {', '.join(faltando)}")
+                if sobrando:
+                    anotar(f"categorias não pedidas: {', '.join(sobrando)}")
+            periodos = {p for p, _ in cabecalho.colunas}
+            if esperado.periodos is not None and len(periodos) != esperado.periodos:
+                anotar(f"{len(periodos)} período(s) (esperado {esperado.periodos})")
+
+            territorios = set()
+            try:
+                for numero, linha in enumerate(_linhas_de_dados(leitor), start=1):
+                    territorio = linha[0].strip()
+                    if territorio in territorios:
+                        anotar(f"território repetido: {territorio}")
+                    elif esperado.nomes_territorios is not None and territorio not in esperado.nomes_territorios:
+                        anotar(f"território desconhecido: {territorio}")
+                    territorios.add(territorio)
+                    valores = linha[1:]
+                    if len(valores) != n_colunas:
+                        anotar(f"linha {numero} ({territorio}) com {len(valores)} valor(es), esperado {n_colunas}")
+                    for valor in valores:
+                        if converter_valor(valor) is None and valor.strip() not in SEM_VALOR:
+                            anotar(f"valor não numérico em {territorio}: {valor!r}")
+                    linhas += 1
+                    celulas += len(valores)
+            except csv.Error as e:
+                anotar(f"CSV malformado após a linha {linhas}: {e}")
+            if not linhas:
+                anotar("nenhuma linha de dados")
+            elif esperado.territorios is not None and linhas != esperado.territorios:
+                anotar(f"{linhas} território(s) (esperado {esperado.territorios})")
+            if linhas and esperado.nomes_territorios is not None:
+                ausentes = sorted(esperado.nomes_territorios - territorios)
+                if ausentes:
+                    anotar(f"territórios ausentes: {', '.join(ausentes)}")
+        for _ in texto:  # notas de rodapé (ou o resto de um arquivo malformado): só entram no hash
+            pass
+
+    if total_problemas > len(problemas):
+        problemas.append(f"... e mais {total_problemas - len(problemas)} problema(s)")
+    return Analise(sha.hexdigest(), Path(caminho).stat().st_size, linhas, celulas, esquema, problemas)
+
+
+# ====== ÍNDICE ======
+
+class IndiceExtracoes:
+    """Extrações baixadas (hash, validação, caminho) em um arquivo SQLite."""
+
+    def __init__(self, caminho=INDICE_PATH):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # isolation_level=None: cada comando é confirmado na hora (autocommit)
+        self._conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(ESQUEMA)
+
+    def fechar(self):
+        self._conexao.close()
+
+    def _executar(self, sql, parametros=()):
+        with self._lock:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    @staticmethod
+    def _extracao(linha, duplicada=False):
+        return Extracao(Path(linha["caminho"]), linha["hash"], linha["tamanho"], linha["linhas"], linha["celulas"],
+                        linha["esquema"], bool(linha["valida"]), json.loads(linha["problemas"]),
+                        linha["obtido_em"], linha["visto_em"], linha["downloads"], duplicada)
+
+    def registrar(self, arquivo, especificacao, destino=None, remover_duplicada=True, esperado=None):
+        """
+        Valida e indexa um CSV baixado para `especificacao`.
+
+        Se os mesmos bytes já estão indexados (e o arquivo ainda existe), o
+        download não é guardado: com `remover_duplicada` ele é apagado e a
+        extração devolvida aponta para o CSV existente. Senão o arquivo é
+        movido para `destino` (se informado). Retorna `Extracao`.
+        """
+        arquivo = Path(arquivo).resolve()
+        chave, dados = descrever(especificacao)
+        analise = analisar_csv(arquivo, esperado or esperado_para(especificacao))
+        agora = time.time()
+
+        with self._lock:
+            ja_indexado = self._conexao.execute(
+                "SELECT * FROM extracoes WHERE chave = ? AND hash = ? AND caminho = ?",
+                (chave, analise.hash, str(arquivo))).fetchall()
+            if ja_indexado:  # o mesmo arquivo registrado de novo (ex.: indexar duas vezes)
+                return self._extracao(ja_indexado[0])
+
+            existente = None
+            for linha in self._conexao.execute(
+                    "SELECT caminho FROM extracoes WHERE hash = ? ORDER BY chave = ? DESC, visto_em DESC",
+                    (analise.hash, chave)):
+                if Path(linha["caminho"]) != arquivo and Path(linha["caminho"]).exists():
+                    existente = Path(linha["caminho"])
+                    break
+
+            if existente is not None:
+                if remover_duplicada:
+                    arquivo.unlink(missing_ok=True)
+                caminho = existente
+            else:
+                caminho = arquivo
+                if destino is not None:
+                    caminho = Path(destino).resolve()
+                    os.replace(arquivo, caminho)
+                # O nome pode ter sido reaproveitado (mesmo minuto): entradas antigas do caminho não valem mais
+                self._conexao.execute("DELETE FROM extracoes WHERE caminho = ? AND hash != ?",
+                                      (str(caminho), analise.hash))
+
+            linha, = self._conexao.execute(
+                "INSERT INTO extracoes (chave, especificacao, hash, caminho, tamanho, linhas, celulas, esquema, "
+                "valida, problemas, obtido_em, visto_em) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (chave, hash) DO UPDATE SET caminho = excluded.caminho, visto_em = excluded.visto_em, "
+                "downloads = downloads + 1 RETURNING *",
+                (chave, json.dumps(dados, ensure_ascii=False, sort_keys=True), analise.hash, str(caminho),
+                 analise.tamanho, analise.linhas, analise.celulas, analise.esquema, int(analise.valida),
+                 json.dumps(analise.problemas, ensure_ascii=False), agora, agora)).fetchall()
+        return self._extracao(linha, duplicada=existente is not None)
+
+    def ultima_valida(self, especificacao):
+        """Extração válida mais recente da especificação cujo CSV ainda existe; ou None."""
+        chave, _ = descrever(especificacao)
+        for linha in self._executar("SELECT * FROM extracoes WHERE chave = ? AND valida = 1 ORDER BY visto_em DESC",
+                                    (chave,)):
+            if Path(linha["caminho"]).exists():
+                return self._extracao(linha)
+        return None
+
+    def historico(self, especificacao):
+        """Todas as extrações da especificação, da mais recente para a mais antiga."""
+        chave, _ = descrever(especificacao)
+        return [self._extracao(linha) for linha in
+                self._executar("SELECT * FROM extracoes WHERE chave = ? ORDER BY visto_em DESC", (chave,))]
+
+    def resumo(self):
+        """Totais do índice: extrações, inválidas, downloads evitados e bytes economizados."""
+        linha, = self._executar(
+            "SELECT COUNT(*) AS extracoes, COALESCE(SUM(valida = 0), 0) AS invalidas, "
+            "COALESCE(SUM(downloads - 1), 0) AS duplicados, COALESCE(SUM((downloads - 1) * tamanho), 0) AS economizado, "
+            "COUNT(DISTINCT chave) AS especificacoes FROM extracoes")
+        return dict(linha)
+
+
+_indices = {}
+_lock_indices = threading.Lock()
+
+
+def abrir_indice(caminho=INDICE_PATH):
+    """Índice compartilhado do processo (uma conexão por arquivo, usada por todas as threads)."""
+    caminho = Path(caminho).resolve()
+    with _lock_indices:
+        if caminho not in _indices:
+            _indices[caminho] = IndiceExtracoes(caminho)
+        return _indices[caminho]
+
+
+def registrar_download(arquivo, especificacao, destino=None):
+    """Registra um download no índice padrão e imprime o resultado. Retorna `Extracao`."""
+    extracao = abrir_indice().registrar(arquivo, especificacao, destino=destino)
+    if extracao.duplicada:
+        print(f"   -> ♻️ Conteúdo idêntico a {extracao.caminho.name} (já baixado {extracao.downloads}x): "
+              "download descartado.")
+    if not extracao.valida:
+        print(f"   -> ⚠️ CSV incompleto ou fora do esperado: {'; '.join(extracao.problemas)}")
+    return extracao
+
+
+# ====== CLI ======
+
+def imprimir_extracao(extracao):
+    situacao = "✅ válida" if extracao.valida else "⚠️ inválida"
+    print(f"   {extracao.caminho}")
+    print(f"      {situacao} | {extracao.linhas} linha(s), {extracao.celulas} célula(s), {extracao.tamanho} bytes | "
+          f"sha256 {extracao.hash[:12]} | esquema {extracao.esquema} | {extracao.downloads} download(s)")
+    for problema in extracao.problemas:
+        print(f"      - {problema}")
+
+
+def main():
+    from sidra_api import ESPECIFICACAO_1209
+
+    parser = argparse.ArgumentParser(description="Índice de extrações: validação, deduplicação e consultas.")
+    parser.add_argument("comando", choices=["indexar", "validar", "ultima", "status"])
+    parser.add_argument("arquivos", nargs="*", help="CSVs (indexar / validar).")
+    parser.add_argument("--especificacao", default=None,
+                        help="Especificação JSON no formato de sidra_api (padrão: Tabela 1209).")
+    parser.add_argument("--remover-duplicadas", action="store_true",
+                        help="indexar: apaga os CSVs com os mesmos bytes de um já indexado.")
+    parser.add_argument("--indice", default=INDICE_PATH, help=f"Arquivo do índice (padrão: {INDICE_PATH}).")
+    args = parser.parse_args()
+
+    especificacao = (json.loads(Path(args.especificacao).read_text(encoding="utf-8"))
+                     if args.especificacao else ESPECIFICACAO_1209)
+
+    if args.comando == "validar":
+        esperado = esperado_para(especificacao)
+        for arquivo in args.arquivos:
+            analise = analisar_csv(arquivo, esperado)
+            print(f"{'✅' if analise.valida else '⚠️'} {arquivo}: {analise.linhas} linha(s), "
+                  f"{analise.celulas} célula(s), sha256 {analise.hash[:12]}")
+            for problema in analise.problemas:
+                print(f"   - {problema}")
+        return
+
+    indice = IndiceExtracoes(args.indice)
+    if args.comando == "indexar":
+        inicio = time.perf_counter()
+        for arquivo in sorted(args.arquivos, key=os.path.getmtime):
+            extracao = indice.registrar(arquivo, especificacao, remover_duplicada=args.remover_duplicadas)
+            marca = "♻️" if extracao.duplicada else ("✅" if extracao.valida else "⚠️")
+            print(f"{marca} {arquivo}" + (f" = {extracao.caminho.name}" if extracao.duplicada else ""))
+        print(f"\n⏱️ {len(args.arquivos)} arquivo(s) em {time.perf_counter() - inicio:.2f}s")
+    elif args.comando == "ultima":
+        extracao = indice.ultima_valida(especificacao)
+        if extracao is None:
+            print("Nenhuma extração válida indexada para a especificação.")
+        else:
+            imprimir_extracao(extracao)
+
+    r = indice.resumo()
+    print(f"\n📇 Índice: {r['extracoes']} extração(ões) de {r['especificacoes']} especificação(ões), "
+          f"{r['invalidas']} inválida(s), {r['duplicados']} download(s) duplicado(s) evitado(s) "
+          f"({r['economizado'] / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
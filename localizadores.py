@@ -0,0 +1,240 @@
+"""
+Registro central dos elementos da interface do SIDRA usados pelo script.
+
+Cada elemento é declarado uma vez em `REGISTRO`, com uma estratégia
+principal e alternativas (tentadas em ordem) e, quando faz sentido, o
+container dentro do qual deve ser procurado (`dentro_de`). Assim a busca
+parte de um elemento já encontrado em vez da raiz do documento. As opções
+sidra-toggle são sempre procuradas dentro de um painel (`painel`, pelo
+seletor CSS passado em `escopo`), nunca no documento inteiro. Estratégias
+marcadas com `UNICA` (nome parcial) só valem se acharem um único elemento,
+a mesma regra de `SCRIPT_ESTADO_FILTROS`.
+
+`CacheLocalizadores` (um por driver, via `localizadores(driver)`) guarda os
+WebElements já resolvidos. Um handle em cache é usado sem nova consulta; se
+o navegador responder StaleElementReferenceException (ex.: a lista
+virtualizada foi re-renderizada), só aquele elemento e, se preciso, o seu
+container são resolvidos de novo. Navegar para outra página invalida tudo.
+
+As estatísticas (consultas, acertos, resoluções, fallbacks, handles
+obsoletos e o tempo estimado economizado) são impressas ao final da
+execução por `imprimir_estatisticas`; sessões reaproveitadas do pool
+zeram cache e estatísticas a cada trabalho (`reiniciar`).
+"""
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
+
+
+def literal_xpath(texto):
+    """Literal XPath 1.0 para qualquer texto (inclusive com aspas simples e duplas)."""
+    if "'" not in texto:
+        return f"'{texto}'"
+    if '"' not in texto:
+        return f'"{texto}"'
+    partes = texto.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{p}'" for p in partes) + ")"
+
+
+# Terceiro item de uma estratégia: só vale se encontrar exatamente um elemento
+UNICA = "unica"
+
+
+@dataclass(frozen=True)
+class Localizador:
+    """Estratégias ((By, valor[, UNICA]), ...) em ordem de preferência e o container opcional."""
+    estrategias: tuple
+    dentro_de: Optional[str] = None
+
+    def formatar(self, por, valor, parametros):
+        """Preenche `{texto}` etc.: literais XPath (aspas já escapadas) ou, em CSS, o valor como está."""
+        if not parametros:
+            return valor
+        if por == By.XPATH:
+            return valor.format(**{k: literal_xpath(str(v)) for k, v in parametros.items()})
+        return valor.format(**{k: str(v) for k, v in parametros.items()})
+
+
+# Item (linha) mais próximo que contém o nome da opção
+_ITEM_OPCAO = "./ancestor::div[contains(@class, 'item-lista') or contains(@class, 'item-arvore')][1]"
+
+REGISTRO = {
+    # Página inicial / busca
+    "lupa": Localizador(((By.CSS_SELECTOR, "li.lupa-li a"), (By.XPATH, "//li[contains(@class, 'lupa')]//a"))),
+    "pesquisa": Localizador(((By.ID, "sidra-pesquisa-lg"),)),
+    "pesquisa_campo": Localizador(((By.CSS_SELECTOR, "input[type='text']"), (By.TAG_NAME, "input")), "pesquisa"),
+    "pesquisa_botao": Localizador(((By.CSS_SELECTOR, "button"),), "pesquisa"),
+
+    # Opções sidra-toggle (listas de classificação e de período), por texto,
+    # dentro do painel `escopo` (ex.: "#panel-C58")
+    "painel": Localizador(((By.CSS_SELECTOR, "{escopo}"),)),
+    "opcao_nome": Localizador((
+        (By.XPATH, ".//span[contains(concat(' ', normalize-space(@class), ' '), ' nome ')][normalize-space(.)={texto}]"),
+        (By.XPATH, ".//span[@class='nome' or contains(@class, 'nome linhaAfastado')][contains(text(), {texto})]", UNICA),
+    ), "painel"),
+    "opcao_item": Localizador(((By.XPATH, _ITEM_OPCAO),), "opcao_nome"),
+    "opcao_botao": Localizador(((By.CSS_SELECTOR, "button.sidra-toggle"),), "opcao_item"),
+    "lista_virtual": Localizador(((By.CSS_SELECTOR, "div.lv-container"),), "painel"),
+
+    # Árvore territorial
+    "arvore_uf": Localizador((
+        (By.ID, "arvore-435e-1"),
+        (By.XPATH, "//li[./div[contains(@class, 'item-arvore')]/span[starts-with(normalize-space(.), 'Unidade da Federação')]]"),
+    )),
+    "arvore_uf_expandir": Localizador(((By.CSS_SELECTOR, "i.expande"),), "arvore_uf"),
+    "arvore_uf_botao": Localizador(((By.CSS_SELECTOR, ":scope > div.item-arvore button.sidra-toggle"),
+                                    (By.CSS_SELECTOR, "button.sidra-toggle")), "arvore_uf"),
+    "arvore_grande_regiao": Localizador((
+        (By.XPATH, ".//li[@id='arvore-715e-1']"),
+        (By.XPATH, ".//li[.//span[contains(text(), 'Em Grande Região')]]"),
+    ), "arvore_uf"),
+    "arvore_grande_regiao_nome": Localizador((
+        (By.XPATH, ".//span[@class='nome' and contains(text(), 'Em Grande Região')]"),
+    ), "arvore_grande_regiao"),
+    "arvore_grande_regiao_item": Localizador(((By.XPATH, _ITEM_OPCAO),), "arvore_grande_regiao_nome"),
+    "arvore_grande_regiao_botao": Localizador(((By.CSS_SELECTOR, "button.sidra-toggle"),), "arvore_grande_regiao_item"),
+    # Qualquer nível da árvore, pelo rótulo (ex.: "Grande Região")
+    "arvore_nivel": Localizador((
+        (By.XPATH, "//li[./div[contains(@class, 'item-arvore')]/span[starts-with(normalize-space(.), {texto})]]"),
+    )),
+    "arvore_nivel_botao": Localizador(((By.CSS_SELECTOR, ":scope > div.item-arvore button.sidra-toggle"),),
+                                      "arvore_nivel"),
+
+    # Download
+    "botao_downloads": Localizador(((By.ID, "botao-downloads"),)),
+    "modal_downloads": Localizador(((By.ID, "modal-downloads"),)),
+    "select_formato": Localizador(((By.CSS_SELECTOR, "select.select-formato-arquivo"), (By.TAG_NAME, "select")),
+                                  "modal_downloads"),
+    "botao_baixar": Localizador(((By.CSS_SELECTOR, "a.btn-green-sucess"), (By.XPATH, ".//a[contains(., 'Download')]")),
+                                "modal_downloads"),
+}
+
+
+class CacheLocalizadores:
+    """WebElements resolvidos de um driver, indexados por (nome, parâmetros)."""
+
+    def __init__(self, driver, registro=REGISTRO):
+        self.driver = driver
+        self.registro = registro
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Esquece os handles e zera as estatísticas (um trabalho novo na mesma sessão)."""
+        self._elementos = {}
+        self.estatisticas = {"consultas": 0, "acertos": 0, "resolucoes": 0, "fallbacks": 0,
+                             "obsoletos": 0, "tempo_resolucao": 0.0}
+
+    @staticmethod
+    def _chave(nome, parametros):
+        return nome, tuple(sorted(parametros.items()))
+
+    def _procurar(self, nome, localizador, parametros):
+        raiz = self.obter(localizador.dentro_de, **parametros) if localizador.dentro_de else self.driver
+        inicio = time.perf_counter()
+        try:
+            for i, (por, valor, *opcoes) in enumerate(localizador.estrategias):
+                seletor = localizador.formatar(por, valor, parametros)
+                if UNICA in opcoes:
+                    encontrados = raiz.find_elements(por, seletor)
+                    if len(encontrados) != 1:  # nenhum ou ambíguo
+                        continue
+                    elemento = encontrados[0]
+                else:
+                    try:
+                        elemento = raiz.find_element(por, seletor)
+                    except NoSuchElementException:
+                        continue
+                if i:
+                    self.estatisticas["fallbacks"] += 1
+                return elemento
+        finally:
+            self.estatisticas["resolucoes"] += 1
+            self.estatisticas["tempo_resolucao"] += time.perf_counter() - inicio
+        raise NoSuchElementException(f"Elemento '{nome}' {parametros or ''} não encontrado por nenhuma estratégia.")
+
+    def _resolver(self, nome, parametros):
+        localizador = self.registro[nome]
+        try:
+            return self._procurar(nome, localizador, parametros)
+        except StaleElementReferenceException:
+            if not localizador.dentro_de:
+                raise
+            # O container em cache saiu do DOM: resolve o container de novo
+            self.estatisticas["obsoletos"] += 1
+            self.invalidar(localizador.dentro_de, **parametros)
+            return self._procurar(nome, localizador, parametros)
+
+    def obter(self, nome, **parametros):
+        """WebElement do cache ou resolvido agora (NoSuchElementException se não existir)."""
+        self.estatisticas["consultas"] += 1
+        chave = self._chave(nome, parametros)
+        elemento = self._elementos.get(chave)
+        if elemento is not None:
+            self.estatisticas["acertos"] += 1
+            return elemento
+        elemento = self._resolver(nome, parametros)
+        self._elementos[chave] = elemento
+        return elemento
+
+    def usar(self, nome, acao, **parametros):
+        """
+        Executa `acao(elemento)`; se o handle em cache estiver obsoleto,
+        resolve o elemento de novo e repete uma vez.
+        """
+        try:
+            return acao(self.obter(nome, **parametros))
+        except StaleElementReferenceException:
+            self.estatisticas["obsoletos"] += 1
+            self.invalidar(nome, **parametros)
+            return acao(self.obter(nome, **parametros))
+
+    def esperar(self, wait, nome, **parametros):
+        """Como `obter`, mas espera (WebDriverWait) o elemento existir."""
+        def condicao(_driver):
+            try:
+                return self.obter(nome, **parametros)
+            except (NoSuchElementException, StaleElementReferenceException):
+                self.invalidar(nome, **parametros)
+                return False
+        return wait.until(condicao)
+
+    def invalidar(self, nome=None, **parametros):
+        """Descarta um handle (e os que dependem dele) ou, sem `nome`, todos."""
+        if nome is None:
+            self._elementos.clear()
+            return
+        dependentes = {nome}
+        mudou = True
+        while mudou:
+            mudou = False
+            for outro, localizador in self.registro.items():
+                if localizador.dentro_de in dependentes and outro not in dependentes:
+                    dependentes.add(outro)
+                    mudou = True
+        _, valores = self._chave(nome, parametros)
+        for chave in [c for c in self._elementos if c[0] in dependentes and c[1] == valores]:
+            del self._elementos[chave]
+
+    @property
+    def tempo_economizado(self):
+        """Estimativa: acertos x tempo médio de uma resolução."""
+        e = self.estatisticas
+        return e["acertos"] * e["tempo_resolucao"] / e["resolucoes"] if e["resolucoes"] else 0.0
+
+    def imprimir_estatisticas(self):
+        e = self.estatisticas
+        print(f"🔎 Localizadores: {e['consultas']} consulta(s), {e['acertos']} do cache, "
+              f"{e['resolucoes']} resolução(ões) ({e['fallbacks']} por fallback), {e['obsoletos']} obsoleto(s) — "
+              f"~{self.tempo_economizado:.2f}s economizados")
+
+
+def localizadores(driver):
+    """Cache de localizadores do driver (criado na primeira chamada)."""
+    cache = getattr(driver, "_localizadores", None)
+    if cache is None:
+        cache = CacheLocalizadores(driver)
+        driver._localizadores = cache
+    return cache
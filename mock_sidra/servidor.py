@@ -0,0 +1,314 @@
+"""
+Servidor local que imita os endpoints do SIDRA usados pelo projeto.
+
+Uso (a partir da raiz do repositório):
+    python -m mock_sidra.servidor --porta 8765
+
+    export SIDRA_API_URL=http://127.0.0.1:8765
+    export SIDRA_API_METADADOS_URL=http://127.0.0.1:8765/api/v3/agregados
+
+As respostas da API ficam em `mock_sidra/api/`, uma por caminho de URL
+(veja `caminho_resposta`). As que acompanham o repositório são sintéticas:
+formato da apisidra, valores fictícios. Podem ser trocadas por respostas
+reais com `python sidra_api.py --gravar`. Respostas JSON são enviadas com gzip
+quando o cliente aceita e com ETag / Last-Modified; `If-None-Match` igual
+ao ETag atual recebe 304.
+
+Além da API, o servidor serve um mock das páginas usadas pelo script
+(`mock_sidra/site/`), para rodar o fluxo Selenium sem o site real:
+
+    /                 página inicial (li.lupa-li, #sidra-pesquisa-lg)
+    /pesquisa?q=1209  lista de resultados com o link da tabela
+    /tabela/1209      #panel-C<classificação> (C58), #panel-P, árvore arvore-435e-1/arvore-715e-1,
+                      #botao-downloads / #modal-downloads
+    /geratabela?...   CSV "br.csv" (anexo) montado das respostas em mock_sidra/api/
+                      por `montar_csv_br` (independente de `sidra_api`)
+
+    export SIDRA_BASE_URL=http://127.0.0.1:8765/
+
+Com `--limite N` o servidor imita o throttling do SIDRA: no máximo N
+requisições por segundo (balde de fichas com rajada de N); o excedente
+recebe 429 com Retry-After. `--latencia` e `--jitter` (segundos) atrasam
+cada resposta em latencia ± jitter.
+"""
+import argparse
+import csv
+import email.utils
+import gzip
+import hashlib
+import html
+import io
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+PASTA = Path(__file__).resolve().parent
+PASTA_API = PASTA / "api"
+PASTA_SITE = PASTA / "site"
+
+
+def caminho_resposta(pasta, caminho_url):
+    """Arquivo que guarda a resposta gravada para um caminho de URL."""
+    nome = unquote(caminho_url).strip("/").replace("/", "__")
+    return Path(pasta) / f"{nome}.json"
+
+
+# ====== DADOS GRAVADOS (USADOS PELO SITE) ======
+
+def _ler_gravado(pasta, caminho_url):
+    arquivo = caminho_resposta(pasta, caminho_url)
+    return json.loads(arquivo.read_text(encoding="utf-8")) if arquivo.exists() else None
+
+
+def metadados_gravados(pasta, tabela):
+    return _ler_gravado(pasta, f"/api/v3/agregados/{tabela}/metadados")
+
+
+def periodos_gravados(pasta, tabela, metadados):
+    periodos = _ler_gravado(pasta, f"/api/v3/agregados/{tabela}/periodos")
+    if periodos:
+        return [str(p["id"]) for p in periodos]
+    return [str(metadados["periodicidade"]["fim"])]
+
+
+def valores_gravados(pasta, tabela):
+    """Todas as linhas de `values` gravadas para a tabela (sem repetição)."""
+    cabecalho, linhas, vistas = None, [], set()
+    for arquivo in sorted(Path(pasta).glob(f"values__t__{tabela}__*.json")):
+        resposta = json.loads(arquivo.read_text(encoding="utf-8"))
+        cabecalho = cabecalho or resposta[0]
+        for linha in resposta[1:]:
+            chave = tuple(sorted(linha.items()))
+            if chave not in vistas:
+                vistas.add(chave)
+                linhas.append(linha)
+    return cabecalho, linhas
+
+
+# ====== DOWNLOAD "br.csv" ======
+
+def montar_csv_br(metadados, clas, cabecalho, linhas, categorias, periodos):
+    """
+    CSV "br.csv" do download do site, montado aqui mesmo (sem `sidra_api`),
+    para que comparar o download com o CSV da API confira alguma coisa:
+    colunas na ordem dos períodos e das categorias dos metadados, linhas
+    pelo código do território, "..." nas células sem linha gravada.
+    """
+    rotulos = {rotulo: chave for chave, rotulo in cabecalho.items() if chave.startswith("D")}
+    chave_ano, chave_cat = rotulos["Ano (Código)"], rotulos[f"{clas['nome']} (Código)"]
+    nivel = linhas[0]["NN"] if linhas else "Unidade da Federação"
+    chave_local, chave_nome = rotulos[f"{nivel} (Código)"], rotulos[nivel]
+
+    colunas = [(periodo, str(c["id"]), c["nome"]) for periodo in sorted(periodos)
+               for c in clas["categorias"] if str(c["id"]) in categorias]
+    territorios, celulas, unidade = {}, {}, ""
+    for linha in linhas:
+        if linha[chave_ano] in periodos and linha[chave_cat] in categorias:
+            territorios[int(linha[chave_local])] = linha[chave_nome]
+            celulas[linha[chave_local], linha[chave_ano], linha[chave_cat]] = linha["V"]
+            unidade = linha["MN"]
+
+    saida = io.StringIO()
+    escritor = csv.writer(saida, delimiter=";", lineterminator="\r\n")
+    variavel = metadados["variaveis"][0]
+    escritor.writerow([f"Tabela {metadados['id']} - {metadados['nome']}"])
+    escritor.writerow([f"Variável - {variavel['nome']} ({unidade or variavel['unidade']})"])
+    escritor.writerow([nivel, f"Ano x {clas['nome']}"])
+    escritor.writerow([""] + [periodo for periodo, _, _ in colunas])
+    escritor.writerow([""] + [nome for _, _, nome in colunas])
+    for codigo in sorted(territorios):
+        valores = (celulas.get((str(codigo), periodo, categoria), "...") for periodo, categoria, _ in colunas)
+        escritor.writerow([territorios[codigo]] + [v.replace(".", ",") if v[:1].isdigit() else v for v in valores])
+    escritor.writerow([])
+    escritor.writerow([f"Fonte: IBGE - {metadados.get('pesquisa', 'Censo Demográfico')}"])
+    return saida.getvalue().encode("utf-8")
+
+
+class LimiteServidor:
+    """Balde de fichas do lado do servidor; conta atendidas e recusadas (429)."""
+
+    def __init__(self, por_segundo):
+        self.por_segundo = por_segundo
+        self.capacidade = max(1.0, float(por_segundo))
+        self.fichas = self.capacidade
+        self.atualizado = time.monotonic()
+        self.atendidas = 0
+        self.recusadas = 0
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        with self._lock:
+            agora = time.monotonic()
+            self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado) * self.por_segundo)
+            self.atualizado = agora
+            if self.fichas >= 1:
+                self.fichas -= 1
+                self.atendidas += 1
+                return True
+            self.recusadas += 1
+            return False
+
+
+class ManipuladorSidra(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como o servidor real
+    pasta_api = PASTA_API
+    pasta_site = PASTA_SITE
+    limite = None  # LimiteServidor ou None (sem throttling)
+    latencia = 0.0
+    jitter = 0.0
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, corpo, tipo, extras=None):
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            corpo = gzip.compress(corpo)
+            self.send_response(status)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(status)
+        for nome, valor in (extras or {}).items():
+            self.send_header(nome, valor)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        if self.limite is not None and not self.limite.permitir():
+            self._responder(429, b'"Muitas requisicoes"', "application/json", {"Retry-After": "1"})
+            return
+        if self.latencia or self.jitter:
+            time.sleep(max(0.0, self.latencia + random.uniform(-self.jitter, self.jitter)))
+
+        partes = urlsplit(self.path)
+        caminho, consulta = partes.path, parse_qs(partes.query)
+        if caminho == "/":
+            return self._pagina("index.html")
+        if caminho == "/pesquisa":
+            return self._pesquisa(consulta.get("q", [""])[0].strip())
+        encontrado = re.fullmatch(r"/tabela/(\d+)/?", caminho)
+        if encontrado:
+            return self._tabela(encontrado.group(1))
+        if caminho == "/geratabela":
+            return self._gerar_csv(consulta)
+        self._api(caminho)
+
+    # ====== SITE ======
+
+    def _pagina(self, nome, substituicoes=None, status=200):
+        texto = (self.pasta_site / nome).read_text(encoding="utf-8")
+        for marcador, valor in (substituicoes or {}).items():
+            texto = texto.replace(marcador, valor)
+        self._responder(status, texto.encode("utf-8"), "text/html; charset=utf-8")
+
+    def _pesquisa(self, termo):
+        metadados = metadados_gravados(self.pasta_api, termo) if termo.isdigit() else None
+        if metadados:
+            resultados = (f'<li><a href="/tabela/{metadados["id"]}">Tabela {metadados["id"]} - '
+                          f'{html.escape(metadados["nome"])}</a></li>')
+        else:
+            resultados = "<li>Nenhuma tabela encontrada.</li>"
+        self._pagina("pesquisa.html", {"__TERMO__": html.escape(termo), "__RESULTADOS__": resultados})
+
+    def _tabela(self, tabela):
+        metadados = metadados_gravados(self.pasta_api, tabela)
+        if metadados is None:
+            return self._responder(404, b"Tabela inexistente", "text/plain; charset=utf-8")
+        clas = metadados["classificacoes"][0]  # o mock tem um painel de classificação
+        dados = {
+            "tabela": str(metadados["id"]),
+            "classificacao": str(clas["id"]),
+            "categorias": [{"id": str(c["id"]), "nome": c["nome"]} for c in clas["categorias"]],
+            "categorias_padrao": [str(clas["categorias"][0]["id"])],  # "Total"
+            "periodos": periodos_gravados(self.pasta_api, tabela, metadados),
+        }
+        self._pagina("tabela.html", {
+            "__TABELA__": dados["tabela"],
+            "__NOME__": html.escape(metadados["nome"]),
+            "__CLASSIFICACAO__": str(clas["id"]),
+            "__CLASSIFICACAO_NOME__": html.escape(clas["nome"]),
+            "__DADOS__": json.dumps(dados, ensure_ascii=False),
+        })
+
+    def _gerar_csv(self, consulta):
+        tabela = consulta.get("t", [""])[0]
+        metadados = metadados_gravados(self.pasta_api, tabela)
+        if metadados is None:
+            return self._responder(404, b"Tabela inexistente", "text/plain; charset=utf-8")
+        if consulta.get("formato", ["br.csv"])[0] != "br.csv":
+            return self._responder(400, "Só o formato br.csv é simulado.".encode(), "text/plain; charset=utf-8")
+        if not consulta.get("n3", [""])[0]:
+            return self._responder(400, "Selecione ao menos uma unidade territorial.".encode(),
+                                   "text/plain; charset=utf-8")
+
+        clas = metadados["classificacoes"][0]
+        categorias = consulta.get(f"c{clas['id']}", [""])[0].split(",")
+        periodos = consulta.get("p", [""])[0].split(",")
+        cabecalho, linhas = valores_gravados(self.pasta_api, tabela)
+        corpo = montar_csv_br(metadados, clas, cabecalho, linhas, categorias, periodos)
+        self._responder(200, corpo, "text/csv; charset=utf-8", {
+            "Content-Disposition": f'attachment; filename="tabela{tabela}.csv"',
+        })
+
+    # ====== API ======
+
+    def _api(self, caminho):
+        arquivo = caminho_resposta(self.pasta_api, caminho)
+        if arquivo.exists():
+            corpo = arquivo.read_bytes()
+            validadores = {
+                "ETag": f'"{hashlib.sha1(corpo).hexdigest()}"',
+                "Last-Modified": email.utils.formatdate(arquivo.stat().st_mtime, usegmt=True),
+            }
+            if self.headers.get("If-None-Match") == validadores["ETag"]:
+                self.send_response(304)
+                for nome, valor in validadores.items():
+                    self.send_header(nome, valor)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._responder(200, corpo, "application/json; charset=utf-8", validadores)
+        else:
+            self._responder(404, b'"Nenhuma resposta gravada para esta consulta"', "application/json")
+
+
+def criar_manipulador(limite=None, latencia=0.0, jitter=0.0):
+    """Subclasse de ManipuladorSidra com limite de requisições/s e latência próprios."""
+    return type("ManipuladorSidraConfigurado", (ManipuladorSidra,), {
+        "limite": LimiteServidor(limite) if limite else None,
+        "latencia": latencia,
+        "jitter": jitter,
+    })
+
+
+def iniciar_servidor(porta=0, host="127.0.0.1", limite=None, latencia=0.0, jitter=0.0):
+    """
+    Sobe o servidor em uma thread; retorna (servidor, url_base).
+    Com `limite`, as contagens ficam em `servidor.RequestHandlerClass.limite`.
+    """
+    servidor = ThreadingHTTPServer((host, porta), criar_manipulador(limite, latencia, jitter))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock local do SIDRA.")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--limite", type=float, default=None, help="Máximo de requisições por segundo (429 acima).")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso de cada resposta, em segundos.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variação aleatória (±) do atraso, em segundos.")
+    args = parser.parse_args()
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", args.porta),
+                                   criar_manipulador(args.limite, args.latencia, args.jitter))
+    print(f"🧪 Mock do SIDRA em http://127.0.0.1:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,251 @@
+"""
+Detecção de conclusão de download sem varrer a pasta de download.
+
+Fonte principal: eventos do Chrome DevTools. `preparar_downloads` chama
+`Browser.setDownloadBehavior` com `allowAndName` (o arquivo é salvo com o
+GUID do download como nome, então nunca há confusão com CSVs antigos ou de
+outro worker) e `eventsEnabled`. O log "performance" do chromedriver só
+traz eventos da página: os `Browser.download*` vão para o alvo do navegador
+e não aparecem nele, então `MonitorDownloads` usa os `Page.downloadWillBegin`
+/ `Page.downloadProgress` que a página emite (agrupados por GUID) quando o
+Chrome os envia.
+
+Fallback: se nenhum evento chegar, `ObservadorPasta` usa inotify (Linux,
+via ctypes) para saber o momento em que um arquivo é finalizado na pasta;
+em outros sistemas faz polling leve da pasta. Só contam arquivos com nome
+de GUID (os criados pelo `allowAndName`): CSVs renomeados, temporários de
+outros processos ou arquivos copiados para a pasta são ignorados.
+"""
+import ctypes
+import ctypes.util
+import json
+import os
+import re
+import select
+import struct
+import time
+from pathlib import Path
+
+from selenium.common.exceptions import WebDriverException
+
+# Extensões de arquivos ainda em escrita pelo Chrome
+EXTENSOES_PARCIAIS = (".crdownload", ".tmp", ".part")
+
+# Preferências do log "performance": só o domínio Page é necessário
+PREFERENCIAS_LOG_PERFORMANCE = {"enableNetwork": False, "enablePage": True}
+
+# Nome dado pelo `allowAndName`: o GUID do download, sem extensão
+NOME_GUID = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+
+
+def preparar_downloads(driver, pasta):
+    """Salva downloads em `pasta` com o GUID como nome e habilita os eventos."""
+    driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+        "behavior": "allowAndName",
+        "downloadPath": str(Path(pasta).resolve()),
+        "eventsEnabled": True,
+    })
+
+
+class DownloadCancelado(RuntimeError):
+    pass
+
+
+class MonitorDownloads:
+    """
+    Acompanha downloads pelos eventos CDP, indexados pelo GUID.
+
+    Deve ser criado ANTES de disparar o download: o construtor descarta os
+    eventos antigos acumulados no log.
+    """
+
+    METODOS_INICIO = ("Browser.downloadWillBegin", "Page.downloadWillBegin")
+    METODOS_PROGRESSO = ("Browser.downloadProgress", "Page.downloadProgress")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.downloads = {}
+        self.disponivel = True
+        self._ler_log()  # descarta o que ficou de navegações anteriores
+        self.downloads.clear()
+
+    @property
+    def eventos_ativos(self):
+        """True quando ao menos um download já foi anunciado por evento."""
+        return bool(self.downloads)
+
+    def _ler_log(self):
+        if not self.disponivel:
+            return []
+        try:
+            entradas = self.driver.get_log("performance")
+        except WebDriverException:
+            # Driver iniciado sem o log "performance": só o fallback funciona
+            self.disponivel = False
+            return []
+
+        eventos = []
+        for entrada in entradas:
+            mensagem = entrada.get("message", "")
+            if "download" not in mensagem:
+                continue
+            try:
+                evento = json.loads(mensagem)["message"]
+            except (ValueError, KeyError):
+                continue
+            eventos.append(evento)
+            self._processar(evento)
+        return eventos
+
+    def _processar(self, evento):
+        metodo, params = evento.get("method"), evento.get("params", {})
+        guid = params.get("guid")
+        if not guid:
+            return
+        if metodo in self.METODOS_INICIO:
+            self.downloads.setdefault(guid, {"estado": "inProgress", "recebido": 0, "total": 0})
+            self.downloads[guid]["arquivo_sugerido"] = params.get("suggestedFilename")
+        elif metodo in self.METODOS_PROGRESSO:
+            info = self.downloads.setdefault(guid, {"arquivo_sugerido": None})
+            info.update(
+                estado=params.get("state"),
+                recebido=params.get("receivedBytes", 0),
+                total=params.get("totalBytes", 0),
+            )
+
+    def concluido(self):
+        """
+        Processa os eventos pendentes e retorna o GUID de um download
+        concluído (ou None). Levanta DownloadCancelado se o Chrome cancelou.
+        """
+        self._ler_log()
+        for guid, info in self.downloads.items():
+            if info.get("estado") == "completed":
+                return guid
+            if info.get("estado") == "canceled":
+                raise DownloadCancelado(f"Download {guid} cancelado pelo navegador.")
+        return None
+
+
+# ====== FALLBACK: INOTIFY (LINUX) / POLLING ======
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_CABECALHO_EVENTO = struct.Struct("iIII")
+
+
+def _carregar_inotify():
+    if not hasattr(os, "O_NONBLOCK") or not Path("/proc/sys/fs/inotify").exists():
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        return libc if hasattr(libc, "inotify_init1") else None
+    except (OSError, AttributeError):
+        return None
+
+
+class ObservadorPasta:
+    """
+    Informa arquivos finalizados em uma pasta a partir do momento da criação.
+
+    No Linux usa inotify (IN_CLOSE_WRITE / IN_MOVED_TO): não há varredura da
+    pasta. Nos demais sistemas, compara listagens a cada `intervalo`. Com
+    `somente_guid`, só valem arquivos cujo nome é um GUID de download.
+    """
+
+    def __init__(self, pasta, intervalo=0.2, somente_guid=True):
+        self.pasta = Path(pasta)
+        self.intervalo = intervalo
+        self.somente_guid = somente_guid
+        self._fd = None
+        self._anteriores = None
+        self._pendentes = []
+
+        libc = _carregar_inotify()
+        if libc is not None:
+            fd = libc.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+            if fd >= 0 and libc.inotify_add_watch(fd, str(self.pasta).encode(), _IN_CLOSE_WRITE | _IN_MOVED_TO) >= 0:
+                self._fd = fd
+            elif fd >= 0:
+                os.close(fd)
+
+        if self._fd is None:
+            self._anteriores = set(self.pasta.iterdir())
+
+    @property
+    def usa_inotify(self):
+        return self._fd is not None
+
+    def _finalizado(self, caminho):
+        if self.somente_guid and not NOME_GUID.fullmatch(caminho.name):
+            return False
+        return not caminho.name.endswith(EXTENSOES_PARCIAIS) and caminho.is_file() and caminho.stat().st_size > 0
+
+    def proximo(self, timeout):
+        """Retorna o próximo arquivo finalizado, esperando até `timeout` segundos."""
+        if self._fd is None:
+            fim = time.monotonic() + timeout
+            while True:
+                novos = [p for p in self.pasta.iterdir() if p not in self._anteriores and self._finalizado(p)]
+                if novos:
+                    self._anteriores.update(novos)
+                    return novos[0]
+                restante = fim - time.monotonic()
+                if restante <= 0:
+                    return None
+                time.sleep(min(self.intervalo, restante))
+
+        if not self._pendentes:
+            prontos, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+            if not prontos:
+                return None
+            dados = os.read(self._fd, 64 * 1024)
+            deslocamento = 0
+            while deslocamento < len(dados):
+                _wd, _mascara, _cookie, tamanho = _CABECALHO_EVENTO.unpack_from(dados, deslocamento)
+                deslocamento += _CABECALHO_EVENTO.size
+                nome = dados[deslocamento:deslocamento + tamanho].rstrip(b"\0").decode(errors="replace")
+                deslocamento += tamanho
+                if nome:
+                    self._pendentes.append(self.pasta / nome)
+
+        while self._pendentes:
+            caminho = self._pendentes.pop(0)
+            if caminho.exists() and self._finalizado(caminho):
+                return caminho
+        return None
+
+    def fechar(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def aguardar_download(pasta, monitor, observador, timeout=60):
+    """
+    Espera o download disparado após a criação de `monitor`/`observador`.
+
+    Enquanto os eventos CDP estiverem chegando, só eles decidem a conclusão
+    (o arquivo com o nome do GUID é devolvido no instante em que o Chrome o
+    finaliza). Sem eventos, vale o primeiro arquivo com nome de GUID
+    finalizado na pasta.
+    Levanta TimeoutError se nada for concluído dentro de `timeout`.
+    """
+    pasta = Path(pasta)
+    fim = time.monotonic() + timeout
+    while time.monotonic() < fim:
+        guid = monitor.concluido()
+        if guid:
+            return pasta / guid
+
+        arquivo = observador.proximo(timeout=min(0.1, max(fim - time.monotonic(), 0)))
+        if arquivo is not None and not monitor.eventos_ativos:
+            return arquivo
+
+    raise TimeoutError(f"Download não foi concluído após {timeout} segundos.")
@@ -0,0 +1,262 @@
+"""
+Leitura dos CSVs "br.csv" baixados do SIDRA.
+
+O arquivo tem linhas de título antes do cabeçalho, notas depois dos dados,
+`;` como separador, vírgula decimal e marcadores no lugar de números:
+
+    Tabela 1209 - População, por grupos de idade
+    Variável - População (Pessoas)
+    Unidade da Federação;Ano x Grupo de idade
+    ;2022;2022
+    ;60 a 69 anos;70 anos ou mais
+    Rondônia;123456;98765
+    ...
+    (linha vazia)
+    Fonte: IBGE - Censo Demográfico
+
+`ler_registros` percorre o arquivo linha a linha (memória constante) e gera
+um `Registro(territorio, categoria, periodo, valor)` por célula.
+`ler_arrays` é o caminho em lote: devolve arrays NumPy (numpy é opcional e
+só é importado nessa função). `escrever_csv` faz o caminho inverso.
+"""
+import csv
+from typing import NamedTuple, Optional
+
+ENCODING = "utf-8-sig"  # aceita arquivos com ou sem BOM
+
+# Marcadores do SIDRA: "-" é zero absoluto; os demais não têm valor numérico
+ZERO_ABSOLUTO = "-"
+SEM_VALOR = {"..", "...", "X", "x", ""}
+
+# Linhas convertidas por chamada a `np.fromstring` em `ler_arrays`
+LINHAS_POR_BLOCO = 65536
+
+# Dimensões de coluna que representam o período
+DIMENSOES_PERIODO = {"Ano", "Mês", "Trimestre", "Trimestre Móvel", "Semestre"}
+
+
+class Registro(NamedTuple):
+    territorio: str
+    categoria: str
+    periodo: str
+    valor: Optional[float]
+
+
+def converter_valor(texto):
+    """'1234' -> 1234.0, '12,5' -> 12.5, '-' -> 0.0, '...'/'X' -> None."""
+    texto = texto.strip()
+    if texto == ZERO_ABSOLUTO:
+        return 0.0
+    if texto in SEM_VALOR:
+        return None
+    try:
+        return float(texto.replace(".", "").replace(",", "."))
+    except ValueError:
+        return None
+
+
+class CabecalhoSidra(NamedTuple):
+    titulo: list        # linhas de título (tabela, variável)
+    dimensao_linha: str  # ex.: "Unidade da Federação"
+    dimensoes_coluna: list  # ex.: ["Ano", "Grupo de idade"]
+    colunas: list       # [(periodo, categoria), ...], uma por coluna de dados
+
+
+def _ler_cabecalho(leitor):
+    """Consome as linhas até o fim do cabeçalho; retorna CabecalhoSidra."""
+    titulo = []
+    for linha in leitor:
+        if len(linha) > 1 and linha[0].strip():
+            dimensao_linha = linha[0].strip()
+            dimensoes_coluna = [d.strip() for d in linha[1].split(" x ")]
+            break
+        if any(c.strip() for c in linha):
+            titulo.append(linha[0].strip())
+    else:
+        raise ValueError("Cabeçalho do SIDRA não encontrado no arquivo.")
+
+    # Linhas de cabeçalho de coluna começam com célula vazia
+    niveis = []
+    for _ in dimensoes_coluna:
+        linha = next(leitor)
+        niveis.append([c.strip() for c in linha[1:]])
+
+    n_colunas = max(len(n) for n in niveis)
+    periodos = categorias = [""] * n_colunas
+    for nome, valores in zip(dimensoes_coluna, niveis):
+        if nome in DIMENSOES_PERIODO:
+            periodos = valores
+        else:
+            categorias = valores
+    colunas = list(zip(periodos, categorias))
+    return CabecalhoSidra(titulo, dimensao_linha, dimensoes_coluna, colunas)
+
+
+def ler_cabecalho(caminho):
+    with open(caminho, encoding=ENCODING, newline="") as f:
+        return _ler_cabecalho(csv.reader(f, delimiter=";"))
+
+
+def _linhas_de_dados(leitor):
+    """Linhas de dados até a primeira linha vazia (início das notas)."""
+    for linha in leitor:
+        if not linha or not linha[0].strip():
+            return
+        yield linha
+
+
+def ler_registros(caminho):
+    """
+    Gera um `Registro` por célula de dados do CSV, sem carregar o arquivo.
+
+    Ex.: for r in ler_registros("populacao_60mais_1209_20251121_1836.csv"):
+             print(r.territorio, r.categoria, r.periodo, r.valor)
+    """
+    with open(caminho, encoding=ENCODING, newline="") as f:
+        leitor = csv.reader(f, delimiter=";")
+        cabecalho = _ler_cabecalho(leitor)
+        colunas = cabecalho.colunas
+        for linha in _linhas_de_dados(leitor):
+            territorio = linha[0].strip()
+            for (periodo, categoria), texto in zip(colunas, linha[1:]):
+                yield Registro(territorio, categoria, periodo, converter_valor(texto))
+
+
+def formatar_valor(valor):
+    """Inverso de `converter_valor`: 1234.0 -> '1234', 12.5 -> '12,5', None -> '...'."""
+    if valor is None:
+        return "..."
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor)).replace(".", ",")
+
+
+def escrever_csv(caminho, cabecalho, registros, rodape=None):
+    """
+    Grava `registros` no layout "br.csv" descrito por `cabecalho`
+    (as colunas seguem `cabecalho.colunas`; células ausentes viram '...').
+    """
+    colunas = list(cabecalho.colunas)
+    tabela = {}  # território -> {(periodo, categoria): valor}
+    for r in registros:
+        tabela.setdefault(r.territorio, {})[(r.periodo, r.categoria)] = r.valor
+
+    niveis = {
+        nome: [p for p, _ in colunas] if nome in DIMENSOES_PERIODO else [c for _, c in colunas]
+        for nome in cabecalho.dimensoes_coluna
+    }
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f, delimiter=";", lineterminator="\r\n")
+        for linha in cabecalho.titulo:
+            escritor.writerow([linha])
+        escritor.writerow([cabecalho.dimensao_linha, " x ".join(cabecalho.dimensoes_coluna)])
+        for nome in cabecalho.dimensoes_coluna:
+            escritor.writerow([""] + niveis[nome])
+        for territorio, celulas in tabela.items():
+            escritor.writerow([territorio] + [
+                formatar_valor(celulas.get(c)) for c in colunas
+            ])
+        if rodape:
+            escritor.writerow([])
+            escritor.writerow([rodape])
+    return caminho
+
+
+def _substituir_campos(texto, marcador, valor):
+    """Troca campos inteiros iguais a `marcador` em ";a;b;...;" (duas passadas: vizinhos)."""
+    antigo, novo = f";{marcador};", f";{valor};"
+    return texto.replace(antigo, novo).replace(antigo, novo)
+
+
+def _converter_bloco(np, celulas):
+    """Células ("1.234,5;..;-") de um bloco de linhas -> array float64, em um único `np.fromstring`."""
+    texto = ";" + ";".join(celulas).replace('"', "").replace(" ", "") + ";"
+    texto = _substituir_campos(texto, ZERO_ABSOLUTO, "0")
+    for marcador in sorted(SEM_VALOR, key=len, reverse=True):
+        texto = _substituir_campos(texto, marcador, "nan")
+    return np.fromstring(texto[1:-1].replace(".", "").replace(",", "."), sep=";")
+
+
+def ler_arrays(caminhos, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """
+    Caminho em lote para arquivos grandes (ou vários arquivos): retorna um
+    dict de arrays NumPy alinhados, uma posição por célula, com as
+    dimensões em forma categórica (código inteiro + rótulos):
+
+        territorio, categoria, periodo  -> códigos int32
+        valor                           -> float64 (NaN quando sem valor)
+        rotulos                         -> {"territorio": [...], "categoria": [...], "periodo": [...]}
+
+    `dados["rotulos"]["territorio"][dados["territorio"]]` recupera os
+    nomes, se for preciso. Os textos ficam só nos rótulos (um por valor
+    distinto), nunca repetidos por célula.
+
+    O arquivo é lido em blocos de `linhas_por_bloco` linhas; os valores de
+    cada bloco são normalizados com substituições de texto e convertidos de
+    uma vez por `np.fromstring`, de modo que o texto intermediário nunca
+    passa do tamanho de um bloco.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("ler_arrays requer numpy: pip install numpy") from None
+
+    if isinstance(caminhos, (str, bytes)) or hasattr(caminhos, "__fspath__"):
+        caminhos = [caminhos]
+
+    codigos = {"territorio": {}, "categoria": {}, "periodo": {}}  # rótulo -> código, em ordem de aparição
+
+    def codificar(dimensao, rotulos):
+        codigo = codigos[dimensao]
+        return np.fromiter((codigo.setdefault(r, len(codigo)) for r in rotulos), dtype=np.int32, count=len(rotulos))
+
+    partes = {"territorio": [], "categoria": [], "periodo": [], "valor": []}
+    for caminho in caminhos:
+        with open(caminho, encoding=ENCODING, newline="") as f:
+            cabecalho = _ler_cabecalho(csv.reader(f, delimiter=";"))
+            n_colunas = len(cabecalho.colunas)
+            periodos = codificar("periodo", [p for p, _ in cabecalho.colunas])
+            categorias = codificar("categoria", [c for _, c in cabecalho.colunas])
+
+            linhas, valores = [], []  # por bloco: códigos dos territórios (um por linha) e valores
+
+            def fechar_bloco(territorios, celulas):
+                valores.append(_converter_bloco(np, celulas))
+                if valores[-1].size != len(territorios) * n_colunas:
+                    raise ValueError(f"{caminho}: linhas com número de colunas diferente do cabeçalho.")
+                linhas.append(codificar("territorio", territorios))
+
+            territorios, celulas = [], []
+            for linha in f:
+                linha = linha.rstrip("\r\n")
+                if not linha.strip() or linha.startswith(";"):
+                    break
+                nome, _, resto = linha.partition(";")
+                territorios.append(nome.strip().strip('"'))
+                celulas.append(resto)
+                if len(celulas) >= linhas_por_bloco:
+                    fechar_bloco(territorios, celulas)
+                    territorios, celulas = [], []
+            if celulas:
+                fechar_bloco(territorios, celulas)
+        if not linhas:
+            continue
+
+        # Expande por célula só os códigos (4 bytes), nunca os textos
+        territorios = _juntar(np, linhas)
+        partes["territorio"].append(np.repeat(territorios, n_colunas))
+        partes["periodo"].append(np.tile(periodos, territorios.size))
+        partes["categoria"].append(np.tile(categorias, territorios.size))
+        partes["valor"].append(_juntar(np, valores))
+
+    rotulos = {dimensao: np.array(list(codigo), dtype=str) for dimensao, codigo in codigos.items()}
+    if not partes["valor"]:
+        vazio = np.array([], dtype=np.int32)
+        return {"territorio": vazio, "categoria": vazio.copy(), "periodo": vazio.copy(),
+                "valor": np.array([], dtype=np.float64), "rotulos": rotulos}
+    return {**{nome: _juntar(np, arrays) for nome, arrays in partes.items()}, "rotulos": rotulos}
+
+
+def _juntar(np, arrays):
+    """np.concatenate sem a cópia quando há um único array."""
+    return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
@@ -0,0 +1,472 @@
+"""
+Extrações SIDRA descritas por especificação (JSON ou YAML) em vez de código.
+
+Uma especificação diz o que baixar de uma tabela; nada da Tabela 1209 fica
+fixo no código:
+
+    {
+      "padroes": {"territorio": "unidade_federacao"},
+      "tabelas": [
+        {
+          "tabela": "1209",
+          "busca": "1209",
+          "classificacoes": {"C58": {"Total": false, "60 a 69 anos": true, "70 anos ou mais": true}},
+          "periodos": ["2022"],
+          "territorio": "unidade_federacao",
+          "saida": "populacao_60mais_{tabela}"
+        }
+      ]
+    }
+
+- `classificacoes`: painel ("C58" ou "58") -> {texto da opção: marcar?};
+  opções não listadas ficam como a página as abre;
+- `periodos`: lista de períodos ou null (mantém o período padrão);
+- `territorio`: nível territorial (chaves de `sidra_api.ROTULOS_NIVEIS`);
+- `busca`: texto digitado na busca (padrão: o número da tabela);
+- `saida`: prefixo do CSV; `{tabela}` é substituído pelo número. Sem
+  `saida`, o prefixo é `tabela_{tabela}_<8 hex>`, com um resumo das seleções,
+  para que duas especificações da mesma tabela não gravem o mesmo arquivo.
+
+`compilar` transforma a lista de especificações em um `Plano` por tabela:
+uma única navegação atende todas as especificações da mesma tabela, e a
+cada download seguinte só entram as opções que mudam em relação ao estado
+já aplicado na página — cada painel recebe essas mudanças em um único
+`aplicar_estado_filtros`. Especificações com o período padrão vêm antes das
+que trocam o período, e trocar de nível territorial recarrega a tabela.
+
+Uso:
+    python plano_extracao.py especificacoes/tabela_1209.json --mostrar-plano
+    python plano_extracao.py especificacoes/*.yaml --workers 4
+    python plano_extracao.py especificacoes/tabela_1209.json --via api
+
+YAML requer PyYAML (opcional; só é importado ao ler um .yaml/.yml).
+"""
+import argparse
+import hashlib
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from desafio_ibge_1209 import (
+    DOWNLOAD_DIR,
+    aplicar_filtros_painel,
+    baixar_csv,
+    buscar_tabela,
+    exportar_trace,
+    fechar_tour_tabela,
+    medir_etapa,
+    selecionar_nivel_territorial,
+    selecionar_periodos,
+    selecionar_unidade_federacao,
+    seletor_painel,
+)
+from rastreamento import novo_trace
+from sidra_api import ROTULOS_NIVEIS, EspecificacaoInvalida
+
+CAMPOS = {"tabela", "busca", "classificacoes", "periodos", "territorio", "saida"}
+
+
+# ====== ESPECIFICAÇÕES ======
+
+@dataclass
+class EspecificacaoTabela:
+    """Uma extração declarada: tabela, seleções e nome do arquivo de saída."""
+    tabela: str
+    classificacoes: dict
+    periodos: Optional[tuple] = None
+    territorio: str = "unidade_federacao"
+    busca: Optional[str] = None
+    saida: str = "tabela_{tabela}"
+
+    @property
+    def prefixo(self):
+        return self.saida.format(tabela=self.tabela)
+
+    def para_api(self):
+        """Especificação equivalente de `sidra_api.extrair_via_api` (uma classificação)."""
+        if len(self.classificacoes) != 1:
+            raise EspecificacaoInvalida(f"❌ Tabela {self.tabela}: a extração via API aceita uma única classificação.")
+        (painel, filtros), = self.classificacoes.items()
+        return {
+            "tabela": self.tabela,
+            "classificacao": painel.lstrip("C"),
+            "filtros": filtros,
+            "nivel": self.territorio,
+            "periodo": ",".join(self.periodos) if self.periodos else "last",
+            "variavel": None,
+            "prefixo": self.prefixo,
+        }
+
+
+def normalizar(bruta, padroes=None):
+    """dict lido do arquivo (+ padrões) -> `EspecificacaoTabela`, validando os campos."""
+    dados = {**(padroes or {}), **bruta}
+    desconhecidos = set(dados) - CAMPOS
+    if desconhecidos:
+        raise EspecificacaoInvalida(f"❌ Campo(s) desconhecido(s) na especificação: {', '.join(sorted(desconhecidos))}")
+    if "tabela" not in dados:
+        raise EspecificacaoInvalida("❌ Especificação sem 'tabela'.")
+    tabela = str(dados["tabela"])
+
+    classificacoes = {}
+    for painel, filtros in (dados.get("classificacoes") or {}).items():
+        painel = str(painel)
+        painel = f"C{painel}" if painel.isdigit() else painel.upper()
+        if not isinstance(filtros, dict) or not all(isinstance(v, bool) for v in filtros.values()):
+            raise EspecificacaoInvalida(f"❌ Tabela {tabela}, {painel}: use {{texto da opção: true/false}}.")
+        classificacoes[painel] = {str(k): v for k, v in filtros.items()}
+
+    periodos = dados.get("periodos")
+    if periodos is not None:
+        periodos = tuple(str(p) for p in ([periodos] if isinstance(periodos, (str, int)) else periodos))
+
+    territorio = dados.get("territorio", "unidade_federacao")
+    if territorio not in ROTULOS_NIVEIS:
+        raise EspecificacaoInvalida(f"❌ Tabela {tabela}: território '{territorio}' inválido "
+                         f"(use {', '.join(ROTULOS_NIVEIS)}).")
+
+    esp = EspecificacaoTabela(
+        tabela=tabela,
+        classificacoes=classificacoes,
+        periodos=periodos,
+        territorio=territorio,
+        busca=str(dados["busca"]) if dados.get("busca") else None,
+    )
+    esp.saida = dados.get("saida") or f"tabela_{{tabela}}_{_resumo_selecoes(esp)}"
+    return esp
+
+
+def _resumo_selecoes(esp):
+    """8 hex que distinguem o prefixo padrão de especificações da mesma tabela."""
+    selecoes = [esp.classificacoes, esp.periodos, esp.territorio]
+    return hashlib.sha256(json.dumps(selecoes, sort_keys=True).encode()).hexdigest()[:8]
+
+
+def _ler_documento(caminho):
+    caminho = Path(caminho)
+    texto = caminho.read_text(encoding="utf-8")
+    if caminho.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Especificações YAML requerem PyYAML: pip install pyyaml") from None
+        return yaml.safe_load(texto)
+    return json.loads(texto)
+
+
+def carregar_especificacoes(*caminhos):
+    """
+    Lê arquivos de especificação. Cada arquivo pode ter uma especificação,
+    uma lista delas ou {"padroes": {...}, "tabelas": [...]}.
+    """
+    especificacoes = []
+    for caminho in caminhos:
+        documento = _ler_documento(caminho)
+        padroes = {}
+        if isinstance(documento, dict) and "tabelas" in documento:
+            padroes = documento.get("padroes") or {}
+            documento = documento["tabelas"]
+        for bruta in documento if isinstance(documento, list) else [documento]:
+            especificacoes.append(normalizar(bruta, padroes))
+    verificar_prefixos(especificacoes)
+    return especificacoes
+
+
+# ====== COMPILAÇÃO ======
+
+@dataclass
+class Acao:
+    """
+    Um passo do plano. `tipo`: navegar, fechar_modal, filtros, periodos,
+    territorio ou baixar. `especificacao` é o índice (na lista compilada)
+    da especificação atendida pelo passo.
+    """
+    tipo: str
+    argumentos: dict = field(default_factory=dict)
+    especificacao: Optional[int] = None
+
+    def __str__(self):
+        a = self.argumentos
+        if self.tipo == "navegar":
+            return f"navegar até a tabela {a['tabela']} (busca '{a['termo'] or a['tabela']}')"
+        if self.tipo == "filtros":
+            mudancas = ", ".join(f"{'+' if m else '-'}{o}" for o, m in a["estado"].items())
+            restaurar = f" / restaurar {', '.join(a['restaurar'])}" if a["restaurar"] else ""
+            return f"filtros {a['escopo']}: {mudancas or '—'}{restaurar}"
+        if self.tipo == "periodos":
+            return f"períodos {', '.join(a['periodos'])}"
+        if self.tipo == "territorio":
+            return f"território {a['nivel']}"
+        if self.tipo == "baixar":
+            return f"baixar {a['prefixo']}_<timestamp>.csv"
+        return self.tipo.replace("_", " ")
+
+
+@dataclass
+class Plano:
+    """Ações de uma tabela, executadas em sequência no mesmo navegador."""
+    tabela: str
+    especificacoes: dict  # índice -> EspecificacaoTabela
+    acoes: list = field(default_factory=list)
+
+    @property
+    def cliques_planejados(self):
+        return sum(len(a.argumentos["estado"]) + len(a.argumentos["restaurar"])
+                   for a in self.acoes if a.tipo == "filtros")
+
+
+def _ordem_na_tabela(item):
+    # Mesmo território juntos; dentro dele, período padrão antes dos períodos explícitos
+    _, esp = item
+    return esp.territorio, esp.periodos is not None, esp.periodos or ()
+
+
+def verificar_prefixos(especificacoes):
+    """Recusa especificações que gravariam no mesmo arquivo (mesmo prefixo no mesmo minuto)."""
+    prefixos = {}
+    for indice, esp in enumerate(especificacoes):
+        if esp.prefixo in prefixos:
+            raise EspecificacaoInvalida(f"❌ Especificações {prefixos[esp.prefixo] + 1} e {indice + 1} gravariam o mesmo "
+                             f"arquivo '{esp.prefixo}'; use 'saida' diferentes.")
+        prefixos[esp.prefixo] = indice
+
+
+def compilar(especificacoes):
+    """Lista de `EspecificacaoTabela` -> lista de `Plano` (um por tabela, na ordem de aparição)."""
+    verificar_prefixos(especificacoes)
+    grupos = {}
+    for indice, esp in enumerate(especificacoes):
+        grupos.setdefault(esp.tabela, []).append((indice, esp))
+
+    planos = []
+    for tabela, itens in grupos.items():
+        plano = Plano(tabela, dict(itens))
+        pagina = None  # estado aplicado desde a última navegação (None = ainda não navegou)
+        for indice, esp in sorted(itens, key=_ordem_na_tabela):
+            if pagina is None or esp.territorio != pagina["territorio"] or (
+                    esp.periodos is None and pagina["periodos"] is not None):
+                plano.acoes.append(Acao("navegar", {"tabela": tabela, "termo": esp.busca}, indice))
+                pagina = {"paineis": {}, "periodos": None, "territorio": None}
+            elif plano.acoes[-1].tipo == "baixar":
+                plano.acoes.append(Acao("fechar_modal", {}, indice))
+
+            # Filtros: só o que difere do estado já aplicado; o que uma especificação
+            # anterior mudou e esta não cita volta ao padrão da página
+            for painel, filtros in esp.classificacoes.items():
+                escopo = seletor_painel(painel)
+                aplicado = pagina["paineis"].setdefault(escopo, {})
+                estado = {o: m for o, m in filtros.items() if aplicado.get(o) != m}
+                restaurar = [o for o in aplicado if o not in filtros]
+                if estado or restaurar:
+                    plano.acoes.append(Acao("filtros", {"escopo": escopo, "estado": estado,
+                                                        "restaurar": restaurar}, indice))
+                pagina["paineis"][escopo] = dict(filtros)
+            for escopo in [e for e in pagina["paineis"]
+                           if e not in {seletor_painel(p) for p in esp.classificacoes}]:
+                plano.acoes.append(Acao("filtros", {"escopo": escopo, "estado": {},
+                                                    "restaurar": list(pagina["paineis"].pop(escopo))}, indice))
+
+            if esp.periodos is not None and esp.periodos != pagina["periodos"]:
+                plano.acoes.append(Acao("periodos", {"periodos": list(esp.periodos)}, indice))
+                pagina["periodos"] = esp.periodos
+
+            if esp.territorio != pagina["territorio"]:
+                plano.acoes.append(Acao("territorio", {"nivel": esp.territorio}, indice))
+                pagina["territorio"] = esp.territorio
+
+            plano.acoes.append(Acao("baixar", {"prefixo": esp.prefixo}, indice))
+        planos.append(plano)
+    return planos
+
+
+def imprimir_plano(planos):
+    """Ações de cada plano e a economia em relação a executar cada especificação isolada."""
+    total_esp = sum(len(p.especificacoes) for p in planos)
+    ingenuas = sum(len(e.classificacoes) + (e.periodos is not None) + 3
+                   for p in planos for e in p.especificacoes.values())
+    cliques_ingenuos = sum(len(f) for p in planos for e in p.especificacoes.values()
+                           for f in e.classificacoes.values())
+    for plano in planos:
+        print(f"\n📋 Tabela {plano.tabela}: {len(plano.especificacoes)} especificação(ões), "
+              f"{len(plano.acoes)} ação(ões)")
+        for i, acao in enumerate(plano.acoes, 1):
+            print(f"   {i:>3}. {acao}")
+    acoes = sum(len(p.acoes) for p in planos)
+    navegacoes = sum(1 for p in planos for a in p.acoes if a.tipo == "navegar")
+    print(f"\n🧮 {total_esp} especificação(ões) -> {acoes} ação(ões) (isoladas: {ingenuas}); "
+          f"{navegacoes} navegação(ões) (isoladas: {total_esp}); "
+          f"{sum(p.cliques_planejados for p in planos)} opção(ões) a conferir (isoladas: {cliques_ingenuos})")
+
+
+# ====== EXECUÇÃO ======
+
+@dataclass
+class ResultadoEspecificacao:
+    especificacao: EspecificacaoTabela
+    arquivo: Path = None
+    erro: str = None
+    excecao: Exception = field(default=None, repr=False)  # a que interrompeu o plano
+
+    @property
+    def sucesso(self):
+        return self.erro is None
+
+
+def executar_plano(driver, plano, download_dir=DOWNLOAD_DIR, timeout_download=60):
+    """
+    Executa as ações de um plano em um driver já aberto. Retorna um
+    `ResultadoEspecificacao` por especificação do plano; depois de uma falha
+    as especificações restantes do plano ficam com o mesmo erro.
+    """
+    wait = WebDriverWait(driver, 30)
+    trace_id = novo_trace()
+    arquivos = {}
+    padroes = {}  # escopo -> {opção: estado com que a página abriu}
+    erro = excecao = None
+    try:
+        for acao in plano.acoes:
+            a = acao.argumentos
+            with medir_etapa(f"plano/{acao.tipo}", tabela=plano.tabela):
+                if acao.tipo == "navegar":
+                    buscar_tabela(driver, wait, a["tabela"], a["termo"])
+                elif acao.tipo == "fechar_modal":
+                    fechar_tour_tabela(driver, wait)
+                elif acao.tipo == "filtros":
+                    padroes_painel = padroes.setdefault(a["escopo"], {})
+                    estado = dict(a["estado"])
+                    for opcao in a["restaurar"]:
+                        if opcao in padroes_painel:
+                            estado[opcao] = padroes_painel[opcao]
+                    resultado = aplicar_filtros_painel(driver, wait, estado, a["escopo"])
+                    for opcao, r in resultado.items():
+                        if r["antes"] is not None:
+                            padroes_painel.setdefault(opcao, r["antes"])
+                elif acao.tipo == "periodos":
+                    selecionar_periodos(driver, wait, a["periodos"])
+                elif acao.tipo == "territorio":
+                    if a["nivel"] == "unidade_federacao":
+                        selecionar_unidade_federacao(driver, wait)
+                    else:
+                        selecionar_nivel_territorial(driver, wait, ROTULOS_NIVEIS[a["nivel"]])
+                elif acao.tipo == "baixar":
+                    arquivos[acao.especificacao] = baixar_csv(
+                        wait, timeout_download, download_dir=download_dir, prefixo=a["prefixo"],
+                        especificacao=plano.especificacoes[acao.especificacao])
+    except Exception as e:
+        erro, excecao = f"{type(e).__name__}: {e}", e
+        print(f"   -> ❌ Tabela {plano.tabela}: {erro}")
+    finally:
+        exportar_trace(trace_id)
+
+    return {
+        indice: ResultadoEspecificacao(esp, arquivo=arquivos.get(indice),
+                                       erro=None if indice in arquivos else (erro or "não executada"),
+                                       excecao=None if indice in arquivos else excecao)
+        for indice, esp in plano.especificacoes.items()
+    }
+
+
+def executar_planos(planos, n_workers=2, headless=True, pasta_base=DOWNLOAD_DIR, pool=None):
+    """
+    Distribui os planos entre `n_workers` sessões do pool (os maiores
+    primeiro). Retorna (resultados na ordem das especificações, duração).
+    """
+    from pool_navegadores import PoolNavegadores
+
+    fila = queue.Queue()
+    for plano in sorted(planos, key=lambda p: len(p.acoes), reverse=True):
+        fila.put(plano)
+
+    resultados = {}
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            try:
+                plano = fila.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                with pool.sessao() as sessao:
+                    parcial = executar_plano(sessao.driver, plano, sessao.pasta)
+            except Exception as e:
+                parcial = {i: ResultadoEspecificacao(esp, erro=str(e)) for i, esp in plano.especificacoes.items()}
+            with lock:
+                resultados.update(parcial)
+
+    pool_proprio = pool is None
+    if pool_proprio:
+        pool = PoolNavegadores(max(1, min(n_workers, len(planos))), headless=headless, pasta_base=pasta_base)
+    n_workers = max(1, min(n_workers, pool.tamanho, len(planos)))
+
+    pool.iniciar()
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=worker, name=f"sidra-plano-{i}", daemon=True) for i in range(n_workers)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        if pool_proprio:
+            pool.encerrar()
+
+    return [resultados[i] for i in sorted(resultados)], time.perf_counter() - inicio
+
+
+def executar_via_api(especificacoes, pasta_base=DOWNLOAD_DIR):
+    """As mesmas especificações pela apisidra (sem navegador), uma a uma."""
+    from sidra_api import extrair_via_api
+
+    resultados = []
+    inicio = time.perf_counter()
+    for esp in especificacoes:
+        try:
+            resultados.append(ResultadoEspecificacao(esp, arquivo=extrair_via_api(esp.para_api(), pasta_base)))
+        except Exception as e:
+            print(f"   -> ❌ Tabela {esp.tabela}: {e}")
+            resultados.append(ResultadoEspecificacao(esp, erro=str(e)))
+    return resultados, time.perf_counter() - inicio
+
+
+def imprimir_resultados(resultados, duracao):
+    ok = sum(1 for r in resultados if r.sucesso)
+    print("\n" + "="*60)
+    print(f"📊 {ok}/{len(resultados)} especificação(ões) em {duracao:.1f}s "
+          f"→ {ok / duracao * 60 if duracao > 0 else 0.0:.2f} CSVs/min")
+    print("="*60)
+    for r in resultados:
+        status = f"✅ {r.arquivo.name}" if r.sucesso else f"❌ {r.erro}"
+        print(f"   {r.especificacao.tabela:<8} {r.especificacao.prefixo:<40} {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrações SIDRA a partir de especificações JSON/YAML.")
+    parser.add_argument("arquivos", nargs="+", help="Arquivos de especificação (.json, .yaml, .yml).")
+    parser.add_argument("--via", choices=["navegador", "api"], default="navegador")
+    parser.add_argument("--workers", type=int, default=2, help="Navegadores em paralelo (um plano por vez cada).")
+    parser.add_argument("--com-janela", action="store_true", help="Abre os navegadores com janela.")
+    parser.add_argument("--mostrar-plano", action="store_true", help="Só compila e mostra o plano.")
+    args = parser.parse_args()
+
+    especificacoes = carregar_especificacoes(*args.arquivos)
+    planos = compilar(especificacoes)
+    imprimir_plano(planos)
+    if args.mostrar_plano:
+        return
+
+    if args.via == "api":
+        resultados, duracao = executar_via_api(especificacoes)
+    else:
+        resultados, duracao = executar_planos(planos, n_workers=args.workers, headless=not args.com_janela)
+    imprimir_resultados(resultados, duracao)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Pool de navegadores "quentes" reutilizados entre extrações.
+
+Abrir o Chrome, injetar o script anti-detecção e carregar a página inicial
+do SIDRA custa alguns segundos por extração. O pool mantém N drivers já
+inicializados e, entre um trabalho e outro, apenas limpa o estado
+(cookies, storage, cache) e volta à página inicial (de onde `buscar_tabela`
+parte para abrir a tabela pela interface). Cada sessão é
+reciclada (fechada e reaberta) após um número máximo de trabalhos, quando
+o consumo de memória passa do limite ou quando falha no health check.
+"""
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from desafio_ibge_1209 import DOWNLOAD_DIR, SIDRA_URL, iniciar_driver
+from localizadores import localizadores
+
+try:
+    import psutil
+except ImportError:  # psutil é opcional: no Linux lemos /proc diretamente
+    psutil = None
+
+
+def _pids_arvore_linux(pid_raiz):
+    """PID do processo e de todos os seus descendentes, lendo /proc."""
+    filhos = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as f:
+                campos = f.read().rsplit(")", 1)[1].split()
+            filhos.setdefault(int(campos[1]), []).append(int(entrada))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    pids, pendentes = [], [pid_raiz]
+    while pendentes:
+        pid = pendentes.pop()
+        pids.append(pid)
+        pendentes.extend(filhos.get(pid, []))
+    return pids
+
+
+def _rss_proc_linux(pid_raiz):
+    """Soma o RSS (bytes) de um processo e descendentes lendo /proc."""
+    pagina = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in _pids_arvore_linux(pid_raiz):
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * pagina
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+def _cpu_proc_linux(pid_raiz):
+    """Soma o tempo de CPU (user + system, em segundos) de um processo e descendentes."""
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0
+    for pid in _pids_arvore_linux(pid_raiz):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                campos = f.read().rsplit(")", 1)[1].split()
+            total += int(campos[11]) + int(campos[12])  # utime, stime
+        except (OSError, IndexError, ValueError):
+            pass
+    return total / ticks
+
+
+def _pid_driver(driver):
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def rss_navegador(driver):
+    """
+    Memória residente (MB) do chromedriver + processos do navegador.
+
+    Retorna None se não for possível medir nesta plataforma.
+    """
+    pid = _pid_driver(driver)
+    if pid is None:
+        return None
+
+    if psutil is not None:
+        try:
+            raiz = psutil.Process(pid)
+            processos = [raiz] + raiz.children(recursive=True)
+            return sum(p.memory_info().rss for p in processos) / 1024 / 1024
+        except psutil.Error:
+            return None
+
+    if os.path.isdir("/proc"):
+        return _rss_proc_linux(pid) / 1024 / 1024
+    return None
+
+
+def cpu_navegador(driver):
+    """
+    Tempo de CPU acumulado (s) do chromedriver + processos do navegador.
+
+    Processos já encerrados não entram na soma. Retorna None se não for
+    possível medir nesta plataforma.
+    """
+    pid = _pid_driver(driver)
+    if pid is None:
+        return None
+
+    if psutil is not None:
+        try:
+            raiz = psutil.Process(pid)
+            processos = [raiz] + raiz.children(recursive=True)
+            return sum(sum(p.cpu_times()[:2]) for p in processos)
+        except psutil.Error:
+            return None
+
+    if os.path.isdir("/proc"):
+        return _cpu_proc_linux(pid)
+    return None
+
+
+class SessaoNavegador:
+    """Um driver inicializado, sua pasta de download e seus contadores."""
+
+    def __init__(self, indice, pasta_base=DOWNLOAD_DIR, headless=True):
+        self.indice = indice
+        self.pasta = Path(pasta_base) / f"sessao_{indice}"
+        self.headless = headless
+        self.driver = None
+        self.trabalhos = 0
+        self.reciclagens = 0
+
+    def iniciar(self):
+        self.driver = iniciar_driver(download_dir=self.pasta, headless=self.headless)
+        self.driver.get(SIDRA_URL)
+        self.trabalhos = 0
+
+    def encerrar(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    def reciclar(self):
+        print(f"   -> ♻️  Reciclando sessão {self.indice} após {self.trabalhos} trabalho(s)...")
+        self.encerrar()
+        self.iniciar()
+        self.reciclagens += 1
+
+    def saudavel(self):
+        """Health check barato: o driver responde e ainda tem uma janela aberta."""
+        if self.driver is None:
+            return False
+        try:
+            return bool(self.driver.window_handles) and self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def resetar(self):
+        """
+        Limpa o estado do navegador (e o cache de localizadores) e volta à
+        página inicial do SIDRA — não à página da tabela. A tabela só pode
+        ser aberta pela busca da interface (nunca pela URL), varia de um
+        trabalho para outro (`TrabalhoExtracao.tabela`, planos) e cada
+        trabalho começa por `buscar_tabela`, que parte da página inicial.
+        Refazer a busca aqui só moveria esse tempo para o reset, que roda
+        na mesma thread logo depois do trabalho.
+        """
+        driver = self.driver
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+
+        # Fecha abas extras abertas durante o trabalho anterior
+        principal = driver.window_handles[0]
+        for aba in driver.window_handles[1:]:
+            driver.switch_to.window(aba)
+            driver.close()
+        driver.switch_to.window(principal)
+
+        driver.get(SIDRA_URL)
+        localizadores(driver).reiniciar()  # handles e estatísticas valem por trabalho
+
+
+class PoolNavegadores:
+    """
+    Mantém `tamanho` sessões quentes.
+
+    Uso:
+        with PoolNavegadores(2) as pool:
+            with pool.sessao() as sessao:
+                buscar_tabela(sessao.driver, ...)
+    """
+
+    def __init__(self, tamanho=2, headless=True, pasta_base=DOWNLOAD_DIR,
+                 max_trabalhos=25, max_rss_mb=1500):
+        self.tamanho = tamanho
+        self.max_trabalhos = max_trabalhos
+        self.max_rss_mb = max_rss_mb
+        self.sessoes = [SessaoNavegador(i, pasta_base, headless) for i in range(tamanho)]
+        self._livres = queue.Queue()
+        self._lock = threading.Lock()
+        self._iniciado = False
+
+    def iniciar(self):
+        """Aquece todas as sessões em paralelo."""
+        with self._lock:
+            if self._iniciado:
+                return
+            inicio = time.perf_counter()
+            threads = [threading.Thread(target=s.iniciar) for s in self.sessoes]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            # Sessões que falharam ao abrir entram mesmo assim: são reabertas no empréstimo
+            for s in self.sessoes:
+                self._livres.put(s)
+            self._iniciado = True
+            prontas = sum(1 for s in self.sessoes if s.driver is not None)
+            print(f"🔥 Pool aquecido: {prontas}/{self.tamanho} sessões em "
+                  f"{time.perf_counter() - inicio:.1f}s")
+
+    def encerrar(self):
+        with self._lock:
+            for s in self.sessoes:
+                s.encerrar()
+            self._livres = queue.Queue()
+            self._iniciado = False
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+    def _precisa_reciclar(self, sessao):
+        if sessao.trabalhos >= self.max_trabalhos:
+            return True
+        rss = rss_navegador(sessao.driver)
+        if rss is not None and rss > self.max_rss_mb:
+            print(f"   -> ⚠️ Sessão {sessao.indice} usando {rss:.0f} MB (limite {self.max_rss_mb} MB)")
+            return True
+        return False
+
+    @contextmanager
+    def sessao(self, timeout=None):
+        """Empresta uma sessão saudável; ao devolver, reseta ou recicla."""
+        self.iniciar()
+        sessao = self._livres.get(timeout=timeout)
+        try:
+            if not sessao.saudavel():
+                sessao.reciclar()
+        except Exception:
+            self._livres.put(sessao)
+            raise
+
+        try:
+            yield sessao
+        finally:
+            sessao.trabalhos += 1
+            try:
+                if self._precisa_reciclar(sessao) or not sessao.saudavel():
+                    sessao.reciclar()
+                else:
+                    sessao.resetar()
+            except Exception as e:
+                # Sem driver, a sessão será reaberta no próximo empréstimo
+                print(f"   -> ⚠️ Falha ao resetar sessão {sessao.indice}: {e}")
+                sessao.encerrar()
+            finally:
+                self._livres.put(sessao)
@@ -0,0 +1,259 @@
+"""
+Spans estruturados das etapas da extração.
+
+Cada etapa (`medir_etapa` no script principal) vira um `Span` com duração,
+quantidade de round-trips ao WebDriver e de retentativas. Os spans formam
+uma árvore por execução (trace) e valem por thread/tarefa (contextvars),
+então workers paralelos não se misturam.
+
+- round-trips: `instrumentar_driver` envolve `driver.execute`, por onde
+  passa todo comando do Selenium (inclusive os polls do WebDriverWait);
+- retentativas: os laços de nova tentativa chamam `registrar_retentativa`.
+
+Contagens são inclusivas: um span soma as dos seus filhos.
+
+Coleta: só os spans de um trace aberto com `novo_trace` são guardados, em
+uma lista do próprio contexto, até `retirar_spans`; um `novo_trace` seguinte
+no mesmo contexto descarta o que não foi retirado. Spans fora de um trace
+explícito (aquecimento do pool, benchmarks) não ficam acumulados.
+
+Exportação: JSON lines (`exportar_jsonl`, uma linha por span, acumulando
+execuções no mesmo arquivo) ou OTLP/JSON (`exportar_otlp`), que o
+OpenTelemetry Collector importa sem o SDK instalado.
+
+Uso:
+    python rastreamento.py resumo                      # p50/p95 por etapa
+    python rastreamento.py otlp -o traces.json         # converte para OTLP/JSON
+"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+_span_atual = ContextVar("span_atual", default=None)
+_trace_atual = ContextVar("trace_atual", default=None)
+_coleta = ContextVar("coleta_spans", default=None)  # (trace_id, [spans concluídos]) do contexto
+
+
+@dataclass
+class Span:
+    nome: str
+    trace_id: str
+    span_id: str
+    pai_id: Optional[str]
+    inicio_ns: int
+    duracao: float = 0.0
+    round_trips: int = 0
+    retentativas: int = 0
+    atributos: dict = field(default_factory=dict)
+    erro: Optional[str] = None
+    pai: Optional["Span"] = field(default=None, repr=False, compare=False)
+
+    def como_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "pai_id": self.pai_id,
+            "nome": self.nome,
+            "inicio_ns": self.inicio_ns,
+            "duracao": round(self.duracao, 6),
+            "round_trips": self.round_trips,
+            "retentativas": self.retentativas,
+            "atributos": self.atributos,
+            "erro": self.erro,
+        }
+
+
+def novo_trace():
+    """Inicia um trace novo no contexto atual, com coleta dos spans; retorna o trace_id."""
+    trace_id = os.urandom(16).hex()
+    _trace_atual.set(trace_id)
+    _coleta.set((trace_id, []))
+    return trace_id
+
+
+@contextmanager
+def span(nome, **atributos):
+    """Abre um span filho do span atual (ou raiz de um trace)."""
+    pai = _span_atual.get()
+    trace_id = pai.trace_id if pai else _trace_atual.get()
+    if trace_id is None:  # span avulso: ganha um trace, mas sem coleta
+        trace_id = os.urandom(16).hex()
+        _trace_atual.set(trace_id)
+    atual = Span(nome, trace_id, os.urandom(8).hex(), pai.span_id if pai else None,
+                 time.time_ns(), atributos=dict(atributos), pai=pai)
+    token = _span_atual.set(atual)
+    inicio = time.perf_counter()
+    try:
+        yield atual
+    except BaseException as e:
+        atual.erro = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        atual.duracao = time.perf_counter() - inicio
+        _span_atual.reset(token)
+        coleta = _coleta.get()
+        if coleta is not None and coleta[0] == trace_id:
+            coleta[1].append(atual)
+
+
+def _na_cadeia(incremento):
+    atual = _span_atual.get()
+    while atual is not None:
+        incremento(atual)
+        atual = atual.pai
+
+
+def contar_round_trip():
+    _na_cadeia(lambda s: setattr(s, "round_trips", s.round_trips + 1))
+
+
+def registrar_retentativa(quantidade=1):
+    _na_cadeia(lambda s: setattr(s, "retentativas", s.retentativas + quantidade))
+
+
+def anotar(**atributos):
+    """Acrescenta atributos ao span atual (se houver)."""
+    atual = _span_atual.get()
+    if atual is not None:
+        atual.atributos.update(atributos)
+
+
+def instrumentar_driver(driver):
+    """Conta cada comando enviado ao WebDriver no span atual."""
+    original = driver.execute
+
+    def execute(comando, parametros=None):
+        contar_round_trip()
+        return original(comando, parametros)
+
+    driver.execute = execute
+    return driver
+
+
+def retirar_spans(trace_id=None):
+    """Retira e retorna os spans coletados do trace do contexto atual (`trace_id`, se informado, deve ser ele)."""
+    coleta = _coleta.get()
+    if coleta is None or (trace_id is not None and coleta[0] != trace_id):
+        return []
+    escolhidos = list(coleta[1])
+    coleta[1].clear()
+    return sorted(escolhidos, key=lambda s: s.inicio_ns)
+
+
+# ====== EXPORTAÇÃO ======
+
+def exportar_jsonl(spans, caminho):
+    """Acrescenta os spans ao arquivo JSON lines `caminho`."""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, "a", encoding="utf-8") as f:
+        for s in spans:
+            f.write(json.dumps(s if isinstance(s, dict) else s.como_dict(), ensure_ascii=False) + "\n")
+    return caminho
+
+
+def ler_jsonl(caminhos):
+    spans = []
+    for caminho in caminhos:
+        with open(caminho, encoding="utf-8") as f:
+            spans.extend(json.loads(linha) for linha in f if linha.strip())
+    return spans
+
+
+def _atributo_otlp(chave, valor):
+    if isinstance(valor, bool):
+        return {"key": chave, "value": {"boolValue": valor}}
+    if isinstance(valor, int):
+        return {"key": chave, "value": {"intValue": str(valor)}}
+    if isinstance(valor, float):
+        return {"key": chave, "value": {"doubleValue": valor}}
+    return {"key": chave, "value": {"stringValue": str(valor)}}
+
+
+def exportar_otlp(spans, caminho, servico="sidra-1209"):
+    """Grava os spans (objetos ou dicts do JSONL) no formato OTLP/JSON."""
+    convertidos = []
+    for s in spans:
+        s = s if isinstance(s, dict) else s.como_dict()
+        atributos = {**s["atributos"], "sidra.round_trips": s["round_trips"], "sidra.retentativas": s["retentativas"]}
+        convertidos.append({
+            "traceId": s["trace_id"],
+            "spanId": s["span_id"],
+            **({"parentSpanId": s["pai_id"]} if s["pai_id"] else {}),
+            "name": s["nome"],
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s["inicio_ns"]),
+            "endTimeUnixNano": str(s["inicio_ns"] + int(s["duracao"] * 1e9)),
+            "attributes": [_atributo_otlp(k, v) for k, v in atributos.items()],
+            "status": {"code": 2, "message": s["erro"]} if s["erro"] else {"code": 1},
+        })
+
+    documento = {"resourceSpans": [{
+        "resource": {"attributes": [_atributo_otlp("service.name", servico)]},
+        "scopeSpans": [{"scope": {"name": "rastreamento"}, "spans": convertidos}],
+    }]}
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(json.dumps(documento, ensure_ascii=False), encoding="utf-8")
+    return caminho
+
+
+# ====== RESUMO ======
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) com interpolação linear."""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    posicao = (len(ordenados) - 1) * p / 100
+    base = int(posicao)
+    proximo = min(base + 1, len(ordenados) - 1)
+    return ordenados[base] + (ordenados[proximo] - ordenados[base]) * (posicao - base)
+
+
+def imprimir_resumo(spans):
+    """p50/p95 da duração por etapa, com médias de round-trips e retentativas."""
+    por_etapa = defaultdict(list)
+    for s in spans:
+        por_etapa[s["nome"] if isinstance(s, dict) else s.nome].append(s if isinstance(s, dict) else s.como_dict())
+
+    execucoes = len({s["trace_id"] for grupo in por_etapa.values() for s in grupo})
+    print("\n" + "="*60)
+    print(f"⏱️  RESUMO POR ETAPA ({execucoes} execução(ões))")
+    print("="*60)
+    print(f"   {'etapa':<34} {'n':>4} {'p50 (s)':>8} {'p95 (s)':>8} {'round-trips':>11} {'retent.':>7} {'erros':>5}")
+    for nome in sorted(por_etapa):
+        grupo = por_etapa[nome]
+        duracoes = [s["duracao"] for s in grupo]
+        print(f"   {nome:<34} {len(grupo):>4} {percentil(duracoes, 50):>8.2f} {percentil(duracoes, 95):>8.2f} "
+              f"{sum(s['round_trips'] for s in grupo) / len(grupo):>11.1f} "
+              f"{sum(s['retentativas'] for s in grupo) / len(grupo):>7.1f} "
+              f"{sum(1 for s in grupo if s['erro']):>5}")
+
+
+def main():
+    from configuracao import TRACE_DIR
+
+    parser = argparse.ArgumentParser(description="Resumo e exportação dos spans da extração.")
+    parser.add_argument("comando", choices=["resumo", "otlp"])
+    parser.add_argument("arquivos", nargs="*", help=f"Arquivos JSON lines (padrão: {TRACE_DIR / 'spans.jsonl'}).")
+    parser.add_argument("-o", "--saida", default=None, help="Arquivo OTLP/JSON de saída (comando otlp).")
+    args = parser.parse_args()
+
+    spans = ler_jsonl(args.arquivos or [TRACE_DIR / "spans.jsonl"])
+    if args.comando == "resumo":
+        imprimir_resumo(spans)
+    else:
+        destino = exportar_otlp(spans, args.saida or TRACE_DIR / "traces.otlp.json")
+        print(f"   -> 💾 {len(spans)} span(s) em {destino}")
+
+
+if __name__ == "__main__":
+    main()
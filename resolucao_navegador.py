@@ -0,0 +1,226 @@
+"""
+Localização do navegador e do ChromeDriver, sob demanda e com cache em disco.
+
+Nada é procurado na importação: `resolver_navegador()` e
+`resolver_chromedriver()` são chamados por `iniciar_driver` na primeira
+vez que um navegador é aberto. O resultado (caminho, tamanho + mtime do
+binário e versão) fica em `CACHE_RESOLUCAO` e vale enquanto:
+
+- as variáveis CHROME_BINARY / BRAVE_BINARY / CHROMEDRIVER_PATH e o
+  sistema operacional forem os mesmos;
+- os binários continuarem no lugar, com o mesmo tamanho e mtime (uma
+  atualização do Chrome ou do driver invalida a entrada).
+
+Com o ChromeDriver já resolvido, o driver é iniciado com `Service(caminho)`
+e o Selenium Manager não roda a cada abertura.
+"""
+import json
+import os
+import platform
+import shutil
+from pathlib import Path
+
+from configuracao import CHROMEDRIVER_PATH
+
+CACHE_RESOLUCAO = Path(os.environ.get(
+    "SIDRA_RESOLUCAO_CACHE", Path.home() / ".cache" / "sidra" / "navegador.json"
+))
+
+_resolvidos = {}  # memória do processo: "navegador" / "chromedriver" -> caminho
+
+
+# ====== DETECÇÃO ======
+
+def detectar_navegador():
+    """
+    Detecta automaticamente o navegador instalado no sistema.
+    Suporta: Windows, macOS, Linux
+    """
+    sistema = platform.system()
+
+    caminhos_navegadores = {
+        "Windows": [
+            r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+            r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+            r"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe",
+            os.path.expanduser(r"~\AppData\Local\Google\Chrome\Application\chrome.exe"),
+            os.path.expanduser(r"~\AppData\Local\BraveSoftware\Brave-Browser\Application\brave.exe"),
+        ],
+        "Darwin": [  # macOS
+            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+            "/Applications/Brave Browser.app/Contents/MacOS/Brave Browser",
+            "/Applications/Chromium.app/Contents/MacOS/Chromium",
+            os.path.expanduser("~/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"),
+        ],
+        "Linux": [
+            "/usr/bin/google-chrome",
+            "/usr/bin/google-chrome-stable",
+            "/usr/bin/chromium",
+            "/usr/bin/chromium-browser",
+            "/usr/bin/brave-browser",
+            "/usr/bin/brave",
+            "/snap/bin/chromium",
+            "/usr/local/bin/chrome",
+        ]
+    }
+
+    # Primeiro tenta variáveis de ambiente
+    for variavel in ("CHROME_BINARY", "BRAVE_BINARY"):
+        caminho = os.environ.get(variavel)
+        if caminho and os.path.exists(caminho):
+            print(f"✅ Navegador configurado via {variavel}: {caminho}")
+            return caminho
+
+    # Detecta o sistema operacional
+    if sistema not in caminhos_navegadores:
+        raise OSError(f"❌ Sistema operacional não suportado: {sistema}")
+
+    print(f"🔍 Detectando navegador no {sistema}...")
+
+    # Procura pelos caminhos padrão
+    for caminho in caminhos_navegadores[sistema]:
+        if os.path.exists(caminho):
+            print(f"✅ Navegador encontrado: {caminho}")
+            return caminho
+
+    # Linux: procura no PATH (equivalente a 'which', sem abrir processo)
+    if sistema == "Linux":
+        for comando in ["google-chrome", "chromium", "chromium-browser", "brave-browser"]:
+            caminho = shutil.which(comando)
+            if caminho:
+                print(f"✅ Navegador encontrado no PATH: {caminho}")
+                return caminho
+
+    # Erro se não encontrou
+    raise FileNotFoundError(
+        f"❌ Nenhum navegador compatível encontrado no {sistema}!\n\n"
+        "Instale um dos seguintes:\n"
+        "  • Google Chrome: https://www.google.com/chrome/\n"
+        "  • Brave Browser: https://brave.com/\n"
+        "  • Chromium: https://www.chromium.org/\n\n"
+        "Ou configure manualmente:\n"
+        "  Windows: set CHROME_BINARY=C:\\caminho\\chrome.exe\n"
+        "  macOS/Linux: export CHROME_BINARY=/caminho/chrome\n"
+    )
+
+
+def versao_binario(caminho):
+    """Saída de `<binário> --version` (ex.: "Google Chrome 120.0.6099.109"), ou None."""
+    import subprocess
+
+    try:
+        resultado = subprocess.run([caminho, "--version"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return resultado.stdout.strip() or None
+
+
+# ====== CACHE ======
+
+def _assinatura(caminho):
+    """(tamanho, mtime) do binário; None se não existe mais."""
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return [info.st_size, info.st_mtime_ns]
+
+
+def _origem():
+    """O que determina a resolução: se mudar, o cache inteiro é descartado."""
+    return {
+        "sistema": platform.system(),
+        "CHROME_BINARY": os.environ.get("CHROME_BINARY"),
+        "BRAVE_BINARY": os.environ.get("BRAVE_BINARY"),
+        "CHROMEDRIVER_PATH": CHROMEDRIVER_PATH,
+    }
+
+
+def _ler_cache(caminho=None):
+    caminho = Path(caminho or CACHE_RESOLUCAO)
+    try:
+        cache = json.loads(caminho.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return cache if cache.get("origem") == _origem() else {}
+
+
+def _gravar_cache(cache, caminho=None):
+    caminho = Path(caminho or CACHE_RESOLUCAO)
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_suffix(".tmp")
+        temporario.write_text(json.dumps({**cache, "origem": _origem()}, indent=1), encoding="utf-8")
+        os.replace(temporario, caminho)
+    except OSError:
+        pass  # sem cache gravável: só resolve de novo na próxima execução
+
+
+def _valida(entrada):
+    return bool(entrada) and _assinatura(entrada["caminho"]) == entrada["assinatura"]
+
+
+def limpar_cache(caminho=None):
+    """Esquece as resoluções (memória e disco)."""
+    _resolvidos.clear()
+    Path(caminho or CACHE_RESOLUCAO).unlink(missing_ok=True)
+
+
+# ====== RESOLUÇÃO ======
+
+def resolver_navegador():
+    """Caminho do navegador: memória, cache em disco ou `detectar_navegador()`."""
+    if "navegador" in _resolvidos:
+        return _resolvidos["navegador"]
+
+    cache = _ler_cache()
+    entrada = cache.get("navegador")
+    if not _valida(entrada):
+        caminho = detectar_navegador()
+        entrada = {"caminho": caminho, "assinatura": _assinatura(caminho), "versao": versao_binario(caminho)}
+        cache = {"navegador": entrada}  # navegador novo: o driver resolvido antes não vale mais
+        _gravar_cache(cache)
+    _resolvidos["navegador"] = entrada["caminho"]
+    return entrada["caminho"]
+
+
+def resolver_chromedriver(navegador=None):
+    """
+    Caminho do ChromeDriver compatível com o navegador: CHROMEDRIVER_PATH,
+    cache em disco ou o Selenium Manager (resolvido uma vez e guardado).
+    """
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+    if "chromedriver" in _resolvidos:
+        return _resolvidos["chromedriver"]
+
+    navegador = navegador or resolver_navegador()
+    cache = _ler_cache()
+    entrada = cache.get("chromedriver")
+    if not (_valida(entrada) and entrada.get("navegador") == cache.get("navegador", {}).get("assinatura")):
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+        print("🔍 Resolvendo ChromeDriver com o Selenium Manager...")
+        opcoes = Options()
+        opcoes.binary_location = navegador
+        caminho = SeleniumManager().driver_location(opcoes)
+        entrada = {
+            "caminho": caminho,
+            "assinatura": _assinatura(caminho),
+            "versao": versao_binario(caminho),
+            "navegador": _assinatura(navegador),
+        }
+        cache.setdefault("navegador", {"caminho": navegador, "assinatura": _assinatura(navegador),
+                                       "versao": versao_binario(navegador)})
+        cache["chromedriver"] = entrada
+        _gravar_cache(cache)
+    _resolvidos["chromedriver"] = entrada["caminho"]
+    return entrada["caminho"]
+
+
+def descrever_resolucao():
+    """Resumo do que está em cache (para logs e para o benchmark)."""
+    cache = _ler_cache()
+    return {nome: (cache[nome]["caminho"], cache[nome].get("versao")) for nome in ("navegador", "chromedriver")
+            if nome in cache}
@@ -0,0 +1,393 @@
+"""
+Extração da Tabela 1209 pela API do SIDRA, sem navegador.
+
+Para atualizações agendadas a navegação pela interface não é necessária:
+os mesmos dados (classificação C58, nível territorial UF) vêm do endpoint
+`values` da apisidra. Os filtros usados por `aplicar_filtros_tabela`
+({"Total": False, "60 a 69 anos": True, ...}) são traduzidos para códigos
+de categoria a partir dos metadados da tabela, e o resultado é gravado no
+mesmo formato "br.csv" / mesmo nome de arquivo do download pelo navegador.
+
+As conexões HTTP (keep-alive + gzip) são reaproveitadas por um único
+`urllib3.PoolManager`; urllib3 já vem como dependência do Selenium.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from configuracao import DOWNLOAD_DIR, FILTROS_1209
+
+API_VALORES_URL = os.environ.get("SIDRA_API_URL", "https://apisidra.ibge.gov.br").rstrip("/")
+API_METADADOS_URL = os.environ.get(
+    "SIDRA_API_METADADOS_URL", "https://servicodados.ibge.gov.br/api/v3/agregados"
+).rstrip("/")
+
+# Nível territorial escolhido na árvore da interface -> parâmetro da API
+NIVEIS_TERRITORIAIS = {
+    "brasil": "n1",
+    "grande_regiao": "n2",
+    "unidade_federacao": "n3",
+    "municipio": "n6",
+}
+
+# Especificação da extração padrão (a mesma feita pelo navegador)
+ESPECIFICACAO_1209 = {
+    "tabela": "1209",
+    "classificacao": "58",
+    "filtros": FILTROS_1209,
+    "nivel": "unidade_federacao",
+    "periodo": "last",
+    "variavel": None,  # None = primeira variável da tabela (a selecionada por padrão na interface)
+    "prefixo": "populacao_60mais_1209",
+}
+
+_pool = None
+_limitador = None
+
+
+class EspecificacaoInvalida(ValueError):
+    """Especificação que a tabela não atende (classificação, categoria, período, campo); repetir não adianta."""
+
+
+def pool_http():
+    """PoolManager compartilhado: conexões reaproveitadas entre requisições."""
+    global _pool
+    if _pool is None:
+        import urllib3  # ~90 ms: só quando a primeira requisição sai (cache hit não paga)
+
+        _pool = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=8,
+            headers={"Accept-Encoding": "gzip, deflate", "User-Agent": "sidra-1209/1.0"},
+            retries=urllib3.Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+            timeout=urllib3.Timeout(connect=10, read=60),
+        )
+    return _pool
+
+
+def definir_limitador(limitador):
+    """
+    Limitador de taxa compartilhado (ex.: `agendador_sidra.LimitadorTaxa`):
+    cada requisição chama `limitador.aguardar()` antes de sair. None desliga.
+    """
+    global _limitador
+    _limitador = limitador
+
+
+def obter(url, cabecalhos=None):
+    """GET com descompressão gzip transparente; aceita 200 e 304 (GET condicional)."""
+    if _limitador is not None:
+        _limitador.aguardar()
+    resposta = pool_http().request("GET", url, headers={**pool_http().headers, **(cabecalhos or {})})
+    if resposta.status not in (200, 304):
+        raise RuntimeError(f"❌ SIDRA respondeu {resposta.status} para {url}")
+    return resposta
+
+
+def obter_json(url):
+    return json.loads(obter(url).data.decode("utf-8"))
+
+
+# ====== METADADOS E MAPEAMENTO DE FILTROS ======
+
+def obter_metadados(tabela):
+    return obter_json(f"{API_METADADOS_URL}/{tabela}/metadados")
+
+
+def obter_periodos(tabela):
+    """{período: data da última modificação} dos períodos publicados da tabela."""
+    return {str(p["id"]): p.get("modificacao") for p in obter_json(f"{API_METADADOS_URL}/{tabela}/periodos")}
+
+
+def mapear_filtros(metadados, classificacao, filtros):
+    """
+    Traduz {texto da opção: marcar?} para a lista de códigos de categoria.
+
+    Só as opções marcadas entram na consulta; a correspondência segue a da
+    interface: nome exato e, na falta dele, nome que contém o texto, desde
+    que uma única categoria o contenha (ambíguo = EspecificacaoInvalida).
+    """
+    classificacao = str(classificacao)
+    try:
+        clas = next(c for c in metadados["classificacoes"] if str(c["id"]) == classificacao)
+    except StopIteration:
+        raise EspecificacaoInvalida(f"❌ Classificação C{classificacao} não existe na tabela {metadados.get('id')}")
+
+    codigos = []
+    for texto_opcao, marcar in filtros.items():
+        if not marcar:
+            continue
+        categorias = clas["categorias"]
+        categoria = next((c for c in categorias if c["nome"].strip() == texto_opcao), None)
+        if categoria is None:
+            parciais = [c for c in categorias if texto_opcao in c["nome"]]
+            if len(parciais) > 1:
+                nomes = ", ".join(c["nome"].strip() for c in parciais)
+                raise EspecificacaoInvalida(f"❌ Categoria '{texto_opcao}' é ambígua em C{classificacao}: {nomes}")
+            categoria = parciais[0] if parciais else None
+        if categoria is None:
+            raise EspecificacaoInvalida(f"❌ Categoria '{texto_opcao}' não encontrada em C{classificacao}")
+        codigos.append(str(categoria["id"]))
+    return clas, codigos
+
+
+def montar_url_valores(tabela, nivel, periodo, classificacao, codigos, variavel, localidades="all"):
+    """`localidades`: "all", códigos ("11,12") ou filtro por nível superior ("in n3 11,12")."""
+    return (
+        f"{API_VALORES_URL}/values/t/{tabela}/{NIVEIS_TERRITORIAIS[nivel]}/{localidades.replace(' ', '%20')}"
+        f"/v/{variavel}/p/{periodo}/c{classificacao}/{','.join(codigos)}"
+    )
+
+
+# ====== FORMATO "BR.CSV" ======
+
+def _valor_br(valor):
+    """Valor da API -> formato brasileiro do SIDRA (vírgula decimal, placeholders intactos)."""
+    return valor.replace(".", ",") if valor and valor[0].isdigit() else valor
+
+
+def _chaves_dimensoes(cabecalho):
+    """Mapeia o nome de cada dimensão (ex.: 'Ano') para a sua chave 'DnN'."""
+    return {
+        rotulo: chave
+        for chave, rotulo in cabecalho.items()
+        if chave.startswith("D") and chave.endswith("N")
+    }
+
+
+def _chave_codigo(codigo):
+    """Ordenação numérica de códigos do SIDRA sem converter ("9" < "10")."""
+    return len(codigo), codigo
+
+
+def _coluna_codigo(chave_nome):
+    """Chave do código de uma dimensão a partir da do nome: "D1N" -> "D1C"."""
+    return chave_nome[:-1] + "C"
+
+
+def ordenar_colunas(colunas, periodos=(), codigos=()):
+    """
+    Ordem das colunas (ano, categoria) no "br.csv", a mesma na consulta
+    única e na particionada: períodos na ordem pedida (os demais, como os
+    de "last"/"all", por código) e, dentro de cada um, categorias na ordem
+    dos `codigos` pedidos.
+    """
+    anos = sorted({a for a, _ in colunas}, key=_chave_codigo)
+    ordem_anos = [p for p in periodos if p in anos] + [a for a in anos if a not in periodos]
+    categorias = list(dict.fromkeys(c for _, c in colunas))
+    ordem_categorias = [c for c in codigos if c in categorias] + [c for c in categorias if c not in codigos]
+    return [(a, c) for a in ordem_anos for c in ordem_categorias if (a, c) in colunas]
+
+
+def escrever_csv_br(valores, metadados, variavel, clas, nivel_rotulo, caminho, periodos=(), codigos=()):
+    """
+    Grava a resposta da API no layout do download "br.csv" do SIDRA:
+
+        Tabela 1209 - <nome>
+        Variável - <variável> (<unidade>)
+        <nível territorial>;Ano x <classificação>
+        ;<ano>;<ano>...
+        ;<categoria>;<categoria>...
+        <território>;<valor>;<valor>...
+        (linha vazia)
+        Fonte: IBGE - <pesquisa>
+
+    Territórios por código e colunas por `ordenar_colunas`, como em
+    `consulta_particionada.mesclar_particoes`.
+    """
+    cabecalho, linhas = valores[0], valores[1:]
+    dims = _chaves_dimensoes(cabecalho)
+    chave_local = dims[nivel_rotulo]
+    chave_ano = dims["Ano"]
+    chave_cat = dims[clas["nome"]]
+    codigo_local, codigo_ano, codigo_cat = (_coluna_codigo(c) for c in (chave_local, chave_ano, chave_cat))
+
+    nomes = {}        # (ano, categoria) em códigos -> nomes
+    territorios = {}  # código do território -> (nome, {(ano, categoria): valor})
+    for linha in linhas:
+        coluna = (linha[codigo_ano], linha[codigo_cat])
+        nomes[coluna] = (linha[chave_ano], linha[chave_cat])
+        territorios.setdefault(linha[codigo_local], (linha[chave_local], {}))[1][coluna] = linha["V"]
+    colunas = ordenar_colunas(nomes, periodos, codigos)
+
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f, delimiter=";", lineterminator="\r\n")
+        escrever_cabecalho_br(escritor, metadados, variavel, clas, nivel_rotulo, [nomes[c] for c in colunas])
+        for codigo in sorted(territorios, key=_chave_codigo):
+            local, celulas = territorios[codigo]
+            escritor.writerow([local] + [_valor_br(celulas.get(c, "-")) for c in colunas])
+        escrever_rodape_br(escritor, metadados)
+    return caminho
+
+
+def escrever_cabecalho_br(escritor, metadados, variavel, clas, nivel_rotulo, colunas):
+    """Linhas de título e de colunas [(ano, categoria), ...] do layout "br.csv"."""
+    escritor.writerow([f"Tabela {metadados['id']} - {metadados['nome']}"])
+    escritor.writerow([f"Variável - {variavel['nome']} ({variavel['unidade']})"])
+    escritor.writerow([nivel_rotulo, f"Ano x {clas['nome']}"])
+    escritor.writerow([""] + [ano for ano, _ in colunas])
+    escritor.writerow([""] + [cat for _, cat in colunas])
+
+
+def escrever_rodape_br(escritor, metadados):
+    escritor.writerow([])
+    escritor.writerow([f"Fonte: IBGE - {metadados.get('pesquisa', 'Censo Demográfico')}"])
+
+
+# ====== EXTRAÇÃO ======
+
+ROTULOS_NIVEIS = {
+    "brasil": "Brasil",
+    "grande_regiao": "Grande Região",
+    "unidade_federacao": "Unidade da Federação",
+    "municipio": "Município",
+}
+
+
+def escolher_variavel(metadados, variavel=None):
+    if variavel is None:
+        return metadados["variaveis"][0]
+    try:
+        return next(v for v in metadados["variaveis"] if str(v["id"]) == str(variavel))
+    except StopIteration:
+        raise EspecificacaoInvalida(f"❌ Variável {variavel} não existe na tabela {metadados.get('id')}")
+
+
+def _urls_consulta(especificacao, metadados):
+    clas, codigos = mapear_filtros(metadados, especificacao["classificacao"], especificacao["filtros"])
+    variavel = escolher_variavel(metadados, especificacao.get("variavel"))
+    url = montar_url_valores(
+        especificacao["tabela"], especificacao["nivel"], especificacao["periodo"],
+        especificacao["classificacao"], codigos, variavel["id"],
+    )
+    return clas, codigos, variavel, url
+
+
+def chave_especificacao(especificacao):
+    """Chave do cache de extrações para uma especificação."""
+    from cache_extracoes import chave_cache
+
+    return chave_cache(
+        especificacao["tabela"], especificacao["filtros"],
+        classificacao=especificacao["classificacao"], nivel=especificacao["nivel"],
+        periodo=especificacao["periodo"], variavel=especificacao.get("variavel"),
+    )
+
+
+def _cabecalhos_condicionais(entrada):
+    cabecalhos = {}
+    if entrada.get("etag"):
+        cabecalhos["If-None-Match"] = entrada["etag"]
+    if entrada.get("last_modified"):
+        cabecalhos["If-Modified-Since"] = entrada["last_modified"]
+    return cabecalhos
+
+
+def extrair_via_api(especificacao=ESPECIFICACAO_1209, download_dir=DOWNLOAD_DIR, cache=None):
+    """
+    Extrai a tabela pela API e grava `<prefixo>_<YYYYMMDD_HHMM>.csv`.
+    Retorna o caminho do arquivo gravado.
+
+    Com `cache` (CacheExtracoes), um CSV ainda fresco é devolvido sem
+    acessar a rede; um CSV vencido é revalidado com GET condicional
+    (If-None-Match / If-Modified-Since) antes de ser baixado de novo.
+    """
+    download_dir = Path(download_dir)
+    download_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    caminho = download_dir / f"{especificacao['prefixo']}_{timestamp}.csv"
+
+    entrada, resposta = None, None
+    if cache is not None:
+        chave = chave_especificacao(especificacao)
+        entrada, fresca = cache.consultar(chave)
+        if fresca:
+            print("   -> 📦 CSV ainda válido no cache, sem acessar o SIDRA.")
+            return cache.copiar_para(entrada, caminho)
+
+        if entrada and entrada.get("url"):
+            print("   -> 📦 Cache vencido: revalidando com GET condicional...")
+            resposta = obter(entrada["url"], _cabecalhos_condicionais(entrada))
+            if resposta.status == 304:
+                if cache.renovar(chave, entrada["hash"]):
+                    try:
+                        caminho_cache = cache.copiar_para(entrada, caminho)
+                    except FileNotFoundError:  # removido pelo LRU logo depois de renovar
+                        pass
+                    else:
+                        print("   -> ✅ Não modificado (304): usando o CSV do cache.")
+                        return caminho_cache
+                print("   -> ⚠️ A entrada saiu do cache durante a revalidação: baixando de novo.")
+                entrada, resposta = None, None
+
+    print(f"   -> Consultando metadados da tabela {especificacao['tabela']}...")
+    metadados = obter_metadados(especificacao["tabela"])
+    clas, codigos, variavel, url = _urls_consulta(especificacao, metadados)
+
+    # Acima do limite de células do SIDRA: partes em paralelo, mescladas em um CSV
+    from consulta_particionada import extrair_particionado, planejar_consulta
+
+    particoes = planejar_consulta(especificacao, metadados)
+    if len(particoes) > 1:
+        extrair_particionado(especificacao, metadados, particoes, caminho)
+        print(f"   -> ✅ CSV gravado: {caminho}")
+        if cache is not None:
+            cache.armazenar(chave, caminho.read_bytes())
+        return caminho
+
+    if resposta is None or entrada["url"] != url:
+        print(f"   -> Consultando valores: {url}")
+        resposta = obter(url)
+    valores = json.loads(resposta.data.decode("utf-8"))
+    if len(valores) < 2:
+        raise RuntimeError("❌ A API não retornou valores para os filtros informados.")
+
+    escrever_csv_br(valores, metadados, variavel, clas, ROTULOS_NIVEIS[especificacao["nivel"]], caminho,
+                    periodos=str(especificacao["periodo"]).split(","), codigos=codigos)
+    print(f"   -> ✅ CSV gravado: {caminho}")
+
+    if cache is not None:
+        cache.armazenar(
+            chave, caminho.read_bytes(), url=url,
+            etag=resposta.headers.get("ETag"), last_modified=resposta.headers.get("Last-Modified"),
+        )
+    return caminho
+
+
+def gravar_respostas(especificacao=ESPECIFICACAO_1209, pasta=Path(__file__).parent / "mock_sidra" / "api"):
+    """Grava as respostas reais da API para o servidor stub (`mock_sidra.servidor`)."""
+    import urllib3
+
+    from mock_sidra.servidor import caminho_resposta
+
+    metadados_url = f"{API_METADADOS_URL}/{especificacao['tabela']}/metadados"
+    metadados = obter_json(metadados_url)
+    *_, valores_url = _urls_consulta(especificacao, metadados)
+    for url, dados in ((metadados_url, metadados), (valores_url, obter_json(valores_url))):
+        destino = caminho_resposta(pasta, urllib3.util.parse_url(url).path)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_text(json.dumps(dados, ensure_ascii=False, indent=1), encoding="utf-8")
+        print(f"   -> 💾 {destino}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai a Tabela 1209 pela API do SIDRA (sem navegador).")
+    parser.add_argument("--gravar", action="store_true", help="Grava as respostas reais em mock_sidra/api/.")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora o cache de extrações.")
+    args = parser.parse_args()
+
+    if args.gravar:
+        gravar_respostas()
+    else:
+        from cache_extracoes import CacheExtracoes
+
+        cache = None if args.sem_cache else CacheExtracoes()
+        inicio = time.perf_counter()
+        extrair_via_api(cache=cache)
+        print(f"   -> ⏱️  {time.perf_counter() - inicio:.2f}s")
+        if cache is not None:
+            cache.imprimir_estatisticas()
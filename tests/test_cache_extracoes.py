@@ -0,0 +1,63 @@
+import pytest
+
+import sidra_api
+from cache_extracoes import CacheExtracoes
+from mock_sidra.servidor import iniciar_servidor
+
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    servidor, base = iniciar_servidor()
+    monkeypatch.setattr(sidra_api, "API_VALORES_URL", base)
+    monkeypatch.setattr(sidra_api, "API_METADADOS_URL", f"{base}/api/v3/agregados")
+    yield base
+    servidor.shutdown()
+
+
+def test_renovar_entrada_presente(tmp_path):
+    cache = CacheExtracoes(tmp_path, ttl=0)
+    hash_csv = cache.armazenar("a", b"csv")
+    entrada, fresca = cache.consultar("a")
+
+    assert not fresca
+    assert cache.renovar("a", entrada["hash"]) is True
+    assert entrada["hash"] == hash_csv
+    assert cache.estatisticas["revalidados"] == 1
+
+
+def test_renovar_entrada_removida_durante_revalidacao(tmp_path):
+    cache = CacheExtracoes(tmp_path, ttl=0, tamanho_max=10)
+    cache.armazenar("a", b"a" * 8)
+    entrada, _ = cache.consultar("a")
+
+    cache.armazenar("b", b"b" * 8)  # outro trabalho estoura o limite: "a" sai pelo LRU
+    assert cache.estatisticas["removidos"] == 1
+    assert cache.renovar("a", entrada["hash"]) is False
+    assert cache.consultar("a") == (None, False)
+
+
+def test_renovar_recusa_conteudo_trocado(tmp_path):
+    cache = CacheExtracoes(tmp_path, ttl=0)
+    cache.armazenar("a", b"antigo")
+    entrada, _ = cache.consultar("a")
+    cache.armazenar("a", b"novo")
+
+    assert cache.renovar("a", entrada["hash"]) is False
+
+
+def test_extrair_via_api_baixa_de_novo_se_a_entrada_sair_do_cache(tmp_path, mock_api):
+    cache = CacheExtracoes(tmp_path / "cache", ttl=0, tamanho_max=4096)
+    original = sidra_api.extrair_via_api(download_dir=tmp_path / "1", cache=cache)
+
+    consultar = cache.consultar
+
+    def consultar_e_remover(chave):
+        resultado = consultar(chave)
+        cache.armazenar("outra", b"x" * 4096)  # concorrente: a entrada consultada sai pelo LRU
+        return resultado
+
+    cache.consultar = consultar_e_remover
+    refeito = sidra_api.extrair_via_api(download_dir=tmp_path / "2", cache=cache)
+
+    assert refeito.read_bytes() == original.read_bytes()
+    assert cache.estatisticas["revalidados"] == 0
@@ -0,0 +1,183 @@
+import threading
+import time
+
+import pytest
+
+import diario_lotes
+from diario_lotes import DiarioLotes, Disjuntor, atraso_backoff, executar_lote
+from plano_extracao import EspecificacaoTabela
+from sidra_api import EspecificacaoInvalida
+
+
+def especificacoes(n):
+    return [EspecificacaoTabela("1209", {"C58": {"60 a 69 anos": True}}, saida=f"tabela_{i}") for i in range(n)]
+
+
+@pytest.fixture
+def diario(tmp_path):
+    diario = DiarioLotes(tmp_path / "diario.sqlite3")
+    yield diario
+    diario.fechar()
+
+
+# ====== DIÁRIO ======
+
+def test_retomar_devolve_interrompidos_a_pendente(tmp_path, diario):
+    diario.adicionar("lote", especificacoes(2))
+    assert diario.proximo("lote") is not None
+    diario.fechar()
+
+    reaberto = DiarioLotes(tmp_path / "diario.sqlite3")  # processo reiniciado
+    try:
+        assert reaberto.retomar("lote") == (1, 0)
+        assert reaberto.contagem("lote")["pendente"] == 2
+    finally:
+        reaberto.fechar()
+
+
+def test_retomar_refaz_concluido_sem_csv(tmp_path, diario):
+    diario.adicionar("lote", especificacoes(2))
+    for nome in ("mantido.csv", "apagado.csv"):
+        chave, _ = diario.proximo("lote")
+        (tmp_path / nome).write_text("x")
+        diario.concluir("lote", chave, tmp_path / nome)
+    (tmp_path / "apagado.csv").unlink()
+
+    assert diario.retomar("lote") == (0, 1)
+    assert diario.contagem("lote")["concluido"] == 1
+    chave, _ = diario.proximo("lote")
+    assert diario.trabalhos("lote")[1]["chave"] == chave
+
+
+def test_adicionar_ignora_especificacao_repetida(diario):
+    assert diario.adicionar("lote", especificacoes(2)) == 2
+    assert diario.adicionar("lote", especificacoes(3)) == 1
+
+
+def test_erro_permanente_esgota_na_primeira_tentativa(diario):
+    diario.adicionar("lote", especificacoes(1))
+    disjuntor = Disjuntor(limite_falhas=1, pausa=60)
+
+    def executar(especificacao, indice):
+        raise EspecificacaoInvalida("período inexistente")
+
+    contagem = executar_lote(diario, "lote", executar, disjuntor=disjuntor, max_tentativas=5, base_backoff=0)
+    assert contagem["esgotado"] == 1
+    assert diario.trabalhos("lote")[0]["tentativas"] == 1
+    assert disjuntor.aberturas == 0  # erro da especificação não indica site degradado
+
+
+def test_erro_transitorio_repete_ate_esgotar(diario):
+    diario.adicionar("lote", especificacoes(1))
+    chamadas = []
+
+    def executar(especificacao, indice):
+        chamadas.append(especificacao["tabela"])
+        raise TimeoutError("sem resposta")
+
+    contagem = executar_lote(diario, "lote", executar, disjuntor=Disjuntor(limite_falhas=100),
+                             max_tentativas=3, base_backoff=0)
+    assert contagem["esgotado"] == 1
+    assert len(chamadas) == 3
+    assert diario.trabalhos("lote")[0]["erro"] == "TimeoutError: sem resposta"
+
+
+def test_erro_transitorio_seguido_de_sucesso(tmp_path, diario):
+    diario.adicionar("lote", especificacoes(1))
+    falhas = iter([RuntimeError("503")])
+
+    def executar(especificacao, indice):
+        erro = next(falhas, None)
+        if erro is not None:
+            raise erro
+        caminho = tmp_path / "saida.csv"
+        caminho.write_text("x")
+        return caminho
+
+    contagem = executar_lote(diario, "lote", executar, base_backoff=0)
+    assert contagem["concluido"] == 1
+    assert diario.trabalhos("lote")[0]["tentativas"] == 2
+
+
+def test_falhar_agenda_nova_tentativa_com_backoff(diario):
+    diario.adicionar("lote", especificacoes(1))
+    chave, _ = diario.proximo("lote")
+    antes = time.time()
+    atraso = diario.falhar("lote", chave, "TimeoutError", base_backoff=10)
+
+    assert 5 <= atraso <= 10
+    assert diario.proximo("lote") is None  # ainda em backoff
+    assert diario.proxima_liberacao("lote") >= antes + atraso
+
+
+def test_atraso_backoff_exponencial_limitado(monkeypatch):
+    monkeypatch.setattr(diario_lotes.random, "uniform", lambda a, b: b)
+    assert [atraso_backoff(t, base=5) for t in (1, 2, 3)] == [5, 10, 20]
+    assert atraso_backoff(20, base=5, maximo=300) == 300
+
+
+def test_atraso_backoff_com_jitter():
+    for tentativas in range(1, 6):
+        assert 0.5 * 5 * 2 ** (tentativas - 1) <= atraso_backoff(tentativas, base=5) <= 5 * 2 ** (tentativas - 1)
+
+
+# ====== DISJUNTOR ======
+
+def test_disjuntor_abre_apos_falhas_seguidas():
+    disjuntor = Disjuntor(limite_falhas=2, pausa=60)
+    disjuntor.falha()
+    assert disjuntor.estado == "fechado"
+    disjuntor.falha()
+    assert disjuntor.estado == "aberto"
+    assert disjuntor.aberturas == 1
+
+    parar = threading.Event()
+    parar.set()
+    assert disjuntor.liberar(parar) is False  # aberto: ninguém passa
+
+
+def test_disjuntor_sucesso_zera_falhas_seguidas():
+    disjuntor = Disjuntor(limite_falhas=2, pausa=60)
+    disjuntor.falha()
+    disjuntor.sucesso()
+    disjuntor.falha()
+    assert disjuntor.estado == "fechado"
+
+
+def test_disjuntor_meio_aberto_libera_um_unico_teste():
+    disjuntor = Disjuntor(limite_falhas=1, pausa=0.1)
+    disjuntor.falha()
+    inicio = time.monotonic()
+    assert disjuntor.liberar() is True
+    assert time.monotonic() - inicio >= 0.1
+    assert disjuntor.estado == "meio-aberto"
+
+    # Um segundo worker espera enquanto o teste está em andamento
+    parar = threading.Event()
+    resultado = []
+    outro = threading.Thread(target=lambda: resultado.append(disjuntor.liberar(parar)))
+    outro.start()
+    outro.join(0.3)
+    assert outro.is_alive()
+    parar.set()
+    outro.join()
+    assert resultado == [False]
+
+
+def test_disjuntor_meio_aberto_fecha_com_sucesso():
+    disjuntor = Disjuntor(limite_falhas=1, pausa=0.05)
+    disjuntor.falha()
+    disjuntor.liberar()
+    disjuntor.sucesso()
+    assert disjuntor.estado == "fechado"
+    assert disjuntor.liberar() is True
+
+
+def test_disjuntor_meio_aberto_reabre_com_falha():
+    disjuntor = Disjuntor(limite_falhas=3, pausa=0.05)
+    for _ in range(3):
+        disjuntor.falha()
+    disjuntor.liberar()
+    disjuntor.falha()  # uma falha basta no meio-aberto
+    assert disjuntor.estado == "aberto"
+    assert disjuntor.aberturas == 2
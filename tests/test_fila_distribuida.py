@@ -0,0 +1,99 @@
+import json
+import time
+
+import pytest
+
+from fila_distribuida import FilaArquivos, No
+from plano_extracao import EspecificacaoTabela
+
+
+@pytest.fixture
+def fila(tmp_path):
+    fila = FilaArquivos(tmp_path / "fila", duracao_arrendamento=0.3)
+    fila.enfileirar([EspecificacaoTabela("1209", {"C58": {"60 a 69 anos": True}}, saida=f"tabela_{i}")
+                     for i in range(2)])
+    return fila
+
+
+def ler_arrendamento(fila, id_trabalho):
+    return json.loads(fila._arrendamento(id_trabalho).read_text(encoding="utf-8"))
+
+
+def test_reserva_exclusiva_entre_nos(fila):
+    primeiro = fila.reservar("no-a", 0)
+    segundo = fila.reservar("no-b", 0)
+
+    assert primeiro["id"] != segundo["id"]
+    assert fila.reservar("no-b", 1) is None
+    assert ler_arrendamento(fila, primeiro["id"])["no"] == "no-a"
+    assert fila.contagem()["em_execucao"] == 2
+
+
+def test_renovar_so_pelo_dono(fila):
+    trabalho = fila.reservar("no-a", 0)
+    expira = ler_arrendamento(fila, trabalho["id"])["expira_em"]
+
+    assert fila.renovar(trabalho["id"], "no-b", 0) is False
+    assert ler_arrendamento(fila, trabalho["id"])["no"] == "no-a"  # intacto
+
+    time.sleep(0.01)
+    assert fila.renovar(trabalho["id"], "no-a", 0) is True
+    assert ler_arrendamento(fila, trabalho["id"])["expira_em"] > expira
+
+
+def test_renovar_preserva_arrendamento_ilegivel(fila):
+    trabalho = fila.reservar("no-a", 0)
+    fila._arrendamento(trabalho["id"]).write_text("{incompleto", encoding="utf-8")
+
+    assert fila.renovar(trabalho["id"], "no-a", 0) is False
+    assert fila._arrendamento(trabalho["id"]).exists()
+
+
+def test_recuperar_trabalho_de_no_morto(fila):
+    trabalho = fila.reservar("no-a", 0)
+    time.sleep(0.35)  # no-a parou de renovar
+
+    assert fila.recuperar_expirados() == 1
+    assert fila.renovar(trabalho["id"], "no-a", 0) is False
+    assert fila.concluir(trabalho["id"], {"no": "no-a"}) is False  # resultado atrasado é descartado
+
+    # Volta à fila sem backoff, atrás do trabalho que ainda não tinha sido reservado
+    reservados = [fila.reservar("no-b", worker) for worker in (0, 1)]
+    assert reservados[1]["id"] == trabalho["id"]
+    recuperado = reservados[1]
+    assert recuperado["tentativas"] == 1
+    assert recuperado["historico"][0]["no"] == "no-a"
+    assert fila.concluir(recuperado["id"], {"no": "no-b"}) is True
+    assert fila.contagem()["concluidos"] == 1
+
+
+def test_recuperar_ignora_arrendamento_renovado(fila):
+    trabalho = fila.reservar("no-a", 0)
+    for _ in range(3):
+        time.sleep(0.15)
+        assert fila.renovar(trabalho["id"], "no-a", 0)
+        assert fila.recuperar_expirados() == 0
+
+
+def test_renovacao_interrompida_e_restaurada(fila):
+    trabalho = fila.reservar("no-a", 0)
+    arrendamento = fila._arrendamento(trabalho["id"])
+    renovando = arrendamento.with_name(f".{trabalho['id']}.deadbeef.renovando")
+    arrendamento.rename(renovando)  # nó morreu entre o rename e a recriação
+
+    time.sleep(0.35)
+    fila.recuperar_expirados()
+    assert not renovando.exists()
+    assert fila.contagem()["pendentes"] == 2  # o arrendamento voltou, venceu e o trabalho foi devolvido
+
+
+def test_devolver_vai_para_falhos_ao_esgotar(fila):
+    trabalho = fila.reservar("no-a", 0)
+    assert fila.devolver(trabalho["id"], "EspecificacaoInvalida", permanente=True) is None
+    assert fila.falhos()[0]["erro"] == "EspecificacaoInvalida"
+
+
+def test_no_publica_o_proprio_intervalo(fila):
+    no = No(fila, "no-a", n_workers=1, intervalo=7.5)
+    no._publicar()
+    assert fila.nos()[0]["intervalo"] == 7.5
@@ -0,0 +1,95 @@
+import math
+
+import pytest
+
+from parser_sidra import converter_valor, ler_arrays, ler_cabecalho, ler_registros
+
+CABECALHO = (
+    "Tabela 1209 - População, por grupos de idade\r\n"
+    "Variável - População (Pessoas)\r\n"
+    "Unidade da Federação;Ano x Grupo de idade\r\n"
+    ";2022;2022\r\n"
+    ";60 a 69 anos;70 anos ou mais\r\n"
+)
+DADOS = (
+    "Rondônia;123456;-\r\n"
+    "Acre;...;1.234,5\r\n"
+    "Amazonas;X;..\r\n"
+)
+ESPERADO = [
+    ("Rondônia", "60 a 69 anos", "2022", 123456.0),
+    ("Rondônia", "70 anos ou mais", "2022", 0.0),
+    ("Acre", "60 a 69 anos", "2022", None),
+    ("Acre", "70 anos ou mais", "2022", 1234.5),
+    ("Amazonas", "60 a 69 anos", "2022", None),
+    ("Amazonas", "70 anos ou mais", "2022", None),
+]
+
+
+def gravar(tmp_path, texto, encoding="utf-8"):
+    caminho = tmp_path / "tabela.csv"
+    caminho.write_bytes(texto.encode(encoding))
+    return caminho
+
+
+@pytest.mark.parametrize("texto, valor", [
+    ("1234", 1234.0), ("1.234,5", 1234.5), ("-", 0.0), ("...", None), ("..", None), ("X", None), ("", None),
+])
+def test_converter_valor(texto, valor):
+    assert converter_valor(texto) == valor
+
+
+@pytest.mark.parametrize("rodape", [
+    "",
+    "\r\nFonte: IBGE - Censo Demográfico\r\n",
+    "\r\nNotas:\r\n1 - Os dados são preliminares\r\nFonte: IBGE - Censo Demográfico\r\n",
+    ";\r\nFonte: IBGE - Censo Demográfico\r\n",
+])
+def test_ler_registros_com_rodapes(tmp_path, rodape):
+    assert list(ler_registros(gravar(tmp_path, CABECALHO + DADOS + rodape))) == ESPERADO
+
+
+def test_ler_registros_com_bom_e_sem_titulo(tmp_path):
+    texto = "\n".join(CABECALHO.splitlines()[2:]) + "\n" + DADOS
+    caminho = gravar(tmp_path, texto, encoding="utf-8-sig")
+    assert list(ler_registros(caminho)) == ESPERADO
+    assert ler_cabecalho(caminho).titulo == []
+
+
+def test_cabecalho_com_categoria_antes_do_periodo(tmp_path):
+    texto = (
+        "Tabela 1209\r\n"
+        "Unidade da Federação;Grupo de idade x Ano\r\n"
+        ";60 a 69 anos;60 a 69 anos\r\n"
+        ";2010;2022\r\n"
+        "Acre;1;2\r\n"
+    )
+    cabecalho = ler_cabecalho(gravar(tmp_path, texto))
+    assert cabecalho.dimensoes_coluna == ["Grupo de idade", "Ano"]
+    assert cabecalho.colunas == [("2010", "60 a 69 anos"), ("2022", "60 a 69 anos")]
+
+
+def test_sem_cabecalho_do_sidra(tmp_path):
+    with pytest.raises(ValueError):
+        list(ler_registros(gravar(tmp_path, "só uma linha de texto\r\n")))
+
+
+def test_ler_arrays_igual_a_ler_registros(tmp_path):
+    np = pytest.importorskip("numpy")
+    caminho = gravar(tmp_path, CABECALHO + DADOS + "\r\nFonte: IBGE\r\n")
+    dados = ler_arrays([caminho, caminho], linhas_por_bloco=2)
+    rotulos = dados["rotulos"]
+
+    assert dados["territorio"].dtype == np.int32
+    assert list(rotulos["territorio"]) == ["Rondônia", "Acre", "Amazonas"]
+    lidos = [
+        (rotulos["territorio"][t], rotulos["categoria"][c], rotulos["periodo"][p], None if math.isnan(v) else v)
+        for t, c, p, v in zip(dados["territorio"], dados["categoria"], dados["periodo"], dados["valor"])
+    ]
+    assert lidos == ESPERADO * 2
+
+
+def test_ler_arrays_numero_de_colunas_errado(tmp_path):
+    pytest.importorskip("numpy")
+    with pytest.raises(ValueError):
+        ler_arrays(gravar(tmp_path, CABECALHO + "Acre;1\r\n"))